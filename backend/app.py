@@ -1,11 +1,39 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template
 from flask_cors import CORS
 from pyngrok import ngrok
 from datetime import datetime
+from utils.admission import AdmissionController, Overloaded
 from utils.config import Config
-from utils.image_utils import decode_frame_from_base64
-from services.frame_processor import FrameProcessor
+from utils.image_utils import (
+    decode_base64_payload,
+    decode_frame_from_base64,
+    decode_frame_from_bytes,
+)
+from utils.memory import (
+    diff_snapshot,
+    finish_request_sample,
+    memory_summary,
+    start_request_sample,
+    stop_tracing,
+    take_snapshot,
+    update_resident_gauge,
+)
+from utils.metrics import WORKER_COLD_START_SECONDS, render_metrics
+from utils.profiling import finish_request_profile, start_request_profile
+from utils.tracing import NULL_TRACE, TRACE_MODES, RoundTrace, new_round_id, stage
+from utils.validation import InvalidRequest, client_round_id, json_field
+from utils.video import decode_clip_frames, decoded_frame, encode_clip_frames
+from services.capture_policy import CapturePolicy
+from services.frame_processor import OVERLAY_MODES, FrameProcessor
 from services.game_engine import GameEngine
+from services.match_store import MatchStore
+from services.model_variants import ModelVariantPolicy
+from services.round_processor import RoundProcessor
+from services.round_recorder import RoundRecorder
+from services.round_results import RoundResultCache
+from services.round_sessions import RoundSessionStore
+import os
+import threading
 import time
 
 # Initialize Flask app
@@ -18,6 +46,16 @@ CORS(
         "Authorization",
         "ngrok-skip-browser-warning",
         "Origin",
+        "X-RPSense-Trace",
+        "X-RPSense-Profile",
+        "X-RPSense-Budget-Ms",
+        "X-RPSense-Overlay",
+    ],
+    expose_headers=[
+        "X-RPSense-Round-Id",
+        "X-RPSense-Round-Cache",
+        "X-RPSense-Profile",
+        "Retry-After",
     ],
     methods=["GET", "POST", "OPTIONS"],
     supports_credentials=True,
@@ -35,9 +73,125 @@ def handle_preflight():
         return response
 
 
+# Per-request instrumentation of the frame endpoints:
+# - profiling on demand (X-RPSense-Profile: sample|cprofile or ?profile=...,
+#   with RPSENSE_CLIENT_PROFILES=1) or 1 in RPSENSE_PROFILE_EVERY_N requests
+# - peak allocation of 1 in RPSENSE_MEMORY_SAMPLE_EVERY_N requests
+INSTRUMENTED_ENDPOINTS = {
+    "process_frames",
+    "process_rois",
+    "process_clip",
+    "process_single_frame",
+    "append_round_frames",
+    "finalize_round",
+}
+
+
+@app.before_request
+def start_instrumentation():
+    if request.method != "OPTIONS" and request.endpoint in INSTRUMENTED_ENDPOINTS:
+        g.received_at = time.monotonic()  # round deadlines count from here
+        mode = request.headers.get("X-RPSense-Profile") or request.args.get("profile")
+        g.profiler = start_request_profile(mode, request.endpoint)
+        g.memory_sample = start_request_sample()
+
+
+@app.after_request
+def finish_instrumentation(response):
+    if request.endpoint in INSTRUMENTED_ENDPOINTS:
+        update_resident_gauge()
+    started_at = g.pop("memory_sample", None)
+    if started_at is not None:
+        finish_request_sample(started_at, request.endpoint)
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        path = finish_request_profile(profiler)
+        response.headers["X-RPSense-Profile"] = os.path.basename(path)
+    return response
+
+
+@app.teardown_request
+def abandon_instrumentation(exc):
+    # after_request is skipped when the view raises; still release both
+    started_at = g.pop("memory_sample", None)
+    if started_at is not None:
+        finish_request_sample(started_at, request.endpoint)
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        finish_request_profile(profiler)
+
+
 # Initialize components
-frame_processor = FrameProcessor()
+# The frame pipeline (MediaPipe graph, TF model) is not fork-safe, so it is
+# created per process: at startup for the dev server, after fork for server.py
+frame_processor = None
+round_processor = None
+model_variants = None  # ModelVariantPolicy over the variants the model loaded with
+cold_start = {}  # seconds per start-up phase of this worker's pipeline
 game_engine = GameEngine()
+round_recorder = (
+    RoundRecorder(Config.RECORD_DIR, Config.RECORD_SAMPLE_RATE, Config.RECORD_QUEUE_SIZE)
+    if Config.RECORD_ROUNDS
+    else None
+)
+admission = AdmissionController(
+    Config.MAX_CONCURRENT_REQUESTS,
+    Config.MAX_QUEUED_REQUESTS,
+    service_time_estimate=Config.FRAME_COST_ESTIMATE * Config.MAX_FRAMES_IN_WINDOW,
+)
+capture_policy = CapturePolicy(admission)
+round_sessions = RoundSessionStore(Config.MAX_ROUND_SESSIONS, Config.ROUND_SESSION_TTL_S)
+match_store = (
+    MatchStore(
+        Config.MATCH_DB_PATH,
+        Config.MATCH_WRITE_BATCH,
+        Config.MATCH_FLUSH_INTERVAL_S,
+        Config.MATCH_QUEUE_SIZE,
+    )
+    if Config.MATCH_HISTORY
+    else None
+)
+round_results = RoundResultCache(
+    Config.ROUND_CACHE_DB_PATH,
+    Config.ROUND_CACHE_SIZE,
+    Config.ROUND_CACHE_TTL_S,
+    Config.ROUND_CACHE_WAIT_S,
+    Config.ROUND_CACHE_CLAIM_S,
+)
+_init_lock = threading.Lock()
+
+
+def init_components():
+    """Create the per-process frame pipeline (idempotent)"""
+    global frame_processor, round_processor, model_variants
+    with _init_lock:
+        if frame_processor is None:
+            started = time.perf_counter()
+            frame_processor = FrameProcessor()
+            inference = frame_processor.model_inference
+            warmup_started = time.perf_counter()
+            inference.warmup()
+            cold_start.update(
+                inference.load_seconds,
+                warmup=time.perf_counter() - warmup_started,
+                total=time.perf_counter() - started,
+            )
+            for phase, seconds in cold_start.items():
+                WORKER_COLD_START_SECONDS.labels(phase=phase).set(seconds)
+            phases = ", ".join(f"{k} {v:.2f}s" for k, v in cold_start.items() if k != "total")
+            sources = ", ".join(f"{k} {v['source']}" for k, v in inference.variants.items())
+            print(f"🚀 Pipeline ready in {cold_start['total']:.2f}s ({phases}; model variants: {sources})")
+            round_processor = RoundProcessor(frame_processor, game_engine)
+            model_variants = ModelVariantPolicy(
+                admission,
+                frame_processor.model_inference.variant_names,
+                Config.MODEL_VARIANT_QUEUE_DEPTH,
+                Config.MODEL_VARIANT_P95_MS / 1000.0,
+                Config.MODEL_VARIANT_RECOVER_RATIO,
+                Config.MODEL_VARIANT_HOLD_S,
+                Config.MODEL_VARIANT_WINDOW,
+            )
+    return frame_processor
 
 
 @app.route("/", methods=["GET"])
@@ -49,10 +203,126 @@ def health_check():
             "message": "RPSense Server is running!",
             "timestamp": datetime.now().isoformat(),
             "version": "1.0.0",
+            "round_sessions": Config.ROUND_SESSIONS,
+            "capture_hint": capture_policy.hint(),
         }
     )
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus metrics (per-stage latency histograms and pipeline counters)"""
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
+
+def _match_history_disabled():
+    if match_store is None:
+        return jsonify({"error": "Match history is disabled (RPSENSE_MATCH_HISTORY=0)"}), 404
+    return None
+
+
+@app.route("/leaderboard", methods=["GET"])
+def leaderboard():
+    """Players ranked by wins, paged with ?limit= (max 100) and ?offset="""
+    disabled = _match_history_disabled()
+    if disabled:
+        return disabled
+    return jsonify(
+        match_store.leaderboard(
+            request.args.get("limit", 20, type=int), request.args.get("offset", 0, type=int)
+        )
+    )
+
+
+@app.route("/players/<player>/stats", methods=["GET"])
+def player_stats(player):
+    """Totals, leaderboard rank and move counts of one player (gameData.playerName)"""
+    disabled = _match_history_disabled()
+    if disabled:
+        return disabled
+    stats = match_store.player_stats(player)
+    if stats is None:
+        return jsonify({"error": f"No rounds recorded for player '{player}'"}), 404
+    return jsonify(stats)
+
+
+@app.route("/players/<player>/rounds", methods=["GET"])
+def player_rounds(player):
+    """
+    A player's rounds, newest first, paged with ?limit= (max 100) and
+    ?before=<next_before of the previous page>
+    """
+    disabled = _match_history_disabled()
+    if disabled:
+        return disabled
+    return jsonify(
+        match_store.player_rounds(
+            player, request.args.get("limit", 20, type=int), request.args.get("before", type=int)
+        )
+    )
+
+
+def _debug_disabled():
+    if not Config.DEBUG_ENDPOINTS:
+        return jsonify({"error": "Debug endpoints are disabled (RPSENSE_DEBUG_ENDPOINTS=1)"}), 404
+    return None
+
+
+@app.route("/debug/memory", methods=["GET"])
+def debug_memory():
+    """Resident size, tracemalloc status and frame buffer usage of this worker"""
+    disabled = _debug_disabled()
+    if disabled:
+        return disabled
+    summary = memory_summary()
+    if frame_processor is not None:
+        postprocessor = frame_processor.postprocessor
+        summary["frame_buffer"] = {
+            "frames": len(postprocessor.frame_buffer),
+            "bytes": postprocessor.buffer_bytes,
+        }
+    return jsonify(summary)
+
+
+@app.route("/debug/memory/snapshot", methods=["POST"])
+def debug_memory_snapshot():
+    """Start tracemalloc if needed and store a named snapshot (?label=&frames=)"""
+    disabled = _debug_disabled()
+    if disabled:
+        return disabled
+    label = request.args.get("label", "baseline")
+    nframes = request.args.get("frames", 10, type=int)
+    return jsonify({"pid": os.getpid(), **take_snapshot(label, nframes)})
+
+
+@app.route("/debug/memory/diff", methods=["GET"])
+def debug_memory_diff():
+    """Top allocation sites grown since a snapshot (?since=&limit=&group=lineno|traceback)"""
+    disabled = _debug_disabled()
+    if disabled:
+        return disabled
+    since = request.args.get("since", "baseline")
+    group = request.args.get("group", "lineno")
+    if group not in ("lineno", "filename", "traceback"):
+        return jsonify({"error": f"Unknown group '{group}'"}), 400
+    diff = diff_snapshot(since, request.args.get("limit", 20, type=int), group)
+    if diff is None:
+        # Snapshots are per worker; the request may have landed on another one
+        return jsonify({"error": f"No snapshot '{since}' in worker {os.getpid()}"}), 404
+    return jsonify({"pid": os.getpid(), **diff})
+
+
+@app.route("/debug/memory/stop", methods=["POST"])
+def debug_memory_stop():
+    """Drop all snapshots and stop tracemalloc"""
+    disabled = _debug_disabled()
+    if disabled:
+        return disabled
+    stop_tracing()
+    return jsonify({"pid": os.getpid(), "status": "stopped"})
+
+
 @app.route("/test", methods=["GET"])
 def test_interface():
     """Render test interface for backend testing"""
@@ -84,7 +354,8 @@ def process_single_frame():
         print("📥 Processing single frame for model testing")
         
         # Decode frame
-        image = decode_frame_from_base64(frame_base64)
+        with stage(NULL_TRACE, "decode"):
+            image = decode_frame_from_base64(frame_base64)
         if image is None:
             return jsonify({"error": "Failed to decode frame"}), 400
             
@@ -96,9 +367,12 @@ def process_single_frame():
         }
         
         # Process frame
-        status, real_time_result, should_send_final, final_result = (
-            frame_processor.process_frame(image, frame_metadata=frame_metadata)
-        )
+        with admission.slot(_queue_deadline()):
+            status, real_time_result, should_send_final, final_result = (
+                init_components().process_frame(
+                    image, frame_metadata=frame_metadata, overlay_mode=_overlay_mode()
+                )
+            )
         
         if status == "success" and real_time_result:
             print(f"✅ Frame processed successfully: {real_time_result.get('prediction', 'unknown')}")
@@ -107,7 +381,7 @@ def process_single_frame():
                 "prediction": real_time_result.get("prediction", "unknown"),
                 "confidence": real_time_result.get("confidence", 0.0),
                 "detected_hand": real_time_result.get("detected_hand", False),
-                "bounding_box": real_time_result.get("bounding_box", None),
+                "bounding_box": real_time_result.get("bbox", None),
                 "landmarks": real_time_result.get("landmarks", None),
                 "processed_image": real_time_result.get("processed_image", None),
                 "timestamp": time.time()
@@ -125,6 +399,8 @@ def process_single_frame():
                 "timestamp": time.time()
             })
         
+    except Overloaded as e:
+        return _overloaded_response(e)
     except Exception as e:
         print(f"❌ Error in process_single_frame: {e}")
         return jsonify({"error": str(e)}), 500
@@ -134,107 +410,562 @@ def process_single_frame():
 def process_frames():
     """
     Process a batch of frames via HTTP POST
-    Expects JSON payload with frames array and game metadata
+    Expects JSON payload with frames array and game metadata, or the same as
+    multipart/form-data with binary JPEG parts (see _round_upload)
+    Send `X-RPSense-Trace: dump` (or `return`) to record a Chrome trace of the round
+    (when RPSENSE_CLIENT_TRACES=1),
+    and `X-RPSense-Overlay: full|thumbnail|none` to choose the final result image
     """
     try:
-        data = request.get_json()
-        
-        if not data:
+        frames, game_data, decode = _round_upload("frames", "frame")
+        if frames is None:
             return jsonify({"error": "No JSON data provided"}), 400
-            
-        frames = data.get("frames", [])
-        game_data = data.get("gameData", {})
-        
+
         if not frames:
             return jsonify({"error": "No frames provided"}), 400
             
         print(f"📥 Processing {len(frames)} frames from HTTP request")
         print(f"🎮 Game data: {game_data}")
-        
-        # Clear frame processor buffer for fresh start
-        frame_processor.postprocessor.clear_buffer()
-        
-        # Process each frame in the batch
-        processed_count = 0
-        last_real_time_result = None
-        
-        for i, frame_data in enumerate(frames):
-            frame_base64 = frame_data.get("frame")
-            if not frame_base64:
-                continue
-                
-            # Decode frame
-            image = decode_frame_from_base64(frame_base64)
-            if image is None:
-                continue
-                
-            # Add frame metadata
-            frame_metadata = {
-                **game_data,
-                "timestamp": frame_data.get("timestamp"),
-                "frameId": frame_data.get("frameId", i)
-            }
-            
-            # Process frame
-            status, real_time_result, should_send_final, final_result = (
-                frame_processor.process_frame(image, frame_metadata=frame_metadata)
+
+        round_frames, _ = _round_frames(frames)
+        return _process_round(round_frames, game_data, decode)
+
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        print(f"❌ Error in process_frames: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/process-rois", methods=["POST"])
+def process_rois():
+    """
+    Process a batch of hand ROIs cropped in the browser (client-side hand detection)
+    Expects the same body formats as /process-frames with a rois array
+    ({roi, landmarks, frameId, timestamp}); hand detection and ROI extraction are skipped
+    """
+    try:
+        rois, game_data, decode = _round_upload("rois", "roi")
+        if rois is None:
+            return jsonify({"error": "No JSON data provided"}), 400
+
+        if not rois:
+            return jsonify({"error": "No ROIs provided"}), 400
+
+        print(f"📥 Processing {len(rois)} client-cropped ROIs from HTTP request")
+        print(f"🎮 Game data: {game_data}")
+
+        round_frames, frame_details = _round_frames(rois)
+        return _process_round(
+            round_frames, game_data, decode, roi_input=True, frame_details=frame_details
+        )
+
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        print(f"❌ Error in process_rois: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/process-clip", methods=["POST"])
+def process_clip():
+    """
+    Process a round captured as one short video clip (MediaRecorder WebM or MP4)
+    Expects multipart/form-data with the clip under "clip", "gameData" JSON and
+    optionally "stride" (use every stride-th frame, default
+    Config.CLIP_FRAME_STRIDE); the clip is decoded in memory and its newest
+    Config.MAX_FRAMES_IN_WINDOW frames at that stride go through the round
+    pipeline like /process-frames. Same headers as /process-frames
+    """
+    try:
+        if request.content_length and request.content_length > Config.MAX_CLIP_BYTES:
+            return jsonify({"error": f"Clip larger than {Config.MAX_CLIP_BYTES} bytes"}), 413
+        clip = request.files.get("clip")
+        if clip is None:
+            return jsonify({"error": "No clip provided"}), 400
+
+        data = clip.read()
+        game_data = json_field(request.form.get("gameData"), "gameData", dict)
+        stride = min(
+            request.form.get("stride", Config.CLIP_FRAME_STRIDE, type=int) or 1,
+            Config.MAX_CLIP_FRAME_STRIDE,
+        )
+        try:
+            with stage(NULL_TRACE, "clip_decode"):
+                round_frames = decode_clip_frames(data, stride, Config.MAX_FRAMES_IN_WINDOW)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not round_frames:
+            return jsonify({"error": "No frames in clip"}), 400
+
+        print(
+            f"🎞️ Processing {len(round_frames)} frames (every {stride}) "
+            f"of a {len(data) / 1024:.0f} KiB {clip.mimetype or 'video'} clip"
+        )
+        print(f"🎮 Game data: {game_data}")
+        return _process_round(round_frames, game_data, decoded_frame)
+
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        print(f"❌ Error in process_clip: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _round_upload(list_key, payload_key):
+    """
+    Frames of a round from either body format:
+    - JSON: {list_key: [{payload_key: base64 JPEG, frameId, timestamp, ...}], "gameData": {...}}
+    - multipart/form-data: binary JPEG parts named list_key, a "meta" JSON array
+      with each part's frameId, timestamp, ... in the same order, and "gameData" JSON
+    Returns: (entries, game_data, decode) with each entry's image under "payload",
+        or (None, None, None) when the body is neither
+    Raises:
+        InvalidRequest: "meta" or "gameData" is malformed
+    """
+    if request.mimetype == "multipart/form-data":
+        files = request.files.getlist(list_key)
+        meta = json_field(request.form.get("meta"), "meta", list)
+        if not all(isinstance(entry, dict) for entry in meta):
+            raise InvalidRequest("meta must be an array of objects")
+        game_data = json_field(request.form.get("gameData"), "gameData", dict)
+        entries = [
+            {**(meta[i] if i < len(meta) else {}), "payload": file.read()}
+            for i, file in enumerate(files)
+        ]
+        return entries, game_data, decode_frame_from_bytes
+
+    data = request.get_json(silent=True)
+    if not data:
+        return None, None, None
+    entries = [
+        {**entry, "payload": entry.get(payload_key)} for entry in data.get(list_key, [])
+    ]
+    return entries, data.get("gameData", {}), decode_frame_from_base64
+
+
+def _round_frames(entries):
+    """
+    (frame_id, timestamp, payload) tuples of the entries that carry an image,
+    plus per-frame details (client-side landmarks) keyed by frame_id
+    """
+    round_frames = []
+    frame_details = {}
+    for i, entry in enumerate(entries):
+        if not entry["payload"]:
+            continue
+        frame_id = entry.get("frameId", i)
+        round_frames.append((frame_id, entry.get("timestamp"), entry["payload"]))
+        landmarks = _roi_landmarks(entry.get("landmarks"))
+        if landmarks:
+            frame_details[frame_id] = {"landmarks": landmarks}
+    return round_frames, frame_details
+
+
+def _roi_landmarks(landmarks):
+    """21 [x, y] pairs normalized to the ROI, or None when malformed"""
+    if not isinstance(landmarks, list) or len(landmarks) != 21:
+        return None
+    try:
+        points = [(float(point[0]), float(point[1])) for point in landmarks]
+    except (TypeError, ValueError, IndexError):
+        return None
+    if not all(-0.5 <= x <= 1.5 and -0.5 <= y <= 1.5 for x, y in points):
+        return None
+    return points
+
+
+def _process_round(round_frames, game_data, decode, roi_input=False, frame_details=None):
+    """
+    Shared body of /process-frames, /process-rois and /process-clip: result
+    cache, admission, model variant, round processing, recording, tracing and
+    the capture hint
+    Args:
+        round_frames: list of (frame_id, timestamp, payload)
+        decode: decode_frame_from_base64, decode_frame_from_bytes or
+            decoded_frame (clip frames) for the payloads
+        roi_input (bool): payloads are client-cropped hand ROIs
+        frame_details (dict): extra metadata per frame_id
+    """
+    round_id = client_round_id(game_data) or new_round_id()
+    trace_mode = _trace_mode()
+    tracing = trace_mode is not None or Config.TRACE_ALL_ROUNDS
+    trace = RoundTrace(round_id, {"frames": len(round_frames)}).start() if tracing else NULL_TRACE
+    overlay_mode = _overlay_mode()
+
+    def run_round():
+        nonlocal round_frames, decode
+        # Recorded rounds keep JPEG bytes, so strip the base64 up front
+        recording = round_recorder is not None and round_recorder.should_record()
+        if recording:
+            round_frames, decode = _as_jpeg_bytes(round_frames, decode)
+
+        init_components()
+        deadline = _round_deadline()
+        with trace.span("request", round_id=round_id, frames=len(round_frames)):
+            with admission.slot(deadline or _queue_deadline()):
+                result = round_processor.process_round(
+                    round_frames,
+                    game_data,
+                    decode,
+                    trace,
+                    deadline=deadline,
+                    roi_input=roi_input,
+                    frame_details=frame_details,
+                    overlay_mode=overlay_mode,
+                    model_variant=model_variants.select(),
+                )
+                capture_policy.record_round(
+                    len(round_frames),
+                    round_processor.last_frames_used,
+                    round_processor.last_end_reason,
+                )
+            _record_variant_latency(result)
+
+        if recording:
+            round_recorder.record(
+                round_id, round_frames, game_data, result, input_kind="roi" if roi_input else "frame"
             )
-            
-            if status == "success":
-                processed_count += 1
-                last_real_time_result = real_time_result
-                
-                # If we have a final result, use it
-                if should_send_final and final_result:
-                    player_move = final_result["final_prediction"]
-                    game_result = game_engine.play_round(player_move)
-                    final_result["game_result"] = game_result
-                    
-                    print(f"✅ Final result ready after {processed_count} frames")
-                    return jsonify(final_result)
-        
-        # If no final result but we processed frames, return last real-time result
-        if last_real_time_result:
-            print(f"📤 Returning last real-time result after {processed_count} frames")
-            player_move = last_real_time_result.get("prediction", "timeout")
-            game_result = game_engine.play_round(player_move)
-            
-            response = {
-                "status": "success",
-                "final_prediction": player_move,
-                "confidence": last_real_time_result.get("confidence", 0.0),
-                "detected_hand": last_real_time_result.get("detected_hand", False),
-                "game_result": game_result,
-                "timestamp": time.time(),
-                "processed_frames": processed_count
+        if match_store is not None:
+            match_store.record(round_id, game_data, result)
+        return result
+
+    try:
+        result, cache_outcome = _idempotent_round(game_data, round_id, run_round)
+    finally:
+        if tracing:
+            trace.stop()
+
+    if tracing and cache_outcome in (None, "miss"):
+        if trace_mode == "return":
+            result["trace"] = trace.to_chrome_trace()
+        else:
+            path = trace.dump(Config.TRACE_DIR, max_files=Config.TRACE_MAX_FILES)
+            print(f"🧵 Round trace written to {path}")
+
+    return _round_response(result, round_id, cache_outcome)
+
+
+def _idempotent_round(game_data, round_id, run_round):
+    """
+    Run a round once per client round id: rounds sent with gameData.roundId go
+    through the result cache, so a retry gets the original result (and
+    computer move) back; rounds without one just run. A retry of a round that
+    is still running waits for it only until its own deadline
+    Returns: (result, cache outcome or None)
+    """
+    if not client_round_id(game_data):
+        return run_round(), None
+    result, outcome = round_results.get_or_compute(
+        round_id, run_round, deadline=_round_deadline() or _queue_deadline()
+    )
+    if outcome != "miss":
+        print(f"♻️ Round {round_id} answered from the result cache ({outcome})")
+    return result, outcome
+
+
+def _round_response(result, round_id, cache_outcome=None):
+    # Tell the client how to capture its next round
+    result["capture_hint"] = capture_policy.hint()
+
+    response = jsonify(result)
+    response.headers["X-RPSense-Round-Id"] = round_id
+    if cache_outcome:
+        response.headers["X-RPSense-Round-Cache"] = cache_outcome
+    return response
+
+
+def _as_jpeg_bytes(round_frames, decode):
+    """
+    Base64 payloads converted to raw JPEG bytes (for recording), with the
+    matching decode; decoded clip frames are encoded to JPEG
+    """
+    if decode is decoded_frame:
+        return encode_clip_frames(round_frames), decode_frame_from_bytes
+    if decode is not decode_frame_from_base64:
+        return round_frames, decode
+    round_frames = [
+        (frame_id, timestamp, decode_base64_payload(payload))
+        for frame_id, timestamp, payload in round_frames
+    ]
+    return [frame for frame in round_frames if frame[2]], decode_frame_from_bytes
+
+
+@app.route("/rounds", methods=["POST"])
+def open_round():
+    """
+    Open a chunked round session: append frames with POST /rounds/<id>/frames
+    while capturing, then POST /rounds/<id>/finalize for the result
+    Expects JSON {"mode": "frames" | "rois", "gameData": {...}}; an
+    `X-RPSense-Overlay` header sets the final result image for the whole session
+    501 when sessions are off (Config.ROUND_SESSIONS, see server.py)
+    """
+    try:
+        if not Config.ROUND_SESSIONS:
+            return jsonify({"error": "Round sessions are disabled on this server"}), 501
+
+        data = request.get_json(silent=True) or {}
+        mode = data.get("mode", "frames")
+        if mode not in ("frames", "rois"):
+            return jsonify({"error": f"Unknown mode '{mode}'"}), 400
+
+        game_data = data.get("gameData", {})
+        client_round_id(game_data)
+
+        recording = round_recorder is not None and round_recorder.should_record()
+        session = round_sessions.open(game_data, mode == "rois", recording, _overlay_mode())
+        print(f"📂 Round session {session.session_id} opened ({mode})")
+        response = jsonify(
+            {
+                "session_id": session.session_id,
+                "round_id": session.round_id,
+                "expires_in": Config.ROUND_SESSION_TTL_S,
+                "capture_hint": capture_policy.hint(),
             }
-            return jsonify(response)
-        
-        # No valid frames processed
-        print("❌ No valid frames could be processed")
-        game_result = game_engine.play_round("timeout")
-        
-        return jsonify({
-            "status": "no_detection",
-            "final_prediction": "timeout", 
-            "confidence": 0.0,
-            "detected_hand": False,
-            "game_result": game_result,
-            "timestamp": time.time(),
-            "processed_frames": 0
-        })
-        
+        )
+        response.status_code = 201
+        return response
+
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Overloaded as e:
+        return _overloaded_response(e)
     except Exception as e:
-        print(f"❌ Error in process_frames: {e}")
+        print(f"❌ Error in open_round: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/rounds/<session_id>/frames", methods=["POST"])
+def append_round_frames(session_id):
+    """
+    Process a chunk of a session's frames now (same body formats as
+    /process-frames / /process-rois, depending on the session's mode)
+    """
+    try:
+        session = round_sessions.get(session_id)
+        if session is None:
+            return _unknown_session(session_id)
+
+        with session.lock:
+            if session.closed:
+                return _unknown_session(session_id)
+            frames, decode = _session_chunk(session)
+            init_components()
+            with admission.slot(_queue_deadline()):
+                _select_session_variant(session)
+                round_processor.process_frames(
+                    session.state,
+                    frames,
+                    session.game_data,
+                    decode,
+                    roi_input=session.roi_input,
+                    frame_details=session.frame_details,
+                )
+            state = session.state
+            return jsonify(
+                {
+                    "session_id": session_id,
+                    "frames_received": state.frames_received,
+                    "processed_frames": state.processed_count,
+                    "buffer_size": len(state.postprocessor.frame_buffer),
+                    # The vote is settled; the client can stop capturing and finalize
+                    "final_ready": state.done,
+                }
+            )
+
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        print(f"❌ Error in append_round_frames: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/rounds/<session_id>/finalize", methods=["POST"])
+def finalize_round(session_id):
+    """
+    Process the last chunk (optional, same body as an append) within the round
+    budget, play the round and close the session; responds like /process-frames
+    """
+    try:
+        session = round_sessions.get(session_id)
+        if session is None:
+            return _unknown_session(session_id)
+
+        with session.lock:
+            if session.closed:
+                return _unknown_session(session_id)
+            frames, decode = _session_chunk(session)
+
+            def run_round():
+                init_components()
+                deadline = _round_deadline()
+                with admission.slot(deadline or _queue_deadline()):
+                    _select_session_variant(session)
+                    state = round_processor.process_frames(
+                        session.state,
+                        frames,
+                        session.game_data,
+                        decode,
+                        deadline=deadline,
+                        roi_input=session.roi_input,
+                        frame_details=session.frame_details,
+                    )
+                    result = round_processor.finish_round(state)
+                capture_policy.record_round(
+                    state.frames_received, state.attempted_count, state.end_reason
+                )
+                _record_variant_latency(result)
+                if session.recorded_frames is not None:
+                    round_recorder.record(
+                        session.round_id,
+                        session.recorded_frames,
+                        session.game_data,
+                        result,
+                        input_kind="roi" if session.roi_input else "frame",
+                    )
+                if match_store is not None:
+                    match_store.record(session.round_id, session.game_data, result)
+                print(
+                    f"📂 Round session {session_id} finalized: {state.frames_received} frames, "
+                    f"{1000 * state.processing_seconds:.0f} ms of pipeline time"
+                )
+                return result
+
+            # A round already answered under the same roundId (e.g. by a
+            # fallback upload) is not played again
+            result, cache_outcome = _idempotent_round(
+                session.game_data, session.round_id, run_round
+            )
+            round_sessions.close(session_id)
+            session.release()
+
+        return _round_response(result, session.round_id, cache_outcome)
+
+    except InvalidRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        print(f"❌ Error in finalize_round: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _session_chunk(session):
+    """
+    Frames of this request's chunk for `session` and the decode for them; also
+    merges any gameData it carries (InvalidRequest when the upload is malformed
+    or its roundId is not a valid round id) and keeps the JPEG bytes when recording
+    """
+    list_key, payload_key = ("rois", "roi") if session.roi_input else ("frames", "frame")
+    entries, game_data, decode = _round_upload(list_key, payload_key)
+    if entries is None:
+        # Finalize may come without a body
+        return [], decode_frame_from_bytes
+    client_round_id(game_data)
+    session.game_data.update(game_data or {})
+
+    frames, frame_details = _round_frames(entries)
+    session.frame_details.update(frame_details)
+    if session.recorded_frames is not None:
+        frames, decode = _as_jpeg_bytes(frames, decode)
+        session.recorded_frames.extend(frames)
+    return frames, decode
+
+
+def _select_session_variant(session):
+    """A session's first chunk picks the model variant for all of its frames"""
+    if session.state.model_variant is None:
+        session.state.model_variant = model_variants.select()
+
+
+def _record_variant_latency(result):
+    """Feed this request's latency from receipt to the model variant policy"""
+    model_variants.record_round(
+        result["model_variant"], time.monotonic() - g.get("received_at", time.monotonic())
+    )
+
+
+def _unknown_session(session_id):
+    # Expired, already finalized, or opened on another worker
+    return jsonify({"error": f"Unknown or expired round session '{session_id}'"}), 404
+
+
+def _trace_mode():
+    """
+    Trace requested with `X-RPSense-Trace` ("dump" or "return"); None when
+    there is none or client traces are off (Config.CLIENT_TRACES)
+    """
+    mode = request.headers.get("X-RPSense-Trace", "").lower()
+    if not mode or not Config.CLIENT_TRACES:
+        return None
+    if mode not in TRACE_MODES:
+        print(f"⚠️ Unknown trace mode '{mode}', not tracing")
+        return None
+    return mode
+
+
+def _overlay_mode():
+    """
+    Final result image requested with `X-RPSense-Overlay` (see
+    FrameProcessor._final_overlay); None for the server default
+    """
+    mode = request.headers.get("X-RPSense-Overlay", "").lower()
+    if not mode:
+        return None
+    if mode not in OVERLAY_MODES:
+        print(f"⚠️ Unknown overlay mode '{mode}', using '{Config.RESULT_OVERLAY}'")
+        return None
+    return mode
+
+
+def _round_deadline():
+    """
+    Server-clock deadline for this round: Config.ROUND_BUDGET_MS after receipt,
+    or the client's `X-RPSense-Budget-Ms` (capped); None when there is no budget
+    """
+    budget_ms = request.headers.get("X-RPSense-Budget-Ms", Config.ROUND_BUDGET_MS, type=int)
+    if not budget_ms or budget_ms <= 0:
+        return None
+    budget_ms = min(budget_ms, Config.MAX_ROUND_BUDGET_MS)
+    return g.get("received_at", time.monotonic()) + budget_ms / 1000.0
+
+
+def _queue_deadline():
+    """How long a request without a round budget may wait for a pipeline slot"""
+    return g.get("received_at", time.monotonic()) + Config.MAX_QUEUE_WAIT_MS / 1000.0
+
+
+def _overloaded_response(error):
+    """503 with Retry-After for a request shed by admission control"""
+    print(f"🚦 Shedding {request.endpoint}: {error.reason}")
+    response = jsonify(
+        {
+            "error": str(error),
+            "reason": error.reason,
+            "retry_after": error.retry_after,
+            "capture_hint": capture_policy.hint(),
+        }
+    )
+    response.status_code = 503
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
 if __name__ == "__main__":
     # Create the tunnel with pyngrok
     tunnel = ngrok.connect(5000, "http")
     print("🌐 Public URL:", tunnel.public_url)
     
-    # Run Flask app
+    # Run Flask app (development only - use server.py for production)
+    init_components()
     print("🚀 Starting RPSense server...")
     print("💡 Server is ready for HTTP requests!")
     app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
@@ -0,0 +1,93 @@
+"""
+Cold start of a worker: time until its frame pipeline is ready
+
+Starts fresh processes that build the pipeline the way a server worker does
+(app.init_components) and reports each start-up phase, for three cases:
+    keras   no artifact cache: .h5 parsed, Keras graphs built, XLA warmup
+    cold    empty artifact cache: as keras, plus converting every artifact
+    warm    artifacts cached by the cold run: TFLite flatbuffers mapped
+The TensorFlow import is timed on its own; under server.py the master imports
+it once before forking, so workers never pay it.
+
+Usage (from backend/):
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --runs 5 --output cold_start.json
+"""
+import os
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CASES = ("keras", "cold", "warm")
+PHASES = ("import", "model", "variants", "warmup", "total")
+
+
+def child():
+    """One worker start; prints its phase timings as JSON on the last line"""
+    started = time.perf_counter()
+    import tensorflow  # noqa: F401
+    import app
+
+    imported = time.perf_counter() - started
+    from services.model_inference import configure_worker_threads
+
+    configure_worker_threads(1, 1)
+    app.init_components()
+    print(json.dumps({"import": imported, **app.cold_start}), flush=True)
+
+
+def start_worker(case, cache_dir):
+    env = dict(os.environ, RPSENSE_MODEL_CACHE="0" if case == "keras" else "1", RPSENSE_MODEL_CACHE_DIR=cache_dir)
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.cold_start", "--child"],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time RPSense worker cold starts")
+    parser.add_argument("--runs", type=int, default=3, help="starts per case (cold runs once)")
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child()
+
+    cache_dir = tempfile.mkdtemp(prefix="rpsense-model-cache-")
+    results = {}
+    try:
+        for case in CASES:
+            runs = 1 if case == "cold" else args.runs
+            print(f"▶️  {case}: {runs} start(s)")
+            results[case] = [start_worker(case, cache_dir) for _ in range(runs)]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"\n   {'case':<8}" + "".join(f"{phase + ' s':>12}" for phase in PHASES))
+    for case, runs in results.items():
+        # Median run per phase
+        row = [sorted(run.get(phase, 0.0) for run in runs)[len(runs) // 2] for phase in PHASES]
+        print(f"   {case:<8}" + "".join(f"{value:>12.2f}" for value in row))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
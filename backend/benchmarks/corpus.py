@@ -0,0 +1,137 @@
+"""
+Frame corpora for the pipeline benchmarks
+
+Two corpora live under benchmarks/corpus/:
+    synthetic/  deterministic hand-silhouette frames, regenerated with
+                `python -m benchmarks.corpus --generate` (checked in so the
+                JPEG bytes do not depend on the local libjpeg)
+    recorded/   real webcam frames (640x480 JPEG, quality 0.7 like the
+                frontend), imported with `python -m benchmarks.corpus --import <dir>`
+
+Frames are kept as raw JPEG bytes; the benchmarks base64-encode them the
+same way the frontend does before calling decode_frame_from_base64.
+"""
+import argparse
+import base64
+import os
+import cv2
+import numpy as np
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+CORPORA = ("synthetic", "recorded")
+
+FRAME_SIZE = (640, 480)  # width, height sent by the frontend
+JPEG_QUALITY = 70  # canvas.toDataURL("image/jpeg", 0.7)
+
+# Finger layouts per gesture: which of the 5 fingers are extended
+GESTURES = {
+    "rock": (False, False, False, False, False),
+    "paper": (True, True, True, True, True),
+    "scissors": (False, True, True, False, False),
+    "invalid": (True, False, False, False, True),
+}
+
+
+def synthetic_frame(rng, gesture):
+    """Draw a hand-like silhouette for a gesture on a lit background"""
+    width, height = FRAME_SIZE
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    base = rng.uniform(60, 160, size=3)
+    tilt = rng.uniform(-40, 40, size=3)
+    frame = np.clip(base + tilt * (x + y)[..., None], 0, 255).astype(np.uint8)
+
+    skin = tuple(int(c) for c in rng.uniform([90, 120, 170], [140, 170, 230]))
+    cx = int(rng.uniform(0.3, 0.7) * width)
+    cy = int(rng.uniform(0.45, 0.65) * height)
+    palm = int(rng.uniform(55, 80))
+    cv2.ellipse(frame, (cx, cy), (palm, int(palm * 1.15)), 0, 0, 360, skin, -1)
+
+    for i, extended in enumerate(GESTURES[gesture]):
+        fx = cx + int((i - 2) * palm * 0.42)
+        length = int(palm * (1.4 if extended else 0.5))
+        thickness = max(8, palm // 4)
+        if i == 0:
+            cv2.line(frame, (cx - palm, cy), (cx - palm - length // 2, cy - length // 2), skin, thickness)
+        else:
+            cv2.line(frame, (fx, cy - palm // 2), (fx, cy - palm // 2 - length), skin, thickness)
+
+    noise = rng.normal(0, 4, size=frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def generate_synthetic(count=12, seed=2024):
+    """Write `count` deterministic frames into corpus/synthetic"""
+    out_dir = os.path.join(CORPUS_DIR, "synthetic")
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    gestures = sorted(GESTURES)
+    for i in range(count):
+        gesture = gestures[i % len(gestures)]
+        frame = synthetic_frame(rng, gesture)
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if ok:
+            with open(os.path.join(out_dir, f"{i:03d}_{gesture}.jpg"), "wb") as f:
+                f.write(buffer.tobytes())
+    print(f"✅ Wrote {count} synthetic frames to {out_dir}")
+
+
+def import_frames(source_dir):
+    """Copy images into corpus/recorded, resized and re-encoded like the frontend"""
+    out_dir = os.path.join(CORPUS_DIR, "recorded")
+    os.makedirs(out_dir, exist_ok=True)
+    count = 0
+    for name in sorted(os.listdir(source_dir)):
+        image = cv2.imread(os.path.join(source_dir, name), cv2.IMREAD_COLOR)
+        if image is None:
+            continue
+        image = cv2.resize(image, FRAME_SIZE)
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if ok:
+            stem = os.path.splitext(name)[0]
+            with open(os.path.join(out_dir, f"{stem}.jpg"), "wb") as f:
+                f.write(buffer.tobytes())
+            count += 1
+    print(f"✅ Imported {count} frames into {out_dir}")
+
+
+def load_corpus(names=CORPORA):
+    """
+    Load frames from the given corpora
+    Returns: list of (corpus_name/file_name, jpeg_bytes)
+    """
+    frames = []
+    for name in names:
+        corpus_dir = os.path.join(CORPUS_DIR, name)
+        if not os.path.isdir(corpus_dir):
+            continue
+        for file_name in sorted(os.listdir(corpus_dir)):
+            if file_name.lower().endswith((".jpg", ".jpeg")):
+                with open(os.path.join(corpus_dir, file_name), "rb") as f:
+                    frames.append((f"{name}/{file_name}", f.read()))
+    return frames
+
+
+def to_data_url(jpeg_bytes):
+    """Encode JPEG bytes the way canvas.toDataURL does"""
+    return "data:image/jpeg;base64," + base64.b64encode(jpeg_bytes).decode("ascii")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage benchmark frame corpora")
+    parser.add_argument("--generate", action="store_true", help="regenerate synthetic/")
+    parser.add_argument("--count", type=int, default=12)
+    parser.add_argument("--import", dest="import_dir", help="import images into recorded/")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_synthetic(args.count)
+    if args.import_dir:
+        import_frames(args.import_dir)
+    if not args.generate and not args.import_dir:
+        for name in CORPORA:
+            print(f"{name}: {len(load_corpus([name]))} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Concurrent load test against a running RPSense server
+
+Simulated players replay realistic rounds (20 frames captured at 10 fps,
+same JSON shape as frontend/src/services/api.js) against /process-frames.
+Arrivals are open-loop (Poisson at --rate rounds/s) or closed-loop (each
+client posts its next round as soon as the previous one returns). Latency
+is measured from the scheduled send time, so client-side queueing under
+overload is not hidden (no coordinated omission).
+
+Usage (from backend/, server already running):
+    python -m benchmarks.loadtest --smoke                          # health + one round
+    python -m benchmarks.loadtest --clients 8 --duration 60        # closed loop
+    python -m benchmarks.loadtest --mode open --rate 5 --clients 32  # open loop, 5 rounds/s
+    python -m benchmarks.loadtest --ramp 1 2 4 8 16 --slo-ms 1500    # find the saturation point
+--ramp steps are client counts in closed mode and arrival rates in open mode.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from benchmarks.corpus import load_corpus, to_data_url
+
+HEADERS = {"Content-Type": "application/json", "ngrok-skip-browser-warning": "true"}
+
+
+def build_round_payload(data_urls, frames, round_number, rng):
+    """Build a round body exactly like RPSenseAPI.processFrames sends it"""
+    game_mode = "classic"
+    frame_entries = []
+    timestamp = 1000  # frameTimestampRef starts at 1000 and is bumped before each capture
+    for frame_id in range(frames):
+        timestamp += 1000
+        frame_entries.append(
+            {
+                "frame": data_urls[(round_number + frame_id) % len(data_urls)],
+                "timestamp": timestamp,
+                "frameId": frame_id,
+                "gameMode": game_mode,
+                "totalRounds": 1,
+                "currentRound": 1,
+                "playerScore": 0,
+                "computerScore": 0,
+            }
+        )
+    game_data = {
+        "gameMode": game_mode,
+        "totalRounds": 1,
+        "currentRound": 1,
+        "playerName": f"LoadTest-{rng.randint(0, 9999)}",
+    }
+    return json.dumps({"frames": frame_entries, "gameData": game_data}).encode("utf-8")
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LoadTest:
+    def __init__(self, url, payloads, clients, timeout, capture_seconds):
+        self.url = url.rstrip("/")
+        self.payloads = payloads
+        self.clients = clients
+        self.timeout = timeout
+        self.capture_seconds = capture_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _send(self, payload, scheduled_at, results):
+        sent_at = time.perf_counter()
+        try:
+            response = self._session().post(
+                f"{self.url}/process-frames", data=payload, headers=HEADERS, timeout=self.timeout
+            )
+            status = response.status_code
+            if status == 200:
+                response.json()
+        except requests.RequestException as e:
+            status = type(e).__name__
+        finished_at = time.perf_counter()
+        with self._lock:
+            results.append(
+                {
+                    "status": status,
+                    "latency": finished_at - scheduled_at,
+                    "service": finished_at - sent_at,
+                    "finished_at": finished_at,
+                }
+            )
+
+    def run_closed(self, duration):
+        """Every client posts rounds back-to-back for `duration` seconds"""
+        results = []
+        stop_at = time.perf_counter() + duration
+
+        def client(index):
+            round_number = index
+            while time.perf_counter() < stop_at:
+                if self.capture_seconds:
+                    time.sleep(self.capture_seconds)
+                scheduled_at = time.perf_counter()
+                self._send(self.payloads[round_number % len(self.payloads)], scheduled_at, results)
+                round_number += self.clients
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.clients) as pool:
+            list(pool.map(client, range(self.clients)))
+        return results, time.perf_counter() - started
+
+    def run_open(self, rate, duration, seed):
+        """Poisson arrivals at `rate` rounds/s, at most `clients` in flight"""
+        results = []
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        next_at = started
+        round_number = 0
+        with ThreadPoolExecutor(max_workers=self.clients) as pool:
+            while next_at < started + duration:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._send, self.payloads[round_number % len(self.payloads)], next_at, results)
+                round_number += 1
+                next_at += rng.expovariate(rate)
+        return results, time.perf_counter() - started
+
+
+def summarize(results, elapsed):
+    ok = sorted(r["latency"] for r in results if r["status"] == 200)
+    shed = sum(1 for r in results if r["status"] == 503)
+    errors = sum(1 for r in results if r["status"] not in (200, 503))
+    total = len(results)
+    return {
+        "requests": total,
+        "ok": len(ok),
+        "shed": shed,
+        "errors": errors,
+        "error_rate": (errors + shed) / total if total else 0.0,
+        "throughput": len(ok) / elapsed if elapsed else 0.0,
+        "p50_ms": 1000.0 * percentile(ok, 50),
+        "p95_ms": 1000.0 * percentile(ok, 95),
+        "p99_ms": 1000.0 * percentile(ok, 99),
+        "max_ms": 1000.0 * (ok[-1] if ok else 0.0),
+    }
+
+
+def print_summary(label, stats):
+    print(
+        f"{label:<14}{stats['requests']:>8}{stats['throughput']:>10.2f}"
+        f"{stats['p50_ms']:>10.0f}{stats['p95_ms']:>10.0f}{stats['p99_ms']:>10.0f}"
+        f"{100 * stats['error_rate']:>9.1f}%"
+    )
+
+
+def find_saturation(steps, slo_ms, max_error_rate, min_gain):
+    """
+    First step where adding load stops paying off: p95 over the SLO, error
+    rate over the limit, or throughput gain below `min_gain`
+    """
+    previous_label, previous = None, None
+    for label, stats in steps:
+        if stats["p95_ms"] > slo_ms or stats["error_rate"] > max_error_rate:
+            return label, "latency/error SLO exceeded", previous_label
+        if previous and stats["throughput"] < previous["throughput"] * (1.0 + min_gain):
+            return label, "throughput stopped increasing", previous_label
+        previous_label, previous = label, stats
+    return None, None, previous_label
+
+
+def smoke_test(url, payload, timeout):
+    """Health check plus a single round against the live server"""
+    try:
+        health = requests.get(f"{url}/", headers=HEADERS, timeout=timeout)
+        print("Health Check Response:", health.json())
+        response = requests.post(f"{url}/process-frames", data=payload, headers=HEADERS, timeout=timeout)
+        body = response.json()
+        body.pop("final_overlay_image", None)
+        print("Process Frames Response:", body)
+    except (requests.RequestException, ValueError) as e:
+        print(f"❌ Smoke test failed: {e}")
+        return False
+    ok = health.status_code == 200 and response.status_code == 200
+    print("✅ Smoke test passed" if ok else "❌ Smoke test failed")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RPSense /process-frames load test")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--smoke", action="store_true", help="health check and one round, then exit")
+    parser.add_argument("--clients", type=int, default=4, help="max concurrent clients")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--rate", type=float, default=2.0, help="open-loop arrival rate, rounds/s")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per run/step")
+    parser.add_argument("--ramp", type=float, nargs="+", help="concurrency (closed) or rate (open) steps")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--simulate-capture", action="store_true", help="closed loop: wait frames/fps before each post")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--slo-ms", type=float, default=2000.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--min-gain", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    data_urls = [to_data_url(jpeg) for _, jpeg in load_corpus()]
+    if not data_urls:
+        raise SystemExit("❌ No frames in benchmarks/corpus")
+    payloads = [build_round_payload(data_urls, args.frames, i, rng) for i in range(16)]
+    url = args.url.rstrip("/")
+
+    if args.smoke:
+        return 0 if smoke_test(url, payloads[0], args.timeout) else 1
+
+    capture_seconds = args.frames / args.fps if args.simulate_capture else 0.0
+    open_loop = args.mode == "open"
+    steps = args.ramp or [args.rate if open_loop else args.clients]
+
+    print(f"{'step':<14}{'rounds':>8}{'rounds/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>10}")
+    measured = []
+    for step in steps:
+        if open_loop:
+            test = LoadTest(url, payloads, args.clients, args.timeout, 0.0)
+            results, elapsed = test.run_open(step, args.duration, args.seed)
+            label = f"rate={step:g}"
+        else:
+            test = LoadTest(url, payloads, int(step), args.timeout, capture_seconds)
+            results, elapsed = test.run_closed(args.duration)
+            label = f"clients={int(step)}"
+        stats = summarize(results, elapsed)
+        measured.append((label, stats))
+        print_summary(label, stats)
+
+    if len(measured) > 1:
+        saturated_at, reason, capacity = find_saturation(
+            measured, args.slo_ms, args.max_error_rate, args.min_gain
+        )
+        if saturated_at:
+            print(f"\n📈 Saturation at {saturated_at}: {reason}")
+            print(f"📈 Last healthy step: {capacity or 'none'}")
+        else:
+            print("\n📈 No saturation within the tested steps")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({label: stats for label, stats in measured}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Benchmark of the match history store at scale
+
+Fills a scratch SQLite database with synthetic rounds through the store's
+batched write path, then times the queries behind /leaderboard and
+/players/<player>/... and, for comparison, the same leaderboard computed by
+aggregating every round.
+
+Usage (from backend/):
+    python -m benchmarks.match_store                          # 1M rounds, 10k players
+    python -m benchmarks.match_store --rounds 5000000 --players 50000
+    python -m benchmarks.match_store --db /tmp/matches.sqlite3 --keep
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from benchmarks.pipeline import summarize
+from services.match_store import MatchStore
+
+MOVES = ("rock", "paper", "scissors")
+WINNERS = ("player", "computer", "draw")
+
+NAIVE_LEADERBOARD = """
+SELECT player, COUNT(*) AS rounds, SUM(winner = 'player') AS wins
+FROM rounds GROUP BY player ORDER BY wins DESC, rounds, player LIMIT 20
+"""
+
+
+def synthetic_rows(count, players, seed, started_at):
+    """Rounds in INSERT_ROUND order; player activity is skewed like real traffic"""
+    rng = random.Random(seed)
+    for i in range(count):
+        player = f"player-{int(players * rng.random() ** 2):06d}"
+        yield (
+            f"bench-{i}",
+            player,
+            rng.choice(("single", "tournament")),
+            rng.randint(1, 5),
+            rng.choice(MOVES),
+            rng.choice(MOVES),
+            rng.choice(WINNERS),
+            rng.random(),
+            started_at + i * 0.5,
+        )
+
+
+def populate(store, count, players, batch_size, seed):
+    """Write `count` rounds in batches; returns rounds per second"""
+    started = time.perf_counter()
+    batch = []
+    for row in synthetic_rows(count, players, seed, time.time() - count * 0.5):
+        batch.append(row)
+        if len(batch) == batch_size:
+            store.write_many(batch)
+            batch = []
+    if batch:
+        store.write_many(batch)
+    return count / (time.perf_counter() - started)
+
+
+def time_queries(fn, args, iterations):
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(*args[i % len(args)])
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def run(store, players, iterations, seed):
+    rng = random.Random(seed + 1)
+    total_players = store.leaderboard(1)["total"]
+    names = [f"player-{int(players * rng.random() ** 2):06d}" for _ in range(64)]
+    cursors = []
+    for name in names:
+        page = store.player_rounds(name, 20)
+        cursors.append((name, 20, page["next_before"]))
+
+    results = {
+        "leaderboard_first_page": time_queries(store.leaderboard, [(20, 0)], iterations),
+        "leaderboard_deep_page": time_queries(
+            store.leaderboard, [(20, total_players // 2)], iterations
+        ),
+        "player_stats": time_queries(store.player_stats, [(name,) for name in names], iterations),
+        "player_rounds_first_page": time_queries(
+            store.player_rounds, [(name, 20) for name in names], iterations
+        ),
+        "player_rounds_next_page": time_queries(store.player_rounds, cursors, iterations),
+    }
+    conn = store._connection()
+    results["naive_group_by_leaderboard"] = time_queries(
+        lambda: conn.execute(NAIVE_LEADERBOARD).fetchall(), [()], max(1, iterations // 50)
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RPSense match history store benchmark")
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=256, help="rounds per write transaction")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="database file (default: a temporary file)")
+    parser.add_argument("--keep", action="store_true", help="keep the database afterwards")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="rpsense-matches-"), "matches.sqlite3")
+    store = MatchStore(path, batch_size=args.batch)
+    try:
+        existing = store.leaderboard(1)["total"]
+        if existing:
+            print(f"📂 Reusing {path} ({existing} players)")
+            write_rate = None
+        else:
+            print(f"✍️ Writing {args.rounds} rounds for up to {args.players} players to {path}")
+            write_rate = populate(store, args.rounds, args.players, args.batch, args.seed)
+            print(f"   {write_rate:,.0f} rounds/s in batches of {args.batch}")
+
+        results = run(store, args.players, args.iterations, args.seed)
+        print(f"\n{'query':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name, stats in results.items():
+            print(f"{name:<30} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(
+                    {
+                        "rounds": args.rounds,
+                        "players": args.players,
+                        "batch": args.batch,
+                        "write_rounds_per_second": write_rate,
+                        "database_bytes": os.path.getsize(path),
+                        "queries": results,
+                    },
+                    f,
+                    indent=2,
+                )
+    finally:
+        if not args.keep and not args.db:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+In-process benchmark of the frame pipeline
+
+Times each stage on the checked-in corpora and a full /process-frames round,
+reports p50/p95/p99 and throughput, and compares against a saved baseline.
+Runs offline on CPU only (GPUs are hidden before TensorFlow is imported).
+
+Usage (from backend/):
+    python -m benchmarks.pipeline                      # run and compare to baseline
+    python -m benchmarks.pipeline --save-baseline      # record a new baseline
+    python -m benchmarks.pipeline --threshold 0.15 --stages decode inference
+Exit code is 1 when any stage regresses beyond the threshold, and 2 when the
+gate cannot run: no baseline, or a corpus in which MediaPipe finds too few
+hands (MIN_DETECTED_SHARE) for rounds to reach classification and voting
+(the synthetic corpus alone; import real frames into corpus/recorded with
+`python -m benchmarks.corpus --import <dir>`, or pass --allow-undetected).
+"""
+import os
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import contextlib
+import json
+import platform
+import random
+import sys
+import time
+import numpy as np
+from benchmarks.corpus import CORPORA, load_corpus, to_data_url
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+STAGES = ("decode", "hand_detection", "preprocessing", "inference", "round")
+ROUND_FRAMES = 20  # 2 seconds at 10 fps, like the frontend
+MIN_DETECTED_SHARE = 0.5  # corpus frames with a detected hand for the gate to count
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """Latency stats in milliseconds and throughput in ops/second"""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "mean_ms": 1000.0 * total / len(ordered),
+        "p50_ms": 1000.0 * percentile(ordered, 50),
+        "p95_ms": 1000.0 * percentile(ordered, 95),
+        "p99_ms": 1000.0 * percentile(ordered, 99),
+        "throughput": len(ordered) / total if total else 0.0,
+    }
+
+
+def time_calls(fn, inputs, iterations, warmup):
+    """Call fn over inputs round-robin and return per-call durations (seconds)"""
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+    samples = []
+    for i in range(iterations):
+        item = inputs[i % len(inputs)]
+        started = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def center_roi(image):
+    """Fallback ROI for frames where no hand is detected"""
+    height, width = image.shape[:2]
+    side = min(height, width) // 2
+    top, left = (height - side) // 2, (width - side) // 2
+    return image[top:top + side, left:left + side]
+
+
+def run_benchmarks(stages, corpora, iterations, warmup, rounds):
+    # Imported here so CUDA_VISIBLE_DEVICES is set before TensorFlow loads
+    from utils.image_utils import decode_frame_from_base64, extract_hand_roi
+    from utils.tracing import NULL_TRACE
+    import app as rpsense_app
+
+    frames = load_corpus(corpora)
+    if not frames:
+        raise SystemExit(f"❌ No frames found in corpora {corpora}")
+    data_urls = [to_data_url(jpeg) for _, jpeg in frames]
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        processor = rpsense_app.init_components()
+    images = [decode_frame_from_base64(url) for url in data_urls]
+
+    # Use the detected ROI when MediaPipe finds a hand, the center otherwise
+    rois = []
+    detected = 0
+    for image in images:
+        status, _, landmarks = processor.hand_detector.detect_hands(image)
+        roi = None
+        if status == "success":
+            roi, _ = extract_hand_roi(image, landmarks)
+            detected += 1
+        rois.append(roi if roi is not None and roi.size else center_roi(image))
+    preprocessed = [processor.preprocessor.preprocess_for_model(roi) for roi in rois]
+
+    round_frames = [
+        (i, 1000 * (i + 1), data_urls[i % len(data_urls)]) for i in range(ROUND_FRAMES)
+    ]
+    game_data = {"gameMode": "classic", "totalRounds": 1, "currentRound": 1, "playerName": "Benchmark"}
+
+    calls = {
+        "decode": (decode_frame_from_base64, data_urls, iterations),
+        "hand_detection": (processor.hand_detector.detect_hands, images, iterations),
+        "preprocessing": (processor.preprocessor.preprocess_for_model, rois, iterations),
+        "inference": (processor.model_inference.predict, preprocessed, iterations),
+        "round": (
+            lambda payload: rpsense_app.round_processor.process_round(
+                payload, dict(game_data), decode_frame_from_base64, NULL_TRACE
+            ),
+            [round_frames],
+            rounds,
+        ),
+    }
+
+    results = {}
+    for name in stages:
+        fn, inputs, count = calls[name]
+        # The pipeline prints per frame; keep that cost but not the terminal I/O
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            samples = time_calls(fn, inputs, count, warmup if name != "round" else 1)
+        results[name] = summarize(samples)
+        if name == "round":
+            results[name]["frames_per_second"] = results[name]["throughput"] * ROUND_FRAMES
+        print(f"⏱️  {name:<15} done ({len(samples)} samples)", file=sys.stderr)
+
+    return results, {"frames": len(frames), "hands_detected": detected}
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (stage, metric, baseline, current) regressions"""
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if current[metric] > reference[metric] * (1.0 + threshold):
+                regressions.append((name, metric, reference[metric], current[metric]))
+    return regressions
+
+
+def print_report(results, corpus_info):
+    print(f"\n📊 Corpus: {corpus_info['frames']} frames, {corpus_info['hands_detected']} with a detected hand")
+    print(f"{'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'ops/s':>10}")
+    for name, stats in results.items():
+        print(
+            f"{name:<16}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+            f"{stats['p99_ms']:>10.2f}{stats['mean_ms']:>10.2f}{stats['throughput']:>10.1f}"
+        )
+    if "round" in results:
+        print(f"round throughput: {results['round']['frames_per_second']:.1f} frames/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RPSense pipeline benchmark")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--corpora", nargs="+", choices=CORPORA, default=list(CORPORA))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=1, help="TF intra-op threads (0 = TF default)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, 0.10 = 10%%")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--allow-undetected",
+        action="store_true",
+        help=f"gate even when under {MIN_DETECTED_SHARE:.0%} of the corpus has a detectable hand",
+    )
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    if args.threads:
+        from services.model_inference import configure_worker_threads
+
+        configure_worker_threads(args.threads, 1)
+
+    results, corpus_info = run_benchmarks(
+        args.stages, args.corpora, args.iterations, args.warmup, args.rounds
+    )
+    print_report(results, corpus_info)
+
+    report = {
+        "results": results,
+        "corpus": corpus_info,
+        "settings": {
+            "iterations": args.iterations,
+            "rounds": args.rounds,
+            "threads": args.threads,
+            "corpora": args.corpora,
+        },
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    detected_share = corpus_info["hands_detected"] / corpus_info["frames"]
+    if detected_share < MIN_DETECTED_SHARE:
+        print(
+            f"\n❌ Only {corpus_info['hands_detected']}/{corpus_info['frames']} corpus frames have a "
+            f"detectable hand: rounds mostly end in no_detection and never reach classification.\n"
+            f"   Import real webcam frames with `python -m benchmarks.corpus --import <dir>`"
+            + ("" if args.allow_undetected else " (or pass --allow-undetected)")
+        )
+        if not args.allow_undetected:
+            return 2
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n❌ No baseline at {args.baseline}, nothing was compared; run with --save-baseline first")
+        return 2
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != report["machine"] or baseline.get("corpus") != corpus_info:
+        print(
+            f"\n⚠️ Baseline recorded on {baseline.get('machine')} with corpus {baseline.get('corpus')}; "
+            f"this run is {report['machine']} with {corpus_info}. Latencies are machine-specific, "
+            f"save a baseline on this machine before trusting the comparison"
+        )
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ Regressions beyond {args.threshold:.0%}:")
+        for name, metric, reference, current in regressions:
+            print(f"   {name} {metric}: {reference:.2f} ms -> {current:.2f} ms")
+        return 1
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Production launcher for the RPSense backend
+
+The master process never imports TensorFlow, MediaPipe or the app: it only
+binds the socket and forks the workers, so no TF runtime state (thread pools,
+XLA/JIT settings) is ever inherited across fork. Each worker imports the app
+and builds its pipeline in post_fork.
+
+What the workers share is the model itself, through the compiled artifact
+cache (services/model_cache.py): the first worker converts the model (and its
+variants) to TFLite flatbuffers under a file lock, and every worker then
+memory-maps the same read-only files, so the weights sit in the page cache
+once per host rather than once per worker. Each worker still has its own
+interpreter arenas and XNNPACK's packed copy of the weights; with
+RPSENSE_MODEL_CACHE=0 every worker loads the .h5 into its own Keras model.
+
+Workers are threaded so that requests beyond the pipeline's capacity reach
+the app's admission control (and get a fast 503) instead of waiting unseen
+in the listen backlog.
+
+Usage (from backend/):
+    python server.py --workers 4 --port 5000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+# Metrics from all workers are aggregated through files in this directory;
+# it must be set before prometheus_client is first imported
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "rpsense-metrics")
+)
+
+from gunicorn.app.base import BaseApplication
+from prometheus_client import multiprocess
+from utils.config import Config
+
+
+def post_fork(server, worker):
+    """Per-worker initialization, runs in the child right after fork"""
+    # First TensorFlow import of the process tree
+    from services.model_inference import configure_worker_threads
+
+    configure_worker_threads(Config.TF_INTRA_OP_THREADS, Config.TF_INTER_OP_THREADS)
+
+    import app
+
+    app.init_components()
+    server.log.info(f"🚀 Worker {worker.pid} ready in {app.cold_start['total']:.2f}s")
+
+
+def child_exit(server, worker):
+    """Drop live gauges of a dead worker from the aggregated metrics"""
+    multiprocess.mark_process_dead(worker.pid)
+
+
+class RPSenseServer(BaseApplication):
+    """Embedded gunicorn application, loaded in each worker (never in the master)"""
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        # Runs in the worker, after post_fork already imported and initialized the app
+        from app import app
+
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RPSense production server")
+    parser.add_argument("--host", default=Config.HOST)
+    parser.add_argument("--port", type=int, default=Config.PORT)
+    parser.add_argument("--workers", type=int, default=Config.WORKERS)
+    parser.add_argument("--timeout", type=int, default=Config.WORKER_TIMEOUT)
+    args = parser.parse_args()
+
+    Config.WORKERS = args.workers
+    if args.workers > 1 and Config.ROUND_SESSIONS:
+        # A session's chunks must reach the worker holding it, and nothing can
+        # route a connection to one worker of a shared listening socket
+        print(
+            "ℹ️ Round sessions off with more than one worker: clients upload each round "
+            "in one request. To use sessions, run one --workers 1 server per CPU behind "
+            "a sticky proxy (README: Production Server with Round Sessions)"
+        )
+        Config.ROUND_SESSIONS = False
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "gthread",
+        # Pipeline slots + queue + headroom for 503s, /metrics and health checks
+        "threads": Config.MAX_CONCURRENT_REQUESTS + Config.MAX_QUEUED_REQUESTS + 2,
+        "timeout": args.timeout,
+        # The app (and TensorFlow) is imported by each worker, not the master
+        "preload_app": False,
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+    }
+    print(f"🚀 Starting RPSense production server with {args.workers} workers...")
+    RPSenseServer(options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import math
+import threading
+from collections import deque
+
+# Capture settings the frontend is asked to use, from lightest load to heaviest
+CAPTURE_LEVELS = (
+    {"level": "normal", "fps": 10, "frames": 20, "jpeg_quality": 0.7, "max_width": 640, "max_height": 480},
+    {"level": "busy", "fps": 8, "frames": 14, "jpeg_quality": 0.6, "max_width": 480, "max_height": 360},
+    {"level": "overloaded", "fps": 6, "frames": 10, "jpeg_quality": 0.5, "max_width": 320, "max_height": 240},
+)
+MIN_FRAMES = 6
+CONVERGED_REASONS = ("frame_count", "timeout")
+
+
+class CapturePolicy:
+    """
+    Server-driven capture hints (fps, frame count, JPEG quality, max resolution)
+
+    The level comes from this worker's admission pressure (running + queued
+    requests against capacity) and how many recent rounds hit their deadline;
+    the frame count is further trimmed to what recent rounds actually needed
+    before the vote converged.
+    """
+
+    def __init__(self, admission, history=50):
+        self.admission = admission
+        self._rounds = deque(maxlen=history)  # (frames_sent, frames_used, end_reason)
+        self._lock = threading.Lock()
+
+    def record_round(self, frames_sent, frames_used, end_reason):
+        with self._lock:
+            self._rounds.append((frames_sent, frames_used, end_reason))
+
+    def _level(self):
+        admission = self.admission
+        capacity = admission.max_concurrency + admission.max_queue
+        pressure = (admission.in_flight + admission.queue_depth) / capacity
+        with self._lock:
+            rounds = list(self._rounds)
+        deadline_share = (
+            sum(1 for _, _, reason in rounds if reason == "deadline") / len(rounds) if rounds else 0.0
+        )
+        if pressure >= 0.75 or deadline_share >= 0.5:
+            return 2
+        if pressure >= 0.4 or deadline_share >= 0.2:
+            return 1
+        return 0
+
+    def _frames_needed(self):
+        """90th percentile of frames used by recently converged rounds, with 25% headroom"""
+        with self._lock:
+            used = sorted(used for _, used, reason in self._rounds if reason in CONVERGED_REASONS)
+        if len(used) < 5:
+            return None
+        return math.ceil(used[int(0.9 * (len(used) - 1))] * 1.25)
+
+    def hint(self):
+        hint = dict(CAPTURE_LEVELS[self._level()])
+        needed = self._frames_needed()
+        if needed is not None:
+            hint["frames"] = max(MIN_FRAMES, min(hint["frames"], needed))
+        return hint
@@ -0,0 +1,191 @@
+"""
+Knowledge distillation of the finetuned MobileNetV2 into a small student
+
+The teacher (Config.MODEL_PATH) labels every ROI of a dataset built by
+tools/build_roi_dataset.py once; its probabilities are cached next to the
+dataset, keyed by the teacher file's hash, so training never runs the
+teacher again. The student learns from
+    alpha * T^2 * KL(teacher_T || student_T) + (1 - alpha) * CE(label, student)
+where x_T is a softmax at temperature T (the teacher's logits are recovered
+as log-probabilities, which differ from them only by a constant).
+
+Students take the same MobileNetV2-normalized RGB input as the teacher, at
+any size, and end in a softmax, so ModelInference serves them as they are
+(RPSENSE_MODEL_PATH=model/student.h5).
+"""
+import os
+import time
+import numpy as np
+from services.model_cache import file_sha256
+
+TEACHER_TARGETS_FILE = "teacher-{}.npy"
+
+# name -> (family, width multiplier); see build_student()
+STUDENTS = {
+    "mobilenetv2-0.35": ("mobilenetv2", 0.35),
+    "mobilenetv2-0.5": ("mobilenetv2", 0.5),
+    "compact": ("compact", 1.0),
+}
+
+
+def build_student(name, input_size, num_classes, init="imagenet"):
+    """
+    Student model ending in a "probabilities" softmax layer; its input to that
+    layer ("logits") is what distillation trains
+    Args:
+        name: one of STUDENTS
+        input_size: (width, height)
+        init: "imagenet" to start MobileNetV2 students from ImageNet weights
+            (downloaded by Keras on first use; falls back to random), or "random"
+    """
+    import tensorflow as tf
+
+    family, alpha = STUDENTS[name]
+    width, height = input_size
+    inputs = tf.keras.Input(shape=(height, width, 3), name="image")
+
+    if family == "mobilenetv2":
+        try:
+            backbone = tf.keras.applications.MobileNetV2(
+                input_shape=(height, width, 3),
+                alpha=alpha,
+                include_top=False,
+                weights="imagenet" if init == "imagenet" else None,
+                pooling="avg",
+            )
+        except Exception as e:
+            # No network, or no ImageNet weights for this size/width
+            print(f"⚠️ No ImageNet weights for {name} at {width}x{height} ({e}), starting from random")
+            backbone = tf.keras.applications.MobileNetV2(
+                input_shape=(height, width, 3), alpha=alpha, include_top=False, weights=None, pooling="avg"
+            )
+        features = backbone(inputs)
+    else:
+        # Depthwise-separable stack, ~30k parameters
+        layers = tf.keras.layers
+        x = layers.Conv2D(16, 3, strides=2, padding="same", use_bias=False)(inputs)
+        x = layers.BatchNormalization()(x)
+        x = layers.ReLU(6.0)(x)
+        for filters, strides in ((32, 2), (64, 2), (96, 2), (128, 1), (128, 2)):
+            x = layers.DepthwiseConv2D(3, strides=strides, padding="same", use_bias=False)(x)
+            x = layers.BatchNormalization()(x)
+            x = layers.ReLU(6.0)(x)
+            x = layers.Conv2D(filters, 1, use_bias=False)(x)
+            x = layers.BatchNormalization()(x)
+            x = layers.ReLU(6.0)(x)
+        features = layers.GlobalAveragePooling2D()(x)
+
+    features = tf.keras.layers.Dropout(0.2)(features)
+    logits = tf.keras.layers.Dense(num_classes, name="logits")(features)
+    probabilities = tf.keras.layers.Activation("softmax", name="probabilities")(logits)
+    return tf.keras.Model(inputs, probabilities, name=f"student_{name.replace('.', '')}_{width}")
+
+
+def logits_model(student):
+    """The student up to its logits layer (shares the weights)"""
+    import tensorflow as tf
+
+    return tf.keras.Model(student.input, student.get_layer("logits").output)
+
+
+def distillation_loss(num_classes, temperature=4.0, alpha=0.7):
+    """
+    Keras loss over y_true = [one-hot | teacher probabilities] (see
+    make_tf_dataset's soft_labels) and y_pred = student logits
+    """
+    import tensorflow as tf
+
+    def loss(y_true, y_pred):
+        hard, teacher = y_true[:, :num_classes], y_true[:, num_classes:]
+        teacher_soft = tf.nn.softmax(tf.math.log(teacher + 1e-7) / temperature)
+        student_log_soft = tf.nn.log_softmax(y_pred / temperature)
+        kl = tf.reduce_sum(
+            teacher_soft * (tf.math.log(teacher_soft + 1e-7) - student_log_soft), axis=-1
+        )
+        ce = tf.keras.losses.categorical_crossentropy(hard, y_pred, from_logits=True)
+        return alpha * temperature ** 2 * kl + (1.0 - alpha) * ce
+
+    return loss
+
+
+def hard_accuracy(num_classes):
+    """Accuracy against the one-hot half of a distillation target"""
+    import tensorflow as tf
+
+    def accuracy(y_true, y_pred):
+        return tf.cast(
+            tf.equal(tf.argmax(y_true[:, :num_classes], -1), tf.argmax(y_pred, -1)), tf.float32
+        )
+
+    return accuracy
+
+
+def predict_probabilities(model, directory, batch_size=64):
+    """Model probabilities for every ROI of a dataset directory, in row order"""
+    from services.roi_dataset import make_tf_dataset
+
+    _, height, width, _ = model.input_shape
+    ds = make_tf_dataset(directory, batch_size=batch_size, shuffle=False, size=(width, height))
+    return model.predict(ds.map(lambda rois, labels: rois), verbose=0).astype(np.float32)
+
+
+def teacher_targets(teacher, teacher_path, directory, batch_size=64):
+    """
+    Teacher probabilities for a dataset directory, computed once and cached
+    there as teacher-<hash>.npy
+    """
+    path = os.path.join(directory, TEACHER_TARGETS_FILE.format(file_sha256(teacher_path)[:16]))
+    if os.path.exists(path):
+        return np.load(path)
+    started = time.perf_counter()
+    targets = predict_probabilities(teacher, directory, batch_size)
+    np.save(path, targets)
+    print(f"🧑‍🏫 Teacher labeled {len(targets)} ROIs in {time.perf_counter() - started:.1f}s -> {path}")
+    return targets
+
+
+def classification_report(probabilities, labels, classes, confidence_threshold):
+    """Accuracy, per-class recall and confident share of one model's probabilities"""
+    predicted = np.argmax(probabilities, axis=1)
+    confident = np.max(probabilities, axis=1) >= confidence_threshold
+    return {
+        "accuracy": float(np.mean(predicted == labels)) if len(labels) else 0.0,
+        "recall": {
+            name: float(np.mean(predicted[labels == i] == i)) if np.any(labels == i) else None
+            for i, name in enumerate(classes)
+        },
+        # Frames the postprocessor would keep (the vote drops the rest)
+        "confident_share": float(np.mean(confident)) if len(labels) else 0.0,
+        "confident_accuracy": float(np.mean(predicted[confident] == labels[confident]))
+        if np.any(confident)
+        else 0.0,
+    }
+
+
+def latency_report(model_path, iterations=200, warmup=20):
+    """
+    Per-frame CPU latency of a model on the serving path: ImagePreprocessor on
+    a 224x224 ROI plus ModelInference.predict, one frame at a time
+    """
+    from benchmarks.pipeline import summarize
+    from services.model_inference import ModelInference
+    from services.preprocessor import ImagePreprocessor
+
+    inference = ModelInference(model_path)
+    preprocessor = ImagePreprocessor(inference.input_size)
+    roi = np.random.default_rng(0).integers(0, 256, (224, 224, 3), dtype=np.uint8)
+    samples = {"preprocessing": [], "inference": []}
+    for i in range(warmup + iterations):
+        started = time.perf_counter()
+        preprocessed = preprocessor.preprocess_for_model(roi)
+        preprocessed_at = time.perf_counter()
+        inference.predict(preprocessed)
+        if i >= warmup:
+            samples["preprocessing"].append(preprocessed_at - started)
+            samples["inference"].append(time.perf_counter() - preprocessed_at)
+    return {
+        "input_size": list(inference.input_size),
+        "parameters": int(inference.model.count_params()),
+        "file_bytes": os.path.getsize(model_path),
+        **{name: summarize(values) for name, values in samples.items()},
+    }
@@ -1,38 +1,67 @@
 import time
+import cv2
 from services.hand_detector import HandDetector
 from services.preprocessor import ImagePreprocessor
+from services.model_cache import ModelArtifactCache
 from services.model_inference import ModelInference
 from services.postprocessor import PredictionPostprocessor
 from utils.image_utils import (
     extract_hand_roi,
     draw_prediction_overlay,
+    draw_landmark_points,
     encode_frame_to_base64,
+    encode_frame,
 )
+from utils.config import Config
+from utils.metrics import HAND_DETECTION, HAND_DETECTION_OUTCOMES, FRAMES_PROCESSED
+from utils.tracing import NULL_TRACE, stage
+
+
+OVERLAY_MODES = ("full", "thumbnail", "none")
 
 
 class FrameProcessor:
     def __init__(self):
         self.hand_detector = HandDetector()
-        self.preprocessor = ImagePreprocessor()
-        self.model_inference = ModelInference()
+        self.model_inference = ModelInference(
+            artifact_cache=ModelArtifactCache(Config.MODEL_CACHE_DIR) if Config.MODEL_CACHE else None
+        )
+        self.model_inference.load_variants(Config.MODEL_VARIANTS)
+        self.preprocessor = ImagePreprocessor(self.model_inference.input_size)
         self.postprocessor = PredictionPostprocessor()
 
-    def process_frame(self, image, frame_metadata=None):
+    def process_frame(
+        self,
+        image,
+        frame_metadata=None,
+        trace=None,
+        postprocessor=None,
+        overlay_mode=None,
+        variant=None,
+    ):
         """
         Process a single frame through the entire pipeline
+        Pass a RoundTrace as `trace` to record per-stage spans, a
+        PredictionPostprocessor to vote into instead of this processor's own,
+        an overlay_mode (see _final_overlay) to override Config.RESULT_OVERLAY
+        and a model variant (see ModelInference.load_variants) to classify with
         Returns: (status, real_time_result, should_send_final, final_result)
         """
-        # Use frontend timestamp if available, otherwise current time
-        if frame_metadata and 'timestamp' in frame_metadata:
-            # Frontend sends timestamp in microseconds, convert to seconds
-            timestamp = frame_metadata['timestamp'] / 1000000.0
-        else:
-            timestamp = time.time()
-            
-        print(f"🔍 Processing frame with timestamp: {timestamp}")
+        # Server clock only: the frontend's timestamp has no fixed units or epoch,
+        # so it stays in the metadata and never drives the aggregation window
+        timestamp = time.time()
+        received = time.monotonic()
+
+        print(f"🔍 Processing frame {(frame_metadata or {}).get('frameId', '-')}")
+
+        FRAMES_PROCESSED.inc()
+        trace = trace or NULL_TRACE
 
         # 1. Hand Detection (using static image mode to avoid timestamp conflicts)
-        hand_status, hand_message, hand_data = self.hand_detector.detect_hands(image)   
+        with stage(trace, "hand_detection"):
+            hand_status, hand_message, hand_data = self.hand_detector.detect_hands(image)
+        outcome = HAND_DETECTION_OUTCOMES.get(hand_status)
+        (outcome or HAND_DETECTION.labels(outcome=hand_status)).inc()
 
         if hand_status != "success":
             print(f"❌ Hand detection failed: {hand_status} - {hand_message}")
@@ -51,11 +80,233 @@ class FrameProcessor:
 
         try:
             # 2. Extract hand ROI
-            roi_image, bbox = extract_hand_roi(image, hand_data)
+            with stage(trace, "roi_extraction"):
+                roi_image, bbox = extract_hand_roi(image, hand_data)
+
+            return self._classify_roi(
+                image,
+                roi_image,
+                bbox,
+                frame_metadata,
+                trace,
+                timestamp,
+                received,
+                postprocessor,
+                overlay_mode,
+                variant,
+            )
+
+        except Exception as e:
+            return (
+                "error",
+                {
+                    "status": "error",
+                    "message": f"Processing error: {str(e)}",
+                    "timestamp": timestamp,
+                },
+                False,
+                None,
+            )
+
+    def process_roi(
+        self,
+        roi_image,
+        frame_metadata=None,
+        trace=None,
+        postprocessor=None,
+        overlay_mode=None,
+        variant=None,
+    ):
+        """
+        Process a hand ROI that the client already cropped (client-side hand detection)
+        Skips hand detection and ROI extraction; the ROI doubles as the overlay image
+        Returns: (status, real_time_result, should_send_final, final_result)
+        """
+        timestamp = time.time()
+        received = time.monotonic()
+
+        print(f"🔍 Processing ROI {(frame_metadata or {}).get('frameId', '-')}")
+
+        FRAMES_PROCESSED.inc()
+        trace = trace or NULL_TRACE
+
+        try:
+            height, width = roi_image.shape[:2]
+            return self._classify_roi(
+                roi_image,
+                roi_image,
+                (0, 0, width, height),
+                frame_metadata,
+                trace,
+                timestamp,
+                received,
+                postprocessor,
+                overlay_mode,
+                variant,
+            )
+
+        except Exception as e:
+            return (
+                "error",
+                {
+                    "status": "error",
+                    "message": f"Processing error: {str(e)}",
+                    "timestamp": timestamp,
+                },
+                False,
+                None,
+            )
+
+    def _classify_roi(
+        self,
+        image,
+        roi_image,
+        bbox,
+        frame_metadata,
+        trace,
+        timestamp,
+        received,
+        postprocessor=None,
+        overlay_mode=None,
+        variant=None,
+    ):
+        """Preprocess, classify and aggregate one hand ROI (steps 3-10 of the pipeline)"""
+        postprocessor = postprocessor or self.postprocessor
+
+        # 3. Preprocess for model
+        with stage(trace, "preprocessing"):
+            preprocessed_roi = self.preprocessor.preprocess_for_model(
+                roi_image, self.model_inference.variant_input_size(variant)
+            )
+        if preprocessed_roi is None:
+            return (
+                "error",
+                {
+                    "status": "error",
+                    "message": "Preprocessing failed",
+                    "timestamp": timestamp,
+                },
+                False,
+                None,
+            )
+
+        # 4. Run inference
+        with stage(trace, "inference"):
+            prediction, confidence, all_predictions = self.model_inference.predict(
+                preprocessed_roi, variant
+            )
+
+        # 5. Create frame data
+        frame_data = {
+            "timestamp": received,
+            "bbox": bbox,
+            "original_image": image.copy(),
+            "roi": roi_image,
+            "metadata": frame_metadata or {},
+        }
+
+        # 6. Add to postprocessor buffer and check if we should send final result
+        aggregated_result, best_frame = None, None
+        with stage(trace, "postprocessing"):
+            postprocessor.add_prediction(prediction, confidence, frame_data)
+            buffer_size = len(postprocessor.frame_buffer)
+            should_send_final = postprocessor.should_send_final_result()
+            if should_send_final:
+                aggregated_result, best_frame = (
+                    postprocessor.get_aggregated_result()
+                )
 
-            # 3. Preprocess for model
-            preprocessed_roi = self.preprocessor.preprocess_for_model(roi_image)
-            if preprocessed_roi is None:
+        # 7. Create final overlay with best frame (per-frame results carry the
+        # bbox only; no endpoint returns them, so no image is encoded for them)
+        final_overlay_base64 = None
+        if aggregated_result and best_frame:
+            with stage(trace, "overlay_encode"):
+                final_overlay_base64 = self._final_overlay(
+                    aggregated_result, best_frame, overlay_mode
+                )
+
+        # 8. Real-time result
+        real_time_result = {
+            "status": "success",
+            "prediction": prediction,
+            "confidence": confidence,
+            "all_predictions": all_predictions,
+            "bbox": [int(v) for v in bbox],
+            "timestamp": timestamp,
+            "buffer_size": buffer_size,
+        }
+
+        # 9. Final result
+        final_result = None
+        if should_send_final:
+            if aggregated_result and best_frame:
+                final_result = self._final_result(
+                    aggregated_result, best_frame, final_overlay_base64, timestamp, overlay_mode
+                )
+
+            # Clear buffer after sending final result
+            postprocessor.clear_buffer()
+
+        return "success", real_time_result, should_send_final, final_result
+
+    def process_players(
+        self,
+        image,
+        votes,
+        tracker,
+        frame_metadata=None,
+        trace=None,
+        overlay_mode=None,
+        variant=None,
+    ):
+        """
+        Process a frame of a two-player round: both hands are detected in one
+        MediaPipe pass, seated by the round's PlayerTracker, cropped and
+        classified in a single batched forward pass, and each prediction votes
+        into its player's PredictionPostprocessor in `votes` (PlayerVotes)
+        Returns: (status, real_time_result, should_send_final, final_result)
+        """
+        timestamp = time.time()
+        received = time.monotonic()
+
+        print(f"🔍 Processing two-player frame {(frame_metadata or {}).get('frameId', '-')}")
+
+        FRAMES_PROCESSED.inc()
+        trace = trace or NULL_TRACE
+
+        # 1. Hand Detection (up to one hand per player)
+        with stage(trace, "hand_detection"):
+            hand_status, hand_message, hands = self.hand_detector.detect_player_hands(image)
+        outcome = HAND_DETECTION_OUTCOMES.get(hand_status)
+        (outcome or HAND_DETECTION.labels(outcome=hand_status)).inc()
+
+        if hand_status != "success":
+            print(f"❌ Hand detection failed: {hand_status} - {hand_message}")
+            return (
+                hand_status,
+                {
+                    "status": hand_status,
+                    "message": hand_message,
+                    "players": {},
+                    "timestamp": timestamp,
+                },
+                False,
+                None,
+            )
+
+        try:
+            # 2. Extract hand ROIs and seat them
+            with stage(trace, "roi_extraction"):
+                crops = [extract_hand_roi(image, hand) for hand in hands]
+                crops = [(roi, bbox) for roi, bbox in crops if roi is not None]
+                players = tracker.assign([bbox for _, bbox in crops], image.shape)
+
+            # 3. Preprocess both ROIs as one batch
+            with stage(trace, "preprocessing"):
+                batch = self.preprocessor.preprocess_batch_for_model(
+                    [roi for roi, _ in crops], self.model_inference.variant_input_size(variant)
+                ) if crops else None
+            if batch is None:
                 return (
                     "error",
                     {
@@ -67,75 +318,50 @@ class FrameProcessor:
                     None,
                 )
 
-            # 4. Run inference
-            prediction, confidence, all_predictions = self.model_inference.predict(
-                preprocessed_roi
-            )
-
-            # 5. Create frame data
-            frame_data = {
-                "timestamp": timestamp,
-                "bbox": bbox,
-                "original_image": image.copy(),
-                "roi": roi_image,
-                "metadata": frame_metadata or {},
-            }
+            # 4. Run inference: one forward pass for both hands
+            with stage(trace, "inference"):
+                predictions = self.model_inference.predict_batch(batch, variant)
 
-            # 6. Add to postprocessor buffer
-            self.postprocessor.add_prediction(prediction, confidence, frame_data)
-
-            # 7. Create overlay image for real-time feedback
-            overlay_image = image.copy()
-            overlay_image = draw_prediction_overlay(
-                overlay_image, bbox, prediction, confidence
-            )
-            overlay_base64 = encode_frame_to_base64(overlay_image)
+            # 5-6. Vote per player (the players' frames share one copy of the image)
+            original_image = image.copy()
+            player_results = {}
+            with stage(trace, "postprocessing"):
+                for player, (roi, bbox), (prediction, confidence, all_predictions) in zip(
+                    players, crops, predictions
+                ):
+                    votes.add_prediction(
+                        player,
+                        prediction,
+                        confidence,
+                        {
+                            "timestamp": received,
+                            "bbox": bbox,
+                            "original_image": original_image,
+                            "roi": roi,
+                            "metadata": frame_metadata or {},
+                        },
+                    )
+                    player_results[player] = {
+                        "prediction": prediction,
+                        "confidence": confidence,
+                        "all_predictions": all_predictions,
+                        "bbox": [int(v) for v in bbox],
+                    }
+                buffer_size = len(votes.frame_buffer)
+                should_send_final = votes.should_send_final_result()
 
             # 8. Real-time result
             real_time_result = {
                 "status": "success",
-                "prediction": prediction,
-                "confidence": confidence,
-                "all_predictions": all_predictions,
-                "overlay_image": overlay_base64,
+                "players": player_results,
                 "timestamp": timestamp,
-                "buffer_size": len(self.postprocessor.frame_buffer),
+                "buffer_size": buffer_size,
             }
 
-            # 9. Check if we should send final result
-            should_send_final = self.postprocessor.should_send_final_result()
+            # 9. Final result
             final_result = None
-
             if should_send_final:
-                aggregated_result, best_frame = (
-                    self.postprocessor.get_aggregated_result()
-                )
-                if aggregated_result and best_frame:
-                    # Create final overlay with best frame
-                    final_overlay = best_frame["frame_data"]["original_image"].copy()
-                    final_overlay = draw_prediction_overlay(
-                        final_overlay,
-                        best_frame["frame_data"]["bbox"],
-                        aggregated_result["final_prediction"],
-                        aggregated_result["confidence"],
-                    )
-                    final_overlay_base64 = encode_frame_to_base64(final_overlay)
-
-                    final_result = {
-                        "status": "final_result",
-                        "final_prediction": aggregated_result["final_prediction"],
-                        "confidence": aggregated_result["confidence"],
-                        "frame_count": aggregated_result["frame_count"],
-                        "prediction_percentage": aggregated_result[
-                            "prediction_percentage"
-                        ],
-                        "all_predictions": aggregated_result["all_predictions"],
-                        "final_overlay_image": final_overlay_base64,
-                        "timestamp": timestamp,
-                    }
-
-                    # Clear buffer after sending final result
-                self.postprocessor.clear_buffer()
+                final_result = self.finalize_players(trace, votes, overlay_mode)
 
             return "success", real_time_result, should_send_final, final_result
 
@@ -150,3 +376,100 @@ class FrameProcessor:
                 False,
                 None,
             )
+
+    def finalize_players(self, trace=None, votes=None, overlay_mode=None):
+        """
+        finalize() for each player of a two-player round
+        Returns: {"status": "final_result", "players": {player: final_result}},
+            with None for a player nothing was buffered for, or None when
+            nothing was buffered at all
+        """
+        players = {
+            player: self.finalize(trace, postprocessor=postprocessor, overlay_mode=overlay_mode)
+            for player, postprocessor in votes.items()
+        }
+        votes.clear_buffer()
+        if not any(players.values()):
+            return None
+        return {"status": "final_result", "players": players, "timestamp": time.time()}
+
+    def finalize(self, trace=None, postprocessor=None, overlay_mode=None):
+        """
+        Aggregate whatever is buffered into a final result right now
+        (used when a round runs out of its latency budget)
+        Returns: final_result dict, or None when nothing was buffered
+        """
+        trace = trace or NULL_TRACE
+        postprocessor = postprocessor or self.postprocessor
+        with stage(trace, "postprocessing"):
+            aggregated_result, best_frame = postprocessor.get_aggregated_result()
+        if not aggregated_result:
+            return None
+
+        with stage(trace, "overlay_encode"):
+            final_overlay_base64 = self._final_overlay(aggregated_result, best_frame, overlay_mode)
+        final_result = self._final_result(
+            aggregated_result, best_frame, final_overlay_base64, time.time(), overlay_mode
+        )
+        postprocessor.clear_buffer()
+        return final_result
+
+    def _final_overlay(self, aggregated_result, best_frame, overlay_mode=None):
+        """
+        Render the final result image for the response, by overlay mode:
+            full: the prediction drawn on the whole best frame (JPEG data URL)
+            thumbnail: the best frame's hand ROI, downscaled to
+                Config.THUMBNAIL_MAX_SIDE in Config.THUMBNAIL_FORMAT
+            none: no image; the client draws the returned bbox on its own copy
+                of the frame
+        Returns: data URL, or None
+        """
+        overlay_mode = overlay_mode or Config.RESULT_OVERLAY
+        frame_data = best_frame["frame_data"]
+        if overlay_mode == "none":
+            return None
+
+        if overlay_mode == "thumbnail":
+            roi = frame_data["roi"]
+            height, width = roi.shape[:2]
+            scale = Config.THUMBNAIL_MAX_SIDE / max(height, width)
+            if scale < 1:
+                roi = cv2.resize(
+                    roi,
+                    (max(1, round(width * scale)), max(1, round(height * scale))),
+                    interpolation=cv2.INTER_AREA,
+                )
+            return encode_frame(roi, Config.THUMBNAIL_FORMAT, Config.THUMBNAIL_QUALITY)
+
+        final_overlay = frame_data["original_image"].copy()
+        final_overlay = draw_prediction_overlay(
+            final_overlay,
+            frame_data["bbox"],
+            aggregated_result["final_prediction"],
+            aggregated_result["confidence"],
+        )
+        # Client-side detection sends landmarks normalized to the ROI
+        landmarks = frame_data["metadata"].get("landmarks")
+        if landmarks:
+            final_overlay = draw_landmark_points(final_overlay, landmarks)
+        return encode_frame_to_base64(final_overlay)
+
+    def _final_result(
+        self, aggregated_result, best_frame, final_overlay_base64, timestamp, overlay_mode=None
+    ):
+        frame_data = best_frame["frame_data"]
+        return {
+            "status": "final_result",
+            "final_prediction": aggregated_result["final_prediction"],
+            "confidence": aggregated_result["confidence"],
+            "frame_count": aggregated_result["frame_count"],
+            "prediction_percentage": aggregated_result["prediction_percentage"],
+            "all_predictions": aggregated_result["all_predictions"],
+            "final_overlay_image": final_overlay_base64,
+            "overlay_mode": overlay_mode or Config.RESULT_OVERLAY,
+            # Where the hand is in the best frame, in the pixels of the image
+            # the client uploaded (its ROI for /process-rois)
+            "bbox": [int(v) for v in frame_data["bbox"]],
+            "frame_id": frame_data["metadata"].get("frameId"),
+            "timestamp": timestamp,
+        }
@@ -66,4 +66,37 @@ class GameEngine:
             'winner': winner,
             'valid_move': valid_move,
             'reason': 'Invalid move - Computer wins!' if not valid_move else None
-        }
\ No newline at end of file
+        }
+
+    def play_two_player_round(self, left_move, right_move):
+        """
+        Play a round between the two players of a single camera
+        Args:
+            left_move (str): move of the player on the left of the frame
+            right_move (str): move of the player on the right of the frame
+        Returns:
+            dict: {
+                'left_move': str,
+                'right_move': str,
+                'winner': 'left', 'right' or 'draw',
+                'valid_moves': {'left': bool, 'right': bool}
+            }
+        """
+        valid_moves = {'left': left_move in self.moves, 'right': right_move in self.moves}
+
+        # A valid move beats an invalid one; two invalid moves are a draw
+        if valid_moves['left'] and valid_moves['right']:
+            winner = {'player': 'left', 'computer': 'right', 'draw': 'draw'}[
+                self.determine_winner(left_move, right_move)
+            ]
+        elif valid_moves['left'] != valid_moves['right']:
+            winner = 'left' if valid_moves['left'] else 'right'
+        else:
+            winner = 'draw'
+
+        return {
+            'left_move': left_move,
+            'right_move': right_move,
+            'winner': winner,
+            'valid_moves': valid_moves,
+        }
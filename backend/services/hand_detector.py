@@ -16,42 +16,63 @@ class HandDetector:
             min_tracking_confidence=Config.HAND_TRACKING_CONFIDENCE,
         )
 
+    def _process(self, image):
+        """MediaPipe hand landmarks of a BGR image (None when no hand)"""
+        # Convert BGR to RGB
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+        # Set writeable False to improve performance
+        rgb_image.flags.writeable = False
+
+        # Process the image with proper dimensions
+        results = self.hands.process(rgb_image)
+
+        # Set writeable back to True
+        rgb_image.flags.writeable = True
+        return results.multi_hand_landmarks
+
     def detect_hands(self, image):
         """
         Detect hands in image
         Returns: (status, message, results)
         """
         try:
-            # Get image dimensions
-            height, width = image.shape[:2]
-            
-            # Convert BGR to RGB
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Set writeable False to improve performance
-            rgb_image.flags.writeable = False
-            
-            # Process the image with proper dimensions
-            results = self.hands.process(rgb_image)
-            
-            # Set writeable back to True
-            rgb_image.flags.writeable = True
+            multi_hand_landmarks = self._process(image)
 
-            if not results.multi_hand_landmarks:
+            if not multi_hand_landmarks:
                 return "no_hands", "No hands detected", None
 
             # Check for multiple hands
-            if len(results.multi_hand_landmarks) > 1:
+            if len(multi_hand_landmarks) > 1:
                 return "invalid", "Multiple hands detected", None
             
             # Single hand detected
-            hand_landmarks = results.multi_hand_landmarks[0]
+            hand_landmarks = multi_hand_landmarks[0]
 
             return "success", "Single hand detected", hand_landmarks
 
         except Exception as e:
             return "error", f"Hand detection error: {str(e)}", None
 
+    def detect_player_hands(self, image):
+        """
+        Detect the hands of a two-player frame (one per player); the same
+        single MediaPipe pass as detect_hands, which already looks for
+        Config.MAX_HANDS hands
+        Returns: (status, message, list of 1-2 hand landmarks)
+        """
+        try:
+            multi_hand_landmarks = self._process(image)
+
+            if not multi_hand_landmarks:
+                return "no_hands", "No hands detected", None
+
+            count = len(multi_hand_landmarks)
+            return "success", f"{count} hand{'s' if count > 1 else ''} detected", list(multi_hand_landmarks)
+
+        except Exception as e:
+            return "error", f"Hand detection error: {str(e)}", None
+
     def draw_landmarks(self, image, hand_landmarks):
         """
         Draw hand landmarks on image
@@ -0,0 +1,286 @@
+"""
+Match history and leaderboard, in an embedded SQLite database
+
+Every played round is one row of `rounds`. A trigger keeps per-player totals
+(results and moves) in `players` up to date in the same transaction, so the
+leaderboard is an index scan over players (ordered by wins) and player stats
+a single row, instead of aggregates over every round; per-player history is
+a keyset scan of the (player, id) index.
+
+Requests never touch the database for writing: record() queues the round and
+a writer thread (one per worker process) inserts queued rounds in batches,
+one transaction per batch. round_id is unique and inserts are INSERT OR
+IGNORE, so a round that reaches more than one worker is still counted once.
+Reads use one connection per request thread; WAL mode lets them run while a
+batch is being written.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    round_id TEXT NOT NULL UNIQUE,
+    player TEXT NOT NULL,
+    game_mode TEXT,
+    match_round INTEGER,
+    player_move TEXT NOT NULL,
+    computer_move TEXT NOT NULL,
+    winner TEXT NOT NULL,
+    confidence REAL,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rounds_by_player ON rounds (player, id);
+
+CREATE TABLE IF NOT EXISTS players (
+    player TEXT PRIMARY KEY,
+    rounds INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    rock INTEGER NOT NULL,
+    paper INTEGER NOT NULL,
+    scissors INTEGER NOT NULL,
+    first_played REAL NOT NULL,
+    last_played REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS players_by_wins ON players (wins DESC, rounds, player);
+
+CREATE TRIGGER IF NOT EXISTS rounds_tally AFTER INSERT ON rounds BEGIN
+    INSERT INTO players (
+        player, rounds, wins, losses, draws, rock, paper, scissors, first_played, last_played
+    )
+    VALUES (
+        NEW.player, 1,
+        NEW.winner = 'player', NEW.winner = 'computer', NEW.winner = 'draw',
+        NEW.player_move = 'rock', NEW.player_move = 'paper', NEW.player_move = 'scissors',
+        NEW.played_at, NEW.played_at
+    )
+    ON CONFLICT (player) DO UPDATE SET
+        rounds = rounds + 1,
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses,
+        draws = draws + excluded.draws,
+        rock = rock + excluded.rock,
+        paper = paper + excluded.paper,
+        scissors = scissors + excluded.scissors,
+        -- Batches from several workers do not arrive in played_at order
+        first_played = min(first_played, excluded.first_played),
+        last_played = max(last_played, excluded.last_played);
+END;
+"""
+
+INSERT_ROUND = """
+INSERT OR IGNORE INTO rounds (
+    round_id, player, game_mode, match_round, player_move, computer_move, winner, confidence, played_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+MAX_PAGE_SIZE = 100
+MAX_PLAYER_NAME = 64
+
+
+def player_name(game_data):
+    """Player key of a round: gameData.playerName, trimmed (None when missing)"""
+    name = str(game_data.get("playerName") or "").strip()
+    return name[:MAX_PLAYER_NAME] or None
+
+
+def page_size(limit, default=20):
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE"""
+    return max(1, min(limit or default, MAX_PAGE_SIZE))
+
+
+class MatchStore:
+    def __init__(self, path, batch_size=256, flush_interval=0.5, queue_size=4096):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval  # longest a queued round waits for its batch
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._writer_pid = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self):
+        # One connection per thread (and per process, after fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return conn
+
+    # Writes
+
+    def record(self, round_id, game_data, result, played_at=None):
+        """
+        Queue a played round for the writer thread; never blocks the request
+        Rounds without a player name or a game result are not recorded, nor
+        are two-player rounds (no computer move to store)
+        Returns:
+            bool: False when the round was skipped or the queue was full
+        """
+        game_result = result.get("game_result")
+        player = player_name(game_data)
+        if not game_result or not player or "player_move" not in game_result:
+            return False
+
+        self._ensure_writer()
+        row = (
+            str(round_id),
+            player,
+            game_data.get("gameMode"),
+            game_data.get("currentRound"),
+            game_result["player_move"],
+            game_result["computer_move"],
+            game_result["winner"],
+            result.get("confidence"),
+            played_at or time.time(),
+        )
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            print(f"⚠️ Match history queue full, dropped round {round_id}")
+            return False
+
+    def write_many(self, rows):
+        """Insert rounds (tuples in INSERT_ROUND order) in one transaction"""
+        conn = self._connection()  # the writer thread's own, or the caller's
+        with conn:
+            conn.executemany(INSERT_ROUND, rows)
+        self.written += len(rows)
+
+    def flush(self):
+        """Wait until every queued round is in the database"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _ensure_writer(self):
+        # Threads do not survive fork, so start one lazily in each worker
+        with self._lock:
+            if self._writer is None or self._writer_pid != os.getpid() or not self._writer.is_alive():
+                self._writer_pid = os.getpid()
+                self._writer = threading.Thread(target=self._run, name="match-store", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        while True:
+            rows = [self._queue.get()]
+            # Gather a batch: whatever else arrives within flush_interval
+            batch_deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                remaining = batch_deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.write_many(rows)
+            except Exception as e:
+                print(f"❌ Error writing {len(rows)} rounds to match history: {e}")
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    # Reads
+
+    def leaderboard(self, limit=20, offset=0):
+        """
+        Players by wins (then fewer rounds, then name), one page
+        Returns: dict with players (rank, totals, win_rate), total, limit, offset
+        """
+        limit, offset = page_size(limit), max(0, offset or 0)
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT * FROM players ORDER BY wins DESC, rounds, player LIMIT ? OFFSET ?",
+            (limit, offset),
+        ).fetchall()
+        total = conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+        return {
+            "players": [
+                _player_entry(row, rank) for rank, row in enumerate(rows, start=offset + 1)
+            ],
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+        }
+
+    def player_stats(self, player):
+        """Totals, leaderboard rank and move counts of one player (None if unknown)"""
+        conn = self._connection()
+        row = conn.execute("SELECT * FROM players WHERE player = ?", (player,)).fetchone()
+        if row is None:
+            return None
+        # Ties share the rank of the first player with the same wins
+        rank = 1 + conn.execute(
+            "SELECT COUNT(*) FROM players WHERE wins > ?", (row["wins"],)
+        ).fetchone()[0]
+        stats = _player_entry(row, rank)
+        moves = {move: row[move] for move in ("rock", "paper", "scissors")}
+        # Rounds where no valid gesture was read (invalid, timeout)
+        moves["other"] = row["rounds"] - sum(moves.values())
+        stats["moves"] = moves
+        return stats
+
+    def player_rounds(self, player, limit=20, before=None):
+        """
+        A player's rounds, newest first; pass the returned next_before as
+        `before` for the next page
+        """
+        limit = page_size(limit)
+        rows = self._connection().execute(
+            "SELECT * FROM rounds WHERE player = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (player, before if before is not None else 2 ** 63 - 1, limit),
+        ).fetchall()
+        return {
+            "rounds": [
+                {
+                    "id": row["id"],
+                    "round_id": row["round_id"],
+                    "game_mode": row["game_mode"],
+                    "match_round": row["match_round"],
+                    "player_move": row["player_move"],
+                    "computer_move": row["computer_move"],
+                    "winner": row["winner"],
+                    "confidence": row["confidence"],
+                    "played_at": row["played_at"],
+                }
+                for row in rows
+            ],
+            "limit": limit,
+            "next_before": rows[-1]["id"] if len(rows) == limit else None,
+        }
+
+
+def _player_entry(row, rank):
+    return {
+        "rank": rank,
+        "player": row["player"],
+        "rounds": row["rounds"],
+        "wins": row["wins"],
+        "losses": row["losses"],
+        "draws": row["draws"],
+        "win_rate": row["wins"] / row["rounds"] if row["rounds"] else 0.0,
+        "first_played": row["first_played"],
+        "last_played": row["last_played"],
+    }
@@ -0,0 +1,170 @@
+"""
+Compiled model artifacts, cached on disk across process starts
+
+Serving from the .h5 means parsing it, rebuilding the Keras graph (again for
+every model variant) and tracing and XLA-compiling each forward function, in
+every worker at every start. Converted once to a TFLite flatbuffer, the same
+model loads in milliseconds: the interpreter maps the file instead of reading
+it, so the workers of a host share its pages, and there is nothing to trace.
+
+Artifacts live under <cache dir>/<model sha256[:16]>-<runtime>/<name>.tflite,
+where runtime is the TensorFlow and Keras version that converted them, so a
+new model file or an upgrade never loads a stale artifact. Workers starting
+together convert each artifact once: the first takes a file lock, the others
+wait for it and load its result. Files are written under a temporary name and
+renamed into place, so a reader never sees half of one.
+"""
+import contextlib
+import fcntl
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import numpy as np
+
+ARTIFACT_FILE = "{}.tflite"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def runtime_version():
+    """Version tag of the converter, part of every artifact's cache key"""
+    import keras
+    import tensorflow as tf
+
+    return f"tf{tf.__version__}-keras{keras.__version__}"
+
+
+def _interpreter_class():
+    try:
+        # tf.lite.Interpreter's successor; tf.lite's is gone after TF 2.19
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class CompiledModel:
+    """
+    A cached TFLite artifact, called like the Keras forward function it
+    replaces: float32 NHWC batch in, class probabilities (numpy) out
+    One interpreter per batch size seen, all mapping the same file
+    """
+
+    def __init__(self, path, num_threads=None):
+        import tensorflow as tf
+
+        self.path = path
+        # The worker's TF pool size (configure_worker_threads), 0 = interpreter default
+        self.num_threads = num_threads or tf.config.threading.get_intra_op_parallelism_threads() or None
+        self._interpreter_class = _interpreter_class()
+        self._interpreters = {}
+        self._lock = threading.Lock()
+        interpreter = self._interpreter(1)[0]
+        # (None, height, width, channels), like a Keras model's input_shape
+        shape = interpreter.get_input_details()[0]["shape"]
+        self.input_shape = (None, *(int(v) for v in shape[1:]))
+
+    def _interpreter(self, batch):
+        entry = self._interpreters.get(batch)
+        if entry is None:
+            interpreter = self._interpreter_class(model_path=self.path, num_threads=self.num_threads)
+            input_details = interpreter.get_input_details()[0]
+            if input_details["shape"][0] != batch:
+                interpreter.resize_tensor_input(
+                    input_details["index"], [batch, *input_details["shape"][1:]]
+                )
+            interpreter.allocate_tensors()
+            entry = (interpreter, input_details["index"], interpreter.get_output_details()[0]["index"])
+            self._interpreters[batch] = entry
+        return entry
+
+    def __call__(self, images):
+        images = np.ascontiguousarray(images, dtype=np.float32)
+        # An interpreter runs one invocation at a time
+        with self._lock:
+            interpreter, input_index, output_index = self._interpreter(len(images))
+            interpreter.set_tensor(input_index, images)
+            interpreter.invoke()
+            return interpreter.get_tensor(output_index).copy()
+
+
+class ModelArtifactCache:
+    """Converts Keras models to TFLite once and loads them from disk after that"""
+
+    def __init__(self, directory, num_threads=None):
+        self.directory = directory
+        self.num_threads = num_threads
+        self._digests = {}  # (path, mtime_ns, size) -> sha256
+
+    def path(self, model_path, name):
+        """Where the artifact `name` of the model file at model_path lives"""
+        stat = os.stat(model_path)
+        key = (os.path.abspath(model_path), stat.st_mtime_ns, stat.st_size)
+        if key not in self._digests:
+            self._digests[key] = file_sha256(model_path)
+        folder = f"{self._digests[key][:16]}-{runtime_version()}"
+        return os.path.join(self.directory, folder, ARTIFACT_FILE.format(name))
+
+    def has(self, model_path, name):
+        return os.path.exists(self.path(model_path, name))
+
+    def load(self, model_path, name):
+        """The cached artifact as a CompiledModel, or None when there is none (yet)"""
+        path = self.path(model_path, name)
+        if not os.path.exists(path):
+            return None
+        try:
+            return CompiledModel(path, self.num_threads)
+        except Exception as e:
+            print(f"⚠️ Could not load model artifact {path}: {str(e)}")
+            return None
+
+    @contextlib.contextmanager
+    def converting(self, model_path, name):
+        """Exclusive across processes while the artifact `name` is converted"""
+        path = self.path(model_path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def store(self, model_path, name, model):
+        """
+        Convert a Keras model and write it as the artifact `name` of model_path
+        Returns: the artifact path, or None when conversion or writing failed
+        """
+        import tensorflow as tf
+
+        path = self.path(model_path, name)
+        try:
+            # The converter exports a SavedModel first and lists every captured tensor
+            with contextlib.redirect_stdout(io.StringIO()):
+                flatbuffer = tf.lite.TFLiteConverter.from_keras_model(model).convert()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(flatbuffer)
+                os.replace(temporary, path)
+            except BaseException:
+                os.remove(temporary)
+                raise
+        except Exception as e:
+            print(f"⚠️ Could not cache model artifact {path}: {str(e)}")
+            return None
+        print(f"💾 Model artifact written to {path} ({len(flatbuffer) / 1e6:.1f} MB)")
+        return path
@@ -2,38 +2,199 @@ import tensorflow as tf
 import numpy as np
 from utils.config import Config
 import os
+import time
+from services.model_cache import CompiledModel
 
 # Optimize TensorFlow for inference
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Reduce TF logging
 tf.config.optimizer.set_jit(True)  # Enable XLA JIT compilation
 
+
+def configure_worker_threads(intra_op_threads=0, inter_op_threads=1):
+    """
+    Size the TensorFlow thread pools for this process
+    Must run before the first TF op (i.e. in the worker right after fork)
+    """
+    if intra_op_threads <= 0:
+        intra_op_threads = max(1, (os.cpu_count() or 1) // max(1, Config.WORKERS))
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+        print(f"🧵 TF threads: intra={intra_op_threads}, inter={inter_op_threads}")
+    except RuntimeError as e:
+        # Runtime already initialized in this process; keep its pools
+        print(f"⚠️ Could not configure TF threads: {str(e)}")
+
+
+def _resized_model(model, size):
+    """
+    The model rebuilt for a size x size input, sharing no state with it but
+    holding the same weights
+    """
+    config = model.get_config()
+    input_layers = [layer for layer in config["layers"] if layer["class_name"] == "InputLayer"]
+    if len(input_layers) != 1:
+        raise ValueError(f"expected one input layer, found {len(input_layers)}")
+    layer_config = input_layers[0]["config"]
+    key = "batch_shape" if "batch_shape" in layer_config else "batch_input_shape"
+    layer_config[key] = [None, size, size, layer_config[key][-1]]
+    resized = model.__class__.from_config(config)
+    resized.set_weights(model.get_weights())
+    return resized
+
+
 # Process only 1 frame at a time
 class ModelInference:
-    def __init__(self):
-        self.model = None
+    def __init__(self, model_path=None, artifact_cache=None):
+        self.model = None  # the Keras model, once it had to be loaded
+        self.model_path = model_path or Config.MODEL_PATH
+        # ModelArtifactCache to serve compiled artifacts from; None = Keras only
+        self.artifact_cache = artifact_cache
         self.classes = Config.CLASSES
+        self.input_size = Config.MODEL_INPUT_SIZE  # (width, height), as cv2.resize takes it
+        # name -> {"model", "input_size", "forward", "source"}, the loaded model
+        # first, then the cheaper variants added by load_variants()
+        self.variants = {}
+        self.primary_variant = None
+        self.load_seconds = {}  # "model" / "variants" -> seconds
         self.load_model()
 
     def load_model(self):
-        """Load the trained MobileNetV2 model"""
+        """Load the trained MobileNetV2 model (or a distilled student)"""
+        started = time.perf_counter()
+        model, source = self._cached(self.model_path, "model", self._load_keras_model)
+        if model is not None:
+            # Students may take a smaller input than Config.MODEL_INPUT_SIZE
+            self.primary_variant = self._add_variant(None, model, source)
+            self.input_size = self.variants[self.primary_variant]["input_size"]
+        self.load_seconds["model"] = time.perf_counter() - started
+
+    def _load_keras_model(self):
+        """The Keras model from the .h5 (loaded once)"""
+        if self.model is not None:
+            return self.model
+
         try:
-            self.model = tf.keras.models.load_model(Config.MODEL_PATH)
-            print(f"✅ Model loaded successfully from {Config.MODEL_PATH}")
+            self.model = tf.keras.models.load_model(self.model_path)
+            print(f"✅ Model loaded successfully from {self.model_path}")
         except Exception as e:
             print(f"❌ Error loading model: {str(e)}")
             self.model = None
+        return self.model
 
-    def predict(self, preprocessed_image):
+    def _cached(self, model_path, artifact, build):
         """
-        Run inference on preprocessed image
+        A model to serve and where it came from: the cached artifact of
+        model_path ("cache"), converted from build()'s Keras model on a miss
+        ("converted"), or that Keras model itself without a cache ("keras")
+        """
+        cache = self.artifact_cache
+        if cache is None:
+            return build(), "keras"
+        compiled, source = cache.load(model_path, artifact), "cache"
+        if compiled is None:
+            # Workers starting together convert once; the others wait, then load it
+            with cache.converting(model_path, artifact):
+                compiled = cache.load(model_path, artifact)
+                if compiled is None:
+                    model = build()
+                    if model is None or not cache.store(model_path, artifact, model):
+                        return model, "keras"
+                    compiled, source = cache.load(model_path, artifact), "converted"
+                    if compiled is None:
+                        return model, "keras"
+        print(f"✅ Model loaded from cached artifact {compiled.path}")
+        return compiled, source
+
+    def _add_variant(self, name, model, source):
+        _, height, width, _ = model.input_shape
+        name = name or str(height)
+        if isinstance(model, CompiledModel):
+            forward = model
+        else:
+            # One traced graph for every call: model.predict() sets up a data
+            # adapter per call, which costs more than a small model's forward pass
+            function = tf.function(
+                lambda images: model(images, training=False),
+                input_signature=[tf.TensorSpec([None, height, width, 3], tf.float32)],
+            )
+            forward = lambda images: function(images).numpy()
+        self.variants[name] = {
+            "model": model,
+            "input_size": (width, height),
+            "forward": forward,
+            "source": source,
+        }
+        return name
+
+    def load_variants(self, specs):
+        """
+        Add cheaper variants to switch to under load (services/model_variants.py)
+        Args:
+            specs: most accurate first; an input size ("160") rebuilds the loaded
+                model at that size with the same weights (it is convolutional up
+                to the global pooling), a path loads another model, e.g. a
+                distilled student (named after its file)
+        """
+        if not self.variants:
+            return
+        started = time.perf_counter()
+        for spec in specs:
+            try:
+                if spec.isdigit():
+                    size = int(spec)
+                    if size >= self.input_size[1] or spec in self.variants:
+                        print(f"⚠️ Model variant {spec} is not smaller than the loaded model, skipped")
+                        continue
+                    name = spec
+                    model, source = self._cached(
+                        self.model_path, spec, lambda: _resized_model(self._load_keras_model(), size)
+                    )
+                else:
+                    name = os.path.splitext(os.path.basename(spec))[0]
+                    model, source = self._cached(
+                        spec, "model", lambda: tf.keras.models.load_model(spec, compile=False)
+                    )
+                self._add_variant(name, model, source)
+                print(f"✅ Model variant {name} loaded ({source})")
+            except Exception as e:
+                print(f"⚠️ Could not load model variant {spec}: {str(e)}")
+        self.load_seconds["variants"] = time.perf_counter() - started
+
+    @property
+    def variant_names(self):
+        """Variant names, most accurate (the loaded model) first"""
+        return list(self.variants)
+
+    def variant_input_size(self, variant=None):
+        """(width, height) a variant takes; the loaded model's by default"""
+        loaded = self.variants.get(variant or self.primary_variant)
+        return loaded["input_size"] if loaded else self.input_size
+
+    def warmup(self, batch_sizes=(1, 2)):
+        """
+        Run dummy predictions per variant so graph tracing (and compilation for
+        each batch size: single frames, both hands of a two-player frame)
+        happens before traffic
+        """
+        for name, variant in self.variants.items():
+            width, height = variant["input_size"]
+            for batch_size in batch_sizes:
+                self.predict_batch(np.zeros((batch_size, height, width, 3), dtype=np.float32), name)
+
+    def predict(self, preprocessed_image, variant=None):
+        """
+        Run inference on preprocessed image (sized for `variant`, default the
+        loaded model; see variant_input_size())
         Returns: (class_name, confidence, all_predictions)
         """
-        if self.model is None:
+        if not self.variants:
             return "invalid", 0.0, None
 
         try:
             # Run prediction
-            predictions = self.model.predict(preprocessed_image, verbose=0)
+            forward = self.variants[variant or self.primary_variant]["forward"]
+            predictions = forward(preprocessed_image)
             # print(f"✅ Predictions: {predictions}")
 
             # Get class with highest probability
@@ -59,3 +220,28 @@ class ModelInference:
         except Exception as e:
             print(f"Inference error: {str(e)}")
             return "invalid", 0.0, None
+
+    def predict_batch(self, preprocessed_images, variant=None):
+        """
+        predict() for a batch of preprocessed images (e.g. both hands of a
+        two-player frame) in a single forward pass
+        Returns: list of (class_name, confidence, all_predictions), one per image
+        """
+        failed = [("invalid", 0.0, None)] * len(preprocessed_images)
+        if not self.variants:
+            return failed
+
+        try:
+            forward = self.variants[variant or self.primary_variant]["forward"]
+            results = []
+            for probabilities in forward(preprocessed_images):
+                index = int(np.argmax(probabilities))
+                all_predictions = {
+                    class_name: float(prob) for class_name, prob in zip(self.classes, probabilities)
+                }
+                results.append((self.classes[index], float(probabilities[index]), all_predictions))
+            return results
+
+        except Exception as e:
+            print(f"Inference error: {str(e)}")
+            return failed
@@ -0,0 +1,117 @@
+"""
+Load-adaptive choice of the model variant each new round runs on
+
+ModelInference holds the served model and cheaper variants of it
+(Config.MODEL_VARIANTS: the same weights at a smaller input, or a distilled
+student). When this worker falls behind, new rounds go to the next cheaper
+variant, trading a little accuracy for staying inside the round budget; once
+load drops they climb back. A round keeps the variant it started on, and its
+response says which one that was (model_variant).
+"""
+import threading
+import time
+from collections import deque
+from utils.metrics import (
+    MODEL_VARIANT_ACTIVE,
+    MODEL_VARIANT_ROUND_SECONDS,
+    MODEL_VARIANT_SECONDS,
+    MODEL_VARIANT_SWITCHES,
+)
+
+MIN_ROUNDS = 5  # rounds at the current variant before their p95 counts
+
+
+class ModelVariantPolicy:
+    """
+    One step cheaper when at least queue_depth requests wait for the pipeline
+    or the p95 of recent rounds at the current variant is over p95_seconds;
+    one step back when nothing waits and that p95 is under
+    recover_ratio * p95_seconds. Only rounds run at the current variant count,
+    and there is at most one step per hold_seconds, so each switch is judged
+    on its own effect.
+    """
+
+    def __init__(
+        self,
+        admission,
+        variants,
+        queue_depth,
+        p95_seconds,
+        recover_ratio=0.5,
+        hold_seconds=5.0,
+        window=20,
+    ):
+        self.admission = admission
+        self.variants = list(variants)  # most accurate first
+        self.queue_depth = queue_depth
+        self.p95_seconds = p95_seconds
+        self.recover_ratio = recover_ratio
+        self.hold_seconds = hold_seconds
+        self._level = 0
+        self._latencies = deque(maxlen=window)  # seconds of recent rounds at the current level
+        self._switched_at = self._accounted_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._seconds = {name: MODEL_VARIANT_SECONDS.labels(variant=name) for name in self.variants}
+        self._round_seconds = {
+            name: MODEL_VARIANT_ROUND_SECONDS.labels(variant=name) for name in self.variants
+        }
+        self._active = {name: MODEL_VARIANT_ACTIVE.labels(variant=name) for name in self.variants}
+        self._active[self.current].set(1)
+
+    @property
+    def current(self):
+        return self.variants[self._level]
+
+    def record_round(self, variant, seconds):
+        """Latency of a finished round (from request receipt) on `variant`"""
+        if variant not in self._round_seconds:
+            return
+        self._round_seconds[variant].observe(seconds)
+        with self._lock:
+            # Rounds started before the last switch say nothing about this level
+            if variant == self.current:
+                self._latencies.append(seconds)
+
+    def select(self):
+        """Variant for a round starting now, after stepping one level if load calls for it"""
+        now = time.monotonic()
+        queued = self.admission.queue_depth
+        with self._lock:
+            self._seconds[self.current].inc(now - self._accounted_at)
+            self._accounted_at = now
+            if now - self._switched_at < self.hold_seconds:
+                return self.current
+
+            p95 = self._p95()
+            if self._level + 1 < len(self.variants) and (
+                queued >= self.queue_depth or (p95 is not None and p95 > self.p95_seconds)
+            ):
+                self._switch(self._level + 1, now, "down", queued, p95)
+            elif (
+                self._level > 0
+                and queued == 0
+                and p95 is not None
+                and p95 < self.recover_ratio * self.p95_seconds
+            ):
+                self._switch(self._level - 1, now, "up", queued, p95)
+            return self.current
+
+    def _p95(self):
+        if len(self._latencies) < MIN_ROUNDS:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _switch(self, level, now, direction, queued, p95):
+        previous = self.current
+        self._level = level
+        self._switched_at = now
+        self._latencies.clear()
+        self._active[previous].set(0)
+        self._active[self.current].set(1)
+        MODEL_VARIANT_SWITCHES[direction].inc()
+        p95_text = "-" if p95 is None else f"{1000 * p95:.0f} ms"
+        print(
+            f"🎚️ Model variant {previous} -> {self.current} "
+            f"(queue {queued}, p95 {p95_text})"
+        )
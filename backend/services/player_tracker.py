@@ -0,0 +1,70 @@
+"""
+Seating of the two players of a single-camera round
+
+Both players face the camera, one on each side of the frame. Sorting hands by
+x would swap them whenever a hand reaches across the middle or only one hand
+is in view, so each round tracks where every player's hand last was and hands
+each new hand to the nearest player. Sides are those of the uploaded image: a
+mirrored preview shows the left player on the right.
+"""
+import math
+
+PLAYERS = ("left", "right")
+SAME_PLAYER_DISTANCE = 0.25  # share of the frame diagonal a lone hand may move and stay with its player
+
+
+class PlayerTracker:
+    """Assigns the hands of each frame of one round to PLAYERS"""
+
+    def __init__(self):
+        self.centers = {}  # player -> (x, y) of the last hand's box center, normalized to the frame
+
+    def assign(self, boxes, frame_shape):
+        """
+        Player of each hand
+        Args:
+            boxes: (x_min, y_min, x_max, y_max) per hand, at most len(PLAYERS)
+            frame_shape: shape of the image the boxes are in
+        Returns:
+            list of player names, in the order of boxes
+        """
+        height, width = frame_shape[:2]
+        centers = [((x0 + x1) / 2 / width, (y0 + y1) / 2 / height) for x0, y0, x1, y1 in boxes]
+
+        if len(centers) == 2:
+            if len(self.centers) < 2:
+                known = next(iter(self.centers), None)
+                if known is None:
+                    # First sighting: seat by side of the frame
+                    players = list(PLAYERS) if centers[0][0] <= centers[1][0] else list(PLAYERS[::-1])
+                else:
+                    # The player already seen keeps the nearer hand
+                    other = PLAYERS[1 - PLAYERS.index(known)]
+                    nearer = min((0, 1), key=lambda i: self._distance(known, centers[i]))
+                    players = [known, other] if nearer == 0 else [other, known]
+            else:
+                kept = self._distance(PLAYERS[0], centers[0]) + self._distance(PLAYERS[1], centers[1])
+                swapped = self._distance(PLAYERS[0], centers[1]) + self._distance(PLAYERS[1], centers[0])
+                players = list(PLAYERS) if kept <= swapped else list(PLAYERS[::-1])
+        elif len(centers) == 1:
+            players = [self._assign_one(centers[0])]
+        else:
+            players = []
+
+        for player, center in zip(players, centers):
+            self.centers[player] = center
+        return players
+
+    def _assign_one(self, center):
+        if len(self.centers) == 2:
+            return min(PLAYERS, key=lambda player: self._distance(player, center))
+        known = next(iter(self.centers), None)
+        if known is not None:
+            if self._distance(known, center) <= SAME_PLAYER_DISTANCE:
+                return known
+            return PLAYERS[1 - PLAYERS.index(known)]
+        return PLAYERS[0] if center[0] < 0.5 else PLAYERS[1]
+
+    def _distance(self, player, center):
+        x, y = self.centers[player]
+        return math.hypot(x - center[0], y - center[1]) / math.sqrt(2)
@@ -1,75 +1,130 @@
-from collections import Counter, defaultdict
-import numpy as np
+from collections import deque
 from utils.config import Config
+from utils.memory import array_bytes
+from utils.metrics import (
+    FRAME_BUFFER_BYTES,
+    FRAME_BUFFER_FRAMES,
+    FRAMES_REJECTED_LOW_CONFIDENCE,
+)
 import time
 
 
-class PredictionPostprocessor:
+class _ClassWindow:
+    """Running vote state of one class inside the window"""
+
+    __slots__ = ("seqs", "score", "best")
+
     def __init__(self):
+        self.seqs = deque()  # sequence numbers of this class's frames, oldest first
+        self.score = 0.0  # sum of vote weights (decayed when recency weighting is on)
+        self.best = deque()  # sliding max: non-increasing confidence, equal ones kept oldest first
+
+
+class PredictionPostprocessor:
+    """
+    Sliding-window vote over accepted predictions
+
+    Counts, vote scores and the best frame per class are updated on insert and
+    eviction, so add_prediction and get_aggregated_result cost the same no matter
+    how large MAX_FRAMES_IN_WINDOW is.
+
+    Voting (Config.VOTE_WEIGHTING / VOTE_RECENCY_DECAY):
+        "count"       one vote per frame (majority vote)
+        "confidence"  each frame votes with its confidence
+        decay < 1.0   a frame's vote is multiplied by decay for every newer frame
+    """
+
+    def __init__(self, vote_weighting=None, recency_decay=None):
         self.confidence_threshold = Config.CONFIDENCE_THRESHOLD
-        self.frame_buffer = []
+        self.frame_buffer = deque()
+        self.buffer_bytes = 0  # image bytes kept alive by frame_buffer
         self.max_frames = Config.MAX_FRAMES_IN_WINDOW
+        self.last_final_reason = None  # 'frame_count' or 'timeout'
+        self.vote_weighting = vote_weighting or Config.VOTE_WEIGHTING
+        self.recency_decay = Config.VOTE_RECENCY_DECAY if recency_decay is None else recency_decay
+        self._classes = {}
+        self._next_seq = 0
 
     def add_prediction(self, prediction, confidence, frame_data):
         """Add a prediction to the buffer"""
-        print(f"📊 Adding prediction: {prediction} (confidence: {confidence:.3f})")
-        
-        if confidence >= self.confidence_threshold:
-            self.frame_buffer.append(
-                {
-                    "prediction": prediction,
-                    "confidence": confidence,
-                    "frame_data": frame_data,
-                    "timestamp": frame_data.get("timestamp"),
-                }
-            )
-            print(f"✅ Prediction added to buffer. Buffer size: {len(self.frame_buffer)}")
-        else:
+        if confidence < self.confidence_threshold:
+            FRAMES_REJECTED_LOW_CONFIDENCE.inc()
             print(f"❌ Prediction rejected (confidence {confidence:.3f} < threshold {self.confidence_threshold})")
+            return
+
+        nbytes = array_bytes(frame_data.get("original_image"), frame_data.get("roi"))
+        frame = {
+            "prediction": prediction,
+            "confidence": confidence,
+            "frame_data": frame_data,
+            "timestamp": frame_data.get("timestamp"),
+            "nbytes": nbytes,
+            "seq": self._next_seq,
+            "weight": confidence if self.vote_weighting == "confidence" else 1.0,
+        }
+        self._next_seq += 1
+        self.frame_buffer.append(frame)
+        self.buffer_bytes += nbytes
+        FRAME_BUFFER_FRAMES.inc()
+        FRAME_BUFFER_BYTES.inc(nbytes)
+
+        # Older votes fade by one step (a constant number of classes)
+        if self.recency_decay != 1.0:
+            for window in self._classes.values():
+                window.score *= self.recency_decay
+
+        window = self._classes.get(prediction)
+        if window is None:
+            window = self._classes[prediction] = _ClassWindow()
+        window.seqs.append(frame["seq"])
+        window.score += frame["weight"]
+        while window.best and window.best[-1]["confidence"] < confidence:
+            window.best.pop()
+        window.best.append(frame)
+        print(f"✅ {prediction} ({confidence:.3f}) added to buffer. Buffer size: {len(self.frame_buffer)}")
 
         # Keep only recent frames
         if len(self.frame_buffer) > self.max_frames:
-            self.frame_buffer.pop(0)
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        frame = self.frame_buffer.popleft()
+        self.buffer_bytes -= frame["nbytes"]
+        FRAME_BUFFER_FRAMES.dec()
+        FRAME_BUFFER_BYTES.dec(frame["nbytes"])
+
+        window = self._classes[frame["prediction"]]
+        window.seqs.popleft()
+        age = self._next_seq - 1 - frame["seq"]
+        window.score -= frame["weight"] * self.recency_decay ** age
+        if window.best and window.best[0] is frame:
+            window.best.popleft()
+        if not window.seqs:
+            del self._classes[frame["prediction"]]
 
     def get_aggregated_result(self):
         """
         Aggregate predictions over the time window
-        Returns the most common prediction and the frame with highest confidence
+        Returns the winning prediction and the frame with highest confidence for it
         """
         if not self.frame_buffer:
             return None, None
 
-        # Count predictions
-        prediction_counts = Counter(
-            [frame["prediction"] for frame in self.frame_buffer]
-        )
-
-        # Get most common prediction
-        # get this n=1 means top 1 most common  eg. [('rock', 3)]
-        most_common_prediction = prediction_counts.most_common(1)[0][0]
-
-        # Find frame with highest confidence for the most common prediction
-        best_frame = max(
-            [
-                frame
-                for frame in self.frame_buffer
-                if frame["prediction"] == most_common_prediction
-            ],
-            key=lambda x: x["confidence"],
-        )
+        # Highest vote score wins; ties go to the class seen first in the window
+        ordered = sorted(self._classes.items(), key=lambda item: item[1].seqs[0])
+        most_common_prediction, winner = max(ordered, key=lambda item: item[1].score)
+        best_frame = winner.best[0]
 
         # Calculate aggregation stats
         total_frames = len(self.frame_buffer)
-        prediction_percentage = (
-            prediction_counts[most_common_prediction] / total_frames
-        ) * 100
+        prediction_percentage = (len(winner.seqs) / total_frames) * 100
 
         result = {
             "final_prediction": most_common_prediction,
             "confidence": best_frame["confidence"],
             "frame_count": total_frames,
             "prediction_percentage": prediction_percentage,
-            "all_predictions": dict(prediction_counts),
+            "all_predictions": {name: len(window.seqs) for name, window in ordered},
             "best_frame": best_frame,
         }
 
@@ -77,43 +132,78 @@ class PredictionPostprocessor:
 
     def clear_buffer(self):
         """Clear the prediction buffer"""
+        FRAME_BUFFER_FRAMES.dec(len(self.frame_buffer))
+        FRAME_BUFFER_BYTES.dec(self.buffer_bytes)
         self.frame_buffer.clear()
+        self.buffer_bytes = 0
+        self._classes.clear()
 
     def should_send_final_result(self):
         """Check if we have enough frames OR timeout reached"""
+        if not self.frame_buffer:
+            return False
+
         has_enough_frames = len(self.frame_buffer) >= self.max_frames * 0.8
-        
-        print(f"🔍 Checking final result criteria:")
-        print(f"   Buffer size: {len(self.frame_buffer)}/{self.max_frames}")
-        print(f"   Has enough frames: {has_enough_frames} (need {self.max_frames * 0.8})")
-
-        if self.frame_buffer:
-            # Use current time vs first frame time
-            oldest_frame_time = self.frame_buffer[0]["timestamp"]
-            if oldest_frame_time is None:
-                print(f"   No timestamp on oldest frame, using frame count only")
-                return has_enough_frames
-
-            try:
-                current_time = time.time()
-                time_elapsed = current_time - oldest_frame_time
-                # More generous timeout - frames come over 2 seconds
-                has_timeout = time_elapsed >= 3.0  # 3 seconds from first frame
-
-                # Need at least 3 frames AND either enough frames OR timeout
-                min_frames_met = len(self.frame_buffer) >= 3
-                
-                print(f"   Time elapsed: {time_elapsed:.1f}s (timeout at 3.0s)")
-                print(f"   Has timeout: {has_timeout}")
-                print(f"   Min frames met: {min_frames_met} (need 3)")
-                
-                result = has_enough_frames or (min_frames_met and has_timeout)
-                print(f"   Should send final: {result}")
-
-                return result
-            except (TypeError, ValueError) as e:
-                print(f"   Timestamp error: {e}, using frame count only")
-                return has_enough_frames
-        
-        print(f"   No frames in buffer")
-        return False
+
+        # Server monotonic clock vs when the oldest buffered frame was processed
+        oldest_frame_time = self.frame_buffer[0]["timestamp"]
+        if oldest_frame_time is None:
+            return self._final_decision(has_enough_frames, False)
+        time_elapsed = time.monotonic() - oldest_frame_time
+
+        # More generous timeout - frames come over 2 seconds
+        has_timeout = time_elapsed >= 3.0  # 3 seconds from first frame
+
+        # Need at least 3 frames AND either enough frames OR timeout
+        min_frames_met = len(self.frame_buffer) >= 3
+
+        return self._final_decision(has_enough_frames, min_frames_met and has_timeout)
+
+    def _final_decision(self, has_enough_frames, has_timed_out):
+        """Record why the round ended (for metrics) and return the decision"""
+        if has_enough_frames:
+            self.last_final_reason = "frame_count"
+        elif has_timed_out:
+            self.last_final_reason = "timeout"
+        else:
+            return False
+        print(f"🎯 Final result due ({self.last_final_reason}): {len(self.frame_buffer)}/{self.max_frames} frames")
+        return True
+
+
+class PlayerVotes:
+    """
+    Votes of a two-player round: one PredictionPostprocessor per player, fed
+    with the hands PlayerTracker assigned to them. The round is settled once
+    every player's vote is.
+    """
+
+    def __init__(self, players):
+        self.players = {player: PredictionPostprocessor() for player in players}
+        self.last_final_reason = None
+
+    def __getitem__(self, player):
+        return self.players[player]
+
+    def items(self):
+        return self.players.items()
+
+    @property
+    def frame_buffer(self):
+        """Buffered frames of all players (for sizes)"""
+        return [frame for votes in self.players.values() for frame in votes.frame_buffer]
+
+    def add_prediction(self, player, prediction, confidence, frame_data):
+        self.players[player].add_prediction(prediction, confidence, frame_data)
+
+    def should_send_final_result(self):
+        settled = all(votes.should_send_final_result() for votes in self.players.values())
+        if settled:
+            # The reason of the vote that took longest
+            reasons = {votes.last_final_reason for votes in self.players.values()}
+            self.last_final_reason = "timeout" if "timeout" in reasons else "frame_count"
+        return settled
+
+    def clear_buffer(self):
+        for votes in self.players.values():
+            votes.clear_buffer()
@@ -1,23 +1,22 @@
-import cv2
 import numpy as np
 from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
 from utils.config import Config
+from utils.image_utils import resize_roi_for_model
 
 
 class ImagePreprocessor:
-    def __init__(self):
-        self.input_size = Config.MODEL_INPUT_SIZE
+    def __init__(self, input_size=None):
+        self.input_size = tuple(input_size or Config.MODEL_INPUT_SIZE)  # (width, height)
 
-    def preprocess_for_model(self, roi_image):
+    def preprocess_for_model(self, roi_image, input_size=None):
         """
         Preprocess hand ROI for MobileNetV2 model
+        (at input_size (width, height) for a model variant, default self.input_size)
         """
         try:
-            # Resize to model input size
-            resized = cv2.resize(roi_image, self.input_size)
-
-            # Convert BGR to RGB (MobileNetV2 expects RGB)
-            rgb_image = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+            # Resize to model input size and convert BGR to RGB (MobileNetV2
+            # expects RGB); the ROI dataset cache stores exactly this
+            rgb_image = resize_roi_for_model(roi_image, input_size or self.input_size)
 
             # Expand dimensions for batch processing
             img_array = np.expand_dims(rgb_image, axis=0)   #✅ Model expects input shape of (1, H, W, 3)
@@ -30,3 +29,17 @@ class ImagePreprocessor:
         except Exception as e:
             print(f"Preprocessing error: {str(e)}")
             return None
+
+    def preprocess_batch_for_model(self, roi_images, input_size=None):
+        """
+        preprocess_for_model() for several hand ROIs as one (N, H, W, 3) batch,
+        for a single forward pass over all of them
+        """
+        try:
+            size = input_size or self.input_size
+            batch = np.stack([resize_roi_for_model(roi, size) for roi in roi_images])
+            return preprocess_input(batch.astype(np.float32))
+
+        except Exception as e:
+            print(f"Preprocessing error: {str(e)}")
+            return None
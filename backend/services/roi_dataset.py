@@ -0,0 +1,219 @@
+"""
+Precomputed hand-ROI dataset for retraining
+
+A dataset directory holds the crops that serving would feed the model for
+every usable image of a raw dataset (tools/build_roi_dataset.py runs the same
+HandDetector + extract_hand_roi + resize_roi_for_model path), so training
+reads fixed-size uint8 arrays instead of decoding and cropping JPEGs every
+epoch:
+    rois.u8         N x H x W x 3 uint8 RGB, raw C-order (memory-mapped)
+    labels.npy      N uint8 class indices into Config.CLASSES
+    landmarks.npy   N x 21 x 3 float32, x/y normalized to the ROI (like
+                    client-side detection sends them), z as MediaPipe gives it
+    bboxes.npy      N x 4 int32 ROI box in the source image
+    index.json      shape, classes, source path per row, skipped images by
+                    hand detection status, build settings
+
+make_tf_dataset() turns a directory into a tf.data pipeline of
+(MobileNetV2-normalized float32 batch, one-hot labels), optionally resized
+for a smaller model and with a teacher's soft labels for distillation
+(services/distillation.py).
+"""
+import json
+import os
+import time
+import numpy as np
+
+VERSION = 1
+ROIS_FILE = "rois.u8"
+INDEX_FILE = "index.json"
+
+
+class RoiDatasetWriter:
+    """Appends ROIs to a dataset directory; the dataset is complete after close()"""
+
+    def __init__(self, directory, classes, size, source=None, settings=None):
+        self.directory = directory
+        self.classes = list(classes)
+        self.size = tuple(size)  # (width, height), as cv2.resize takes it
+        self.source = source
+        self.settings = settings or {}
+        self._labels = []
+        self._landmarks = []
+        self._bboxes = []
+        self._paths = []
+        self._skipped = {}
+        os.makedirs(directory, exist_ok=True)
+        self._rois_tmp = os.path.join(directory, f"{ROIS_FILE}.{os.getpid()}.tmp")
+        self._rois = open(self._rois_tmp, "wb")
+
+    def __len__(self):
+        return len(self._labels)
+
+    def add(self, roi_rgb, label, landmarks, bbox, path):
+        """One usable image: its model-sized RGB crop, class index, ROI landmarks and box"""
+        width, height = self.size
+        if roi_rgb.shape != (height, width, 3) or roi_rgb.dtype != np.uint8:
+            raise ValueError(f"ROI of {path} is {roi_rgb.shape} {roi_rgb.dtype}, expected uint8 {height}x{width}x3")
+        self._rois.write(np.ascontiguousarray(roi_rgb).tobytes())
+        self._labels.append(label)
+        self._landmarks.append(landmarks)
+        self._bboxes.append(bbox)
+        self._paths.append(path)
+
+    def skip(self, path, status):
+        """An image the serving pipeline would not classify (no_hands, invalid, ...)"""
+        self._skipped.setdefault(status, []).append(path)
+
+    def close(self):
+        """Write the small arrays and the index, and move the ROI file into place"""
+        self._rois.close()
+        width, height = self.size
+        count = len(self._labels)
+        np.save(os.path.join(self.directory, "labels.npy"), np.asarray(self._labels, dtype=np.uint8))
+        np.save(
+            os.path.join(self.directory, "landmarks.npy"),
+            np.asarray(self._landmarks, dtype=np.float32).reshape(count, 21, 3),
+        )
+        np.save(
+            os.path.join(self.directory, "bboxes.npy"),
+            np.asarray(self._bboxes, dtype=np.int32).reshape(count, 4),
+        )
+        os.replace(self._rois_tmp, os.path.join(self.directory, ROIS_FILE))
+
+        per_class = np.bincount(np.asarray(self._labels, dtype=np.int64), minlength=len(self.classes))
+        index = {
+            "version": VERSION,
+            "built_at": time.time(),
+            "source": self.source,
+            "classes": self.classes,
+            "shape": [count, height, width, 3],
+            "counts": {name: int(n) for name, n in zip(self.classes, per_class)},
+            "skipped": self._skipped,
+            "settings": self.settings,
+            "paths": self._paths,
+        }
+        with open(os.path.join(self.directory, INDEX_FILE), "w") as f:
+            json.dump(index, f)
+        return index
+
+
+class RoiDataset:
+    """Read-only view of a dataset directory; `rois` is memory-mapped"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        if self.index.get("version") != VERSION:
+            raise ValueError(f"{directory}: unsupported ROI dataset version {self.index.get('version')}")
+        self.classes = self.index["classes"]
+        shape = tuple(self.index["shape"])
+        # np.memmap refuses empty files
+        self.rois = (
+            np.memmap(os.path.join(directory, ROIS_FILE), dtype=np.uint8, mode="r", shape=shape)
+            if shape[0]
+            else np.zeros(shape, dtype=np.uint8)
+        )
+        self.labels = np.load(os.path.join(directory, "labels.npy"))
+        self.landmarks = np.load(os.path.join(directory, "landmarks.npy"), mmap_mode="r")
+        self.bboxes = np.load(os.path.join(directory, "bboxes.npy"))
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def make_tf_dataset(
+    directory,
+    batch_size=32,
+    shuffle=True,
+    augment=False,
+    cache=None,
+    seed=None,
+    shuffle_buffer=4096,
+    read_batch=256,
+    size=None,
+    soft_labels=None,
+):
+    """
+    tf.data pipeline over a ROI dataset directory
+    Args:
+        shuffle (bool): shuffle every epoch (through a buffer of shuffle_buffer ROIs)
+        augment (bool): random flip/rotation/shift/zoom like the training
+            notebooks' ImageDataGenerator
+        cache: None, "memory" to keep the uint8 ROIs in RAM after the first
+            epoch, or a file path for tf.data's on-disk cache
+        read_batch (int): ROIs per sequential read from the memory map
+        size: (width, height) to resize the cached crops to, for a model with
+            a smaller input (None keeps the cached size)
+        soft_labels: N x classes float32 array, row-aligned with the dataset
+            (e.g. teacher probabilities); appended to each one-hot label row
+    Returns:
+        tf.data.Dataset of (float32 [batch, H, W, 3] after MobileNetV2
+        preprocess_input, float32 [batch, classes] one-hot labels, or
+        [batch, 2 * classes] one-hot + soft labels)
+    """
+    import tensorflow as tf
+    from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
+
+    dataset = RoiDataset(directory)
+    count = len(dataset)
+    _, height, width, _ = dataset.index["shape"]
+    num_classes = len(dataset.classes)
+    if soft_labels is not None:
+        if len(soft_labels) != count:
+            raise ValueError(f"{len(soft_labels)} soft labels for {count} ROIs in {directory}")
+        soft_labels = np.asarray(soft_labels, dtype=np.float32)
+    outputs = (tf.uint8, tf.uint8) if soft_labels is None else (tf.uint8, tf.uint8, tf.float32)
+
+    def read(start):
+        # Contiguous slices keep the reads from the memory map sequential
+        stop = min(start + read_batch, count)
+        arrays = (np.asarray(dataset.rois[start:stop]), dataset.labels[start:stop])
+        return arrays if soft_labels is None else arrays + (soft_labels[start:stop],)
+
+    def read_op(start):
+        rois, labels, *soft = tf.numpy_function(read, [start], outputs)
+        rois.set_shape([None, height, width, 3])
+        labels.set_shape([None])
+        targets = tf.one_hot(tf.cast(labels, tf.int32), num_classes)
+        if soft:
+            soft[0].set_shape([None, soft_labels.shape[1]])
+            targets = tf.concat([targets, soft[0]], axis=-1)
+        return rois, targets
+
+    ds = tf.data.Dataset.range(0, count, read_batch)
+    ds = ds.map(read_op, num_parallel_calls=tf.data.AUTOTUNE).unbatch()
+    if cache:
+        ds = ds.cache("" if cache == "memory" else cache)
+    if shuffle:
+        ds = ds.shuffle(min(shuffle_buffer, max(count, 1)), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+
+    if size is not None and tuple(size) != (width, height):
+        # Serving resizes the original crop straight to the model input; this
+        # resizes the cached one, which is close enough for training
+        ds = ds.map(
+            lambda rois, labels: (tf.image.resize(rois, (size[1], size[0])), labels),
+            num_parallel_calls=tf.data.AUTOTUNE,
+        )
+
+    if augment:
+        augmentation = tf.keras.Sequential(
+            [
+                tf.keras.layers.RandomFlip("horizontal", seed=seed),
+                tf.keras.layers.RandomRotation(20 / 360, fill_mode="nearest", seed=seed),
+                tf.keras.layers.RandomTranslation(0.2, 0.2, fill_mode="nearest", seed=seed),
+                tf.keras.layers.RandomZoom(0.2, fill_mode="nearest", seed=seed),
+            ]
+        )
+        ds = ds.map(
+            lambda rois, labels: (augmentation(tf.cast(rois, tf.float32), training=True), labels),
+            num_parallel_calls=tf.data.AUTOTUNE,
+        )
+
+    ds = ds.map(
+        lambda rois, labels: (preprocess_input(tf.cast(rois, tf.float32)), labels),
+        num_parallel_calls=tf.data.AUTOTUNE,
+    )
+    return ds.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,393 @@
+import math
+import time
+from collections import deque
+from services.player_tracker import PLAYERS, PlayerTracker
+from services.postprocessor import PlayerVotes
+from utils.admission import Overloaded
+from utils.config import Config
+from utils.metrics import REQUESTS_SHED, ROUND_END_REASONS, ROUND_SECONDS
+from utils.tracing import NULL_TRACE, stage
+
+FRAME_COST_SMOOTHING = 0.2  # EWMA weight of the newest per-frame processing time
+
+
+def coverage_order(count):
+    """
+    Frame indices in order of priority for a round that cannot process them
+    all: newest first (players show their throw at the end of the capture),
+    then the middle of the largest remaining gap, so a round cut short by its
+    deadline still spans the whole window
+    e.g. 8 frames -> [7, 3, 5, 1, 6, 4, 2, 0]
+    """
+    if count <= 0:
+        return []
+    order = [count - 1]
+    gaps = deque([(0, count - 2)])
+    while gaps:
+        low, high = gaps.popleft()
+        if low > high:
+            continue
+        middle = (low + high + 1) // 2
+        order.append(middle)
+        gaps.append((middle + 1, high))
+        gaps.append((low, middle - 1))
+    return order
+
+
+def is_two_player(game_data, roi_input=False):
+    """
+    The round has two players in front of one camera (gameData.players == 2)
+    Client-cropped ROIs hold a single hand, so ROI rounds are always one player
+    """
+    return not roi_input and str((game_data or {}).get("players", 1)) == "2"
+
+
+def new_round_state(game_data, roi_input, postprocessor, overlay_mode=None, model_variant=None):
+    """
+    RoundState for a round of game_data: voting into `postprocessor`, or for a
+    two-player round into fresh per-player votes with their own PlayerTracker
+    """
+    if is_two_player(game_data, roi_input):
+        return RoundState(PlayerVotes(PLAYERS), overlay_mode, model_variant, tracker=PlayerTracker())
+    return RoundState(postprocessor, overlay_mode, model_variant)
+
+
+class RoundState:
+    """
+    Progress of one round between calls: the vote buffer and frame counters
+    A one-shot round lives for a single process_round(); a round session keeps
+    its state across chunk uploads
+    """
+
+    def __init__(self, postprocessor, overlay_mode=None, model_variant=None, tracker=None):
+        self.postprocessor = postprocessor  # PlayerVotes in a two-player round
+        self.tracker = tracker  # PlayerTracker of a two-player round, None for one player
+        self.overlay_mode = overlay_mode  # final result image, None = Config.RESULT_OVERLAY
+        self.model_variant = model_variant  # see ModelInference.load_variants, None = the loaded model
+        self.frames_received = 0
+        self.processed_count = 0
+        self.attempted_count = 0
+        self.last_real_time_result = None
+        self.last_player_results = {}  # two-player rounds: latest real-time result per player
+        self.final_result = None
+        self.end_reason = None
+        self.truncated = False
+        self.processing_seconds = 0.0
+
+    @property
+    def done(self):
+        """The vote has already produced a final result; more frames are ignored"""
+        return self.final_result is not None
+
+
+class RoundProcessor:
+    """
+    Runs the frames of one round through the FrameProcessor and plays the round
+    Shared by /process-frames, round sessions and the offline tools (replay, benchmarks)
+    """
+
+    def __init__(self, frame_processor, game_engine):
+        self.frame_processor = frame_processor
+        self.game_engine = game_engine
+        # Running estimate of one frame's processing time, for deadline checks
+        self.frame_seconds = Config.FRAME_COST_ESTIMATE
+        # How the last round ended and how many of its frames it went through
+        self.last_end_reason = None
+        self.last_frames_used = 0
+
+    def process_round(
+        self,
+        frames,
+        game_data,
+        decode,
+        trace=None,
+        deadline=None,
+        roi_input=False,
+        frame_details=None,
+        overlay_mode=None,
+        model_variant=None,
+    ):
+        """
+        Process a round
+        Args:
+            frames: iterable of (frame_id, timestamp, payload) in capture order
+            game_data (dict): round metadata sent by the frontend
+            decode: turns a payload into a BGR image (None on failure)
+            trace: optional RoundTrace
+            deadline (float): time.monotonic() by which to answer; when not
+                all frames fit, the ones first in coverage_order() are kept
+                (still processed in capture order) and the round answers with
+                the best result so far (deadline_truncated)
+            roi_input (bool): payloads are hand ROIs cropped by the client, so
+                hand detection and ROI extraction are skipped
+            frame_details (dict): optional extra metadata per frame_id
+                (e.g. client-side landmarks)
+            overlay_mode (str): final result image, 'full', 'thumbnail' or
+                'none' (defaults to Config.RESULT_OVERLAY)
+            model_variant (str): model variant to classify with (see
+                services/model_variants.py), None for the loaded model
+        Returns:
+            dict: response body for the round
+        """
+        # Clear frame processor buffer for fresh start
+        self.frame_processor.postprocessor.clear_buffer()
+        state = new_round_state(
+            game_data, roi_input, self.frame_processor.postprocessor, overlay_mode, model_variant
+        )
+        self.process_frames(
+            state, frames, game_data, decode, trace, deadline, roi_input, frame_details
+        )
+        return self.finish_round(state, trace)
+
+    def process_frames(
+        self, state, frames, game_data, decode, trace=None, deadline=None, roi_input=False, frame_details=None
+    ):
+        """
+        Run frames through the pipeline into `state` in capture order (the
+        order given) until they run out, the vote produces a final result or
+        the deadline is near (see _scheduled)
+        """
+        trace = trace or NULL_TRACE
+        frame_processor = self.frame_processor
+        started = time.perf_counter()
+        state.frames_received += len(frames)
+        # A finalize retried after running out of time gets a fresh deadline
+        state.truncated = False
+
+        for frame_id, timestamp, payload in self._scheduled(state, list(frames), deadline):
+            if state.done:
+                break
+            frame_started = time.monotonic()
+            state.attempted_count += 1
+
+            with trace.span("frame", frameId=frame_id):
+                # Decode frame
+                with stage(trace, "decode"):
+                    image = decode(payload)
+                if image is None:
+                    continue
+
+                # Add frame metadata
+                frame_metadata = {
+                    **game_data,
+                    "timestamp": timestamp,
+                    "frameId": frame_id,
+                }
+                if frame_details and frame_id in frame_details:
+                    frame_metadata.update(frame_details[frame_id])
+
+                # Process frame
+                if state.tracker is not None:
+                    status, real_time_result, should_send_final, final_result = (
+                        frame_processor.process_players(
+                            image,
+                            state.postprocessor,
+                            state.tracker,
+                            frame_metadata=frame_metadata,
+                            trace=trace,
+                            overlay_mode=state.overlay_mode,
+                            variant=state.model_variant,
+                        )
+                    )
+                else:
+                    process = frame_processor.process_roi if roi_input else frame_processor.process_frame
+                    status, real_time_result, should_send_final, final_result = process(
+                        image,
+                        frame_metadata=frame_metadata,
+                        trace=trace,
+                        postprocessor=state.postprocessor,
+                        overlay_mode=state.overlay_mode,
+                        variant=state.model_variant,
+                    )
+            self.frame_seconds += FRAME_COST_SMOOTHING * (
+                time.monotonic() - frame_started - self.frame_seconds
+            )
+
+            if status == "success":
+                state.processed_count += 1
+                state.last_real_time_result = real_time_result
+                state.last_player_results.update(real_time_result.get("players", {}))
+
+                # If we have a final result, use it
+                if should_send_final and final_result:
+                    state.final_result = final_result
+                    state.end_reason = state.postprocessor.last_final_reason
+                    print(f"✅ Final result ready after {state.processed_count} frames")
+
+        state.processing_seconds += time.perf_counter() - started
+        return state
+
+    def _scheduled(self, state, frames, deadline):
+        """
+        Frames to process, always in capture order: the vote's recency decay
+        weighs frames by the order they arrive in, so the newest frame must
+        also be the last one voted. With a deadline, whenever the frames left
+        no longer fit (at the running per-frame cost) only the ones first in
+        coverage_order() are kept, and state.truncated is set
+        """
+        if deadline is None:
+            yield from frames
+            return
+        priority = {index: rank for rank, index in enumerate(coverage_order(len(frames)))}
+        pending = list(range(len(frames)))
+        while pending:
+            fits = int((deadline - time.monotonic()) / self.frame_seconds)
+            if fits < len(pending):
+                state.truncated = True
+                if fits <= 0:
+                    return
+                pending = sorted(sorted(pending, key=priority.get)[:fits])
+            yield frames[pending.pop(0)]
+
+    def finish_round(self, state, trace=None):
+        """
+        Play the round from `state`: the vote's final result, else the best
+        aggregated answer so far, else the last single-frame prediction
+        Returns:
+            dict: response body for the round
+        Raises:
+            Overloaded: the deadline came before a single frame went through;
+                the server was too busy to play the round, which must not
+                cost the player a timeout loss
+        """
+        trace = trace or NULL_TRACE
+        frame_processor = self.frame_processor
+        started = time.perf_counter()
+        final_result = state.final_result
+        end_reason = state.end_reason
+        truncated = state.truncated
+        processed_count = state.processed_count
+        last_real_time_result = state.last_real_time_result
+
+        if truncated:
+            print(
+                f"⏱️ Round deadline reached after {state.attempted_count}/{state.frames_received} frames "
+                f"(~{1000 * self.frame_seconds:.0f} ms per frame)"
+            )
+            end_reason = "deadline"
+            if processed_count == 0:
+                self._shed_round(state, started)
+        elif not final_result:
+            end_reason = "exhausted"
+
+        # Out of time or frames: best aggregated answer so far
+        if not final_result and state.postprocessor.frame_buffer:
+            if state.tracker is not None:
+                final_result = frame_processor.finalize_players(
+                    trace, votes=state.postprocessor, overlay_mode=state.overlay_mode
+                )
+            else:
+                final_result = frame_processor.finalize(
+                    trace, postprocessor=state.postprocessor, overlay_mode=state.overlay_mode
+                )
+
+        if state.tracker is not None:
+            result = self._play_two_player_round(state, trace, final_result)
+            if result["status"] == "no_detection":
+                end_reason = "no_detection"
+
+        elif final_result:
+            player_move = final_result["final_prediction"]
+            with trace.span("game_engine"):
+                game_result = self.game_engine.play_round(player_move)
+            final_result["game_result"] = game_result
+            result = final_result
+
+        # Frames went through but none passed the confidence threshold
+        elif last_real_time_result:
+            print(f"📤 Returning last real-time result after {processed_count} frames")
+            player_move = last_real_time_result.get("prediction", "timeout")
+            with trace.span("game_engine"):
+                game_result = self.game_engine.play_round(player_move)
+
+            result = {
+                "status": "success",
+                "final_prediction": player_move,
+                "confidence": last_real_time_result.get("confidence", 0.0),
+                "detected_hand": last_real_time_result.get("detected_hand", False),
+                "game_result": game_result,
+                "timestamp": time.time(),
+                "processed_frames": processed_count,
+            }
+
+        # No valid frames processed
+        else:
+            print("❌ No valid frames could be processed")
+            game_result = self.game_engine.play_round("timeout")
+            end_reason = "no_detection"
+
+            result = {
+                "status": "no_detection",
+                "final_prediction": "timeout",
+                "confidence": 0.0,
+                "detected_hand": False,
+                "game_result": game_result,
+                "timestamp": time.time(),
+                "processed_frames": 0,
+            }
+
+        result["deadline_truncated"] = truncated
+        result["model_variant"] = (
+            state.model_variant or frame_processor.model_inference.primary_variant
+        )
+        if truncated:
+            result["skipped_frames"] = state.frames_received - state.attempted_count
+        state.end_reason = end_reason
+        self.last_end_reason = end_reason
+        self.last_frames_used = state.attempted_count
+        ROUND_END_REASONS[end_reason].inc()
+        ROUND_SECONDS.observe(state.processing_seconds + time.perf_counter() - started)
+        return result
+
+    def _shed_round(self, state, started):
+        """Account for a round that ran out of time with nothing processed, then refuse it"""
+        state.end_reason = self.last_end_reason = "deadline"
+        self.last_frames_used = state.attempted_count
+        ROUND_END_REASONS["deadline"].inc()
+        ROUND_SECONDS.observe(state.processing_seconds + time.perf_counter() - started)
+        REQUESTS_SHED.labels(reason="deadline").inc()
+        # Roughly the time this round's frames take once the backlog is gone
+        raise Overloaded("deadline", max(1, math.ceil(state.frames_received * self.frame_seconds)))
+
+    def _play_two_player_round(self, state, trace, final_result):
+        """
+        Result of a two-player round: per player, their vote's final result,
+        else their last single-frame prediction, else a timeout
+        """
+        players = {}
+        for player in PLAYERS:
+            player_result = (final_result or {}).get("players", {}).get(player)
+            last_result = state.last_player_results.get(player)
+            if player_result:
+                players[player] = player_result
+            elif last_result:
+                players[player] = {
+                    "status": "success",
+                    "final_prediction": last_result["prediction"],
+                    "confidence": last_result["confidence"],
+                    "bbox": last_result["bbox"],
+                }
+            else:
+                players[player] = {"status": "no_detection", "final_prediction": "timeout", "confidence": 0.0}
+
+        with trace.span("game_engine"):
+            game_result = self.game_engine.play_two_player_round(
+                *(players[player]["final_prediction"] for player in PLAYERS)
+            )
+
+        if final_result:
+            status = "final_result"
+        elif state.last_player_results:
+            print(f"📤 Returning last real-time results after {state.processed_count} frames")
+            status = "success"
+        else:
+            print("❌ No valid frames could be processed")
+            status = "no_detection"
+
+        return {
+            "status": status,
+            "players": players,
+            "game_result": game_result,
+            "timestamp": time.time(),
+            "processed_frames": state.processed_count,
+        }
@@ -0,0 +1,208 @@
+"""
+Compact on-disk recordings of /process-frames rounds
+
+One round per .rpsr file:
+    header   b"RPSR" + u16 version + u16 reserved
+    frames   the raw JPEG bytes of every frame, concatenated as received
+    index    JSON: round_id, recorded_at, gameData, result, input ("frame",
+             or "roi" for client-cropped hand ROIs) and, per frame,
+             offset/length into the file, timestamp and frameId
+    footer   u64 index offset + u32 index length + b"RPSR"
+
+Frames are never re-encoded, so a recording replays bit-identical input.
+RoundRecorder writes from a background thread; RoundRecording memory-maps a
+file and hands out zero-copy views of each JPEG.
+"""
+import json
+import mmap
+import os
+import queue
+import random
+import struct
+import threading
+import time
+from datetime import datetime
+from utils.validation import path_under
+
+MAGIC = b"RPSR"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+FOOTER = struct.Struct("<QI4s")
+EXTENSION = ".rpsr"
+
+# Result fields kept in the index (overlay images are dropped)
+RESULT_FIELDS = ("status", "final_prediction", "confidence", "detected_hand", "processed_frames")
+
+
+class RoundRecorder:
+    """Queues finished rounds and writes them to `directory` off the request thread"""
+
+    def __init__(self, directory, sample_rate=1.0, queue_size=64):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._writer_pid = None
+        self._lock = threading.Lock()
+
+    def should_record(self):
+        """Sampling decision for the next round"""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, round_id, frames, game_data, result=None, input_kind="frame"):
+        """
+        Hand a round to the writer thread; never blocks the request
+        Args:
+            round_id (str): file name stem
+            frames: list of (frame_id, timestamp, jpeg_bytes)
+            game_data (dict): round metadata
+            result (dict): response body, summarized into the index
+            input_kind (str): "frame" for full frames, "roi" for client-cropped ROIs
+        Returns:
+            bool: False when the queue is full and the round was dropped
+        """
+        self._ensure_writer()
+        summary = {k: result[k] for k in RESULT_FIELDS if result and k in result}
+        try:
+            self._queue.put_nowait((round_id, frames, game_data, summary, input_kind, time.time()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            print(f"⚠️ Recorder queue full, dropped round {round_id}")
+            return False
+
+    def flush(self):
+        """Wait until every queued round is on disk"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _ensure_writer(self):
+        # Threads do not survive fork, so start one lazily in each worker
+        with self._lock:
+            if self._writer is None or self._writer_pid != os.getpid() or not self._writer.is_alive():
+                self._writer_pid = os.getpid()
+                self._writer = threading.Thread(target=self._run, name="round-recorder", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        while True:
+            round_id, frames, game_data, summary, input_kind, recorded_at = self._queue.get()
+            try:
+                path = write_recording(
+                    self._path_for(round_id, recorded_at),
+                    round_id,
+                    frames,
+                    game_data,
+                    summary,
+                    recorded_at,
+                    input_kind,
+                )
+                self.written += 1
+                print(f"💾 Round recorded to {path}")
+            except Exception as e:
+                print(f"❌ Error recording round {round_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _path_for(self, round_id, recorded_at):
+        day = datetime.fromtimestamp(recorded_at).strftime("%Y%m%d")
+        return path_under(self.directory, day, f"round-{round_id}{EXTENSION}")
+
+
+def write_recording(path, round_id, frames, game_data, result=None, recorded_at=None, input_kind="frame"):
+    """Write one round file atomically (temp file + rename) and return its path"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    entries = []
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0))
+        offset = HEADER.size
+        for frame_id, timestamp, jpeg in frames:
+            f.write(jpeg)
+            entries.append(
+                {"offset": offset, "length": len(jpeg), "timestamp": timestamp, "frameId": frame_id}
+            )
+            offset += len(jpeg)
+        index = json.dumps(
+            {
+                "round_id": round_id,
+                "recorded_at": recorded_at or time.time(),
+                "gameData": game_data,
+                "result": result or {},
+                "input": input_kind,
+                "frames": entries,
+            }
+        ).encode("utf-8")
+        f.write(index)
+        f.write(FOOTER.pack(offset, len(index), MAGIC))
+    os.replace(tmp_path, path)
+    return path
+
+
+class RoundRecording:
+    """Read-only, memory-mapped view of one .rpsr file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size + FOOTER.size:
+            self._mmap.close()
+            raise ValueError(f"{path} is too short to be a round recording")
+        magic, version, _ = HEADER.unpack_from(self._mmap, 0)
+        index_offset, index_length, end_magic = FOOTER.unpack_from(self._mmap, len(self._mmap) - FOOTER.size)
+        if magic != MAGIC or end_magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {VERSION} round recording")
+        self.index = json.loads(self._mmap[index_offset:index_offset + index_length])
+
+    @property
+    def round_id(self):
+        return self.index["round_id"]
+
+    @property
+    def game_data(self):
+        return self.index.get("gameData", {})
+
+    @property
+    def result(self):
+        return self.index.get("result", {})
+
+    @property
+    def input_kind(self):
+        """"frame" (full camera frames) or "roi" (client-cropped hand ROIs)"""
+        return self.index.get("input", "frame")
+
+    def frames(self):
+        """
+        Frames as (frame_id, timestamp, memoryview of the JPEG bytes)
+        The views point into the mapping; release them before close()
+        """
+        view = memoryview(self._mmap)
+        return [
+            (entry["frameId"], entry["timestamp"], view[entry["offset"]:entry["offset"] + entry["length"]])
+            for entry in self.index["frames"]
+        ]
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def find_recordings(paths):
+    """Expand files and directories (searched recursively) into sorted .rpsr paths"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(os.path.join(root, name) for name in files if name.endswith(EXTENSION))
+        elif path.endswith(EXTENSION):
+            found.append(path)
+    return sorted(found)
@@ -0,0 +1,203 @@
+"""
+Idempotent round results: a retried round gets the original answer back
+
+Clients tag every round with gameData.roundId and reuse it when they re-post
+the round (after a timeout on a flaky tunnel, or when a round session falls
+back to a one-shot upload). The first request for an id runs the round; its
+result is kept for a TTL, and any request for the same id gets a copy of it
+instead of decoding, inferring and calling GameEngine.play_round (a fresh
+random computer move) again. A retry that arrives while the original is
+still running waits for it rather than running the round a second time.
+Only played rounds are kept: a request that failed, or a round the server
+ran out of time for before processing a single frame, is run again by its
+retry.
+
+Results live in a small SQLite database shared by every worker of the host,
+so a retry that lands on another worker than the original still gets its
+result. A request claims its round id with a pending row (no result yet)
+before computing; requests for a claimed id poll the row until the result
+is there, but no longer than their own round deadline (and never more than
+wait_seconds), since each poll holds a server thread. A claim lapses after claim_seconds,
+longer than any round runs, so only the claim of a request that died
+mid-round is taken over; its round id is not blocked for good.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from utils.admission import Overloaded
+from utils.metrics import ROUND_CACHE_ENTRIES, ROUND_CACHE_EVICTIONS, ROUND_CACHE_REQUESTS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS round_results (
+    round_id TEXT PRIMARY KEY,
+    result TEXT,               -- JSON response body, NULL while a request computes it
+    expires_at REAL NOT NULL,  -- time.time() the result (or the pending claim) lapses
+    used_at REAL NOT NULL      -- last stored or served, for LRU eviction
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS round_results_by_use ON round_results (used_at);
+"""
+
+POLL_SECONDS = 0.02  # how often a waiting retry checks for the original's result
+
+
+def cacheable(result):
+    """A result a retry of its round should get back (not a server-side failure)"""
+    if not result or result.get("status") not in ("final_result", "success", "no_detection"):
+        return False
+    return not (result.get("deadline_truncated") and not result.get("processed_frames", 1))
+
+
+class RoundResultCache:
+    def __init__(self, path, max_entries, ttl_seconds, wait_seconds, claim_seconds):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds  # longest a retry waits on the original
+        self.claim_seconds = claim_seconds  # after which a claim without a result is taken over
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # Autocommit; transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self):
+        # One connection per thread (and per process, after fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return conn
+
+    def __len__(self):
+        (count,) = self._connection().execute(
+            "SELECT count(*) FROM round_results WHERE result IS NOT NULL"
+        ).fetchone()
+        return count
+
+    def get_or_compute(self, round_id, compute, deadline=None):
+        """
+        The result of round `round_id`, computing it with `compute()` only if
+        no other request (on any worker) has or is
+        Args:
+            deadline (float): time.monotonic() after which this request stops
+                waiting for a concurrent one
+        Returns:
+            (result, outcome): a private copy of the result, and 'hit', 'miss'
+            or 'coalesced' (waited for a concurrent request with the same id)
+        Raises:
+            Overloaded: the original request is still running at the deadline
+                or after wait_seconds
+        """
+        give_up_at = time.monotonic() + self.wait_seconds
+        if deadline is not None:
+            give_up_at = min(give_up_at, deadline)
+        waited = False
+        while True:
+            result, claimed = self._lookup_or_claim(round_id)
+            if result is not None:
+                outcome = "coalesced" if waited else "hit"
+                ROUND_CACHE_REQUESTS[outcome].inc()
+                return result, outcome
+            if claimed:
+                break
+            # Same round running elsewhere: wait for its result. If it fails,
+            # its claim is dropped and the loop makes this request compute
+            if time.monotonic() >= give_up_at:
+                raise Overloaded("round_in_progress", 1)
+            waited = True
+            time.sleep(POLL_SECONDS)
+
+        stored = False
+        try:
+            result = compute()
+            if cacheable(result):
+                try:
+                    self._store(round_id, result)
+                    stored = True
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    # The round is played; only its retries lose idempotency
+                    print(f"⚠️ Could not cache the result of round {round_id}: {e}")
+        finally:
+            if not stored:
+                self._release(round_id)
+        ROUND_CACHE_REQUESTS["miss"].inc()
+        return result, "miss"
+
+    def _lookup_or_claim(self, round_id):
+        """
+        (result, False) for a live cached result, (None, True) when this
+        request now holds the claim to compute it, (None, False) when another
+        request holds it
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute(
+                "DELETE FROM round_results WHERE expires_at <= ? AND result IS NOT NULL", (now,)
+            ).rowcount
+            if expired:
+                ROUND_CACHE_EVICTIONS["ttl"].inc(expired)
+            row = conn.execute(
+                "SELECT result, expires_at FROM round_results WHERE round_id = ?", (round_id,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                if row[0] is None:
+                    conn.execute("COMMIT")
+                    return None, False
+                conn.execute("UPDATE round_results SET used_at = ? WHERE round_id = ?", (now, round_id))
+                conn.execute("COMMIT")
+                return json.loads(row[0]), False
+            # No entry, or the claim of a request that died: claim it
+            conn.execute(
+                "INSERT OR REPLACE INTO round_results (round_id, result, expires_at, used_at) "
+                "VALUES (?, NULL, ?, ?)",
+                (round_id, now + self.claim_seconds, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return None, True
+
+    def _store(self, round_id, result):
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE round_results SET result = ?, expires_at = ?, used_at = ? WHERE round_id = ?",
+                (json.dumps(result), now + self.ttl_seconds, now, round_id),
+            )
+            # Least recently used results beyond max_entries
+            evicted = conn.execute(
+                "DELETE FROM round_results WHERE round_id IN ("
+                "SELECT round_id FROM round_results WHERE result IS NOT NULL "
+                "ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            (entries,) = conn.execute(
+                "SELECT count(*) FROM round_results WHERE result IS NOT NULL"
+            ).fetchone()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if evicted:
+            ROUND_CACHE_EVICTIONS["lru"].inc(evicted)
+        ROUND_CACHE_ENTRIES.set(entries)
+
+    def _release(self, round_id):
+        """Drop this request's claim (failed or uncacheable round) so a retry computes"""
+        self._connection().execute(
+            "DELETE FROM round_results WHERE round_id = ? AND result IS NULL", (round_id,)
+        )
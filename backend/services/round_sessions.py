@@ -0,0 +1,117 @@
+"""
+Chunked round sessions: open a round, append frame chunks while the player is
+still being captured, then finalize
+
+Every chunk goes through the pipeline as soon as it arrives, so by the time
+the capture ends most of the round's compute is already done and finalize
+only has to process the last few frames and play the round. Each session
+votes into its own PredictionPostprocessor, so sessions never share a buffer
+with each other or with one-shot /process-frames rounds.
+
+Sessions live in the memory of the worker process that opened them, so all
+requests of a session must reach that worker: server.py turns sessions off
+(Config.ROUND_SESSIONS) when more than one worker shares its socket. A chunk
+that still lands elsewhere (e.g. behind a proxy that lost its affinity) gets
+a 404 and the client falls back to a single /process-frames upload.
+"""
+import threading
+import time
+from collections import OrderedDict
+from services.postprocessor import PredictionPostprocessor
+from services.round_processor import new_round_state
+from utils.admission import Overloaded
+from utils.metrics import ROUND_SESSIONS_EXPIRED, ROUND_SESSIONS_OPEN
+from utils.tracing import new_round_id
+
+
+class RoundSession:
+    def __init__(
+        self, session_id, game_data, roi_input, ttl_seconds, recording=False, overlay_mode=None
+    ):
+        self.session_id = session_id
+        self.game_data = dict(game_data)
+        self.roi_input = roi_input
+        self.state = new_round_state(game_data, roi_input, PredictionPostprocessor(), overlay_mode)
+        self.frame_details = {}  # client-side landmarks per frame_id, across chunks
+        self.ttl_seconds = ttl_seconds
+        self.expires_at = time.monotonic() + ttl_seconds
+        # Chunks of one session are processed one at a time, in arrival order
+        self.lock = threading.Lock()
+        self.closed = False  # finalized or expired; requests still waiting on `lock` must stop
+        # (frame_id, timestamp, jpeg_bytes) of every chunk when the round is recorded
+        self.recorded_frames = [] if recording else None
+
+    @property
+    def round_id(self):
+        # gameData (and its roundId) may still arrive with a chunk or the finalize
+        return str(self.game_data.get("roundId") or self.session_id)
+
+    def touch(self):
+        self.expires_at = time.monotonic() + self.ttl_seconds
+
+    def release(self):
+        """Drop buffered frames (and their share of the frame buffer gauges)"""
+        self.closed = True
+        self.state.postprocessor.clear_buffer()
+
+
+class RoundSessionStore:
+    """Open sessions of this worker, bounded in number and idle time"""
+
+    def __init__(self, max_sessions, ttl_seconds):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()  # session_id -> RoundSession, oldest first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def open(self, game_data, roi_input=False, recording=False, overlay_mode=None):
+        """
+        Start a session
+        Raises:
+            Overloaded: this worker already holds max_sessions live sessions
+        """
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                oldest = next(iter(self._sessions.values()))
+                retry_after = max(1, int(oldest.expires_at - time.monotonic()) + 1)
+                raise Overloaded("sessions_full", retry_after)
+            session = RoundSession(
+                new_round_id(), game_data, roi_input, self.ttl_seconds, recording, overlay_mode
+            )
+            self._sessions[session.session_id] = session
+            ROUND_SESSIONS_OPEN.inc()
+        return session
+
+    def get(self, session_id):
+        """The live session, or None when unknown or expired"""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.touch()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id):
+        """Forget a session (after finalize); returns it, or None"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                ROUND_SESSIONS_OPEN.dec()
+        return session
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.expires_at > now:
+                break
+            del self._sessions[session.session_id]
+            ROUND_SESSIONS_OPEN.dec()
+            ROUND_SESSIONS_EXPIRED.inc()
+            session.release()
+            print(f"⌛ Round session {session.session_id} expired")
@@ -0,0 +1,7 @@
+"""Run the tests from backend/ imports (services, utils, ...) like the app does"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
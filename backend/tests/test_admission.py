@@ -0,0 +1,91 @@
+"""AdmissionController: bounded queue served earliest deadline first"""
+import threading
+import time
+import pytest
+from utils.admission import AdmissionController, Overloaded
+
+
+def wait_until(condition, timeout=5.0):
+    give_up_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up_at, "timed out"
+        time.sleep(0.001)
+
+
+def start_waiter(admission, deadline, name, admitted, errors):
+    def run():
+        try:
+            with admission.slot(deadline):
+                admitted.append(name)
+        except Overloaded as e:
+            errors.append((name, e.reason))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_free_slot_admits_immediately():
+    admission = AdmissionController(max_concurrency=2, max_queue=0)
+    with admission.slot():
+        with admission.slot(time.monotonic() + 1):
+            assert admission.in_flight == 2
+    assert admission.in_flight == 0
+
+
+def test_waiters_are_served_earliest_deadline_first():
+    admission = AdmissionController(max_concurrency=1, max_queue=8)
+    now = time.monotonic()
+    # Arrival order is not deadline order; no deadline goes last, ties keep arrival order
+    arrivals = [("none", None), ("late", now + 30), ("early", now + 10), ("mid", now + 20),
+                ("early-2", now + 10), ("none-2", None)]
+    admitted, errors, threads = [], [], []
+    with admission.slot():
+        for name, deadline in arrivals:
+            threads.append(start_waiter(admission, deadline, name, admitted, errors))
+            wait_until(lambda: admission.queue_depth == len(threads))
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == []
+    assert admitted == ["early", "early-2", "mid", "late", "none", "none-2"]
+    assert admission.queue_depth == 0 and admission.in_flight == 0
+
+
+def test_full_queue_sheds_right_away():
+    admission = AdmissionController(max_concurrency=1, max_queue=1, service_time_estimate=2.0)
+    admitted, errors = [], []
+    with admission.slot():
+        waiter = start_waiter(admission, None, "queued", admitted, errors)
+        wait_until(lambda: admission.queue_depth == 1)
+        with pytest.raises(Overloaded) as shed:
+            with admission.slot(time.monotonic() + 10):
+                pass
+        assert shed.value.reason == "queue_full"
+        # Two requests ahead of a retry, 2 s each
+        assert shed.value.retry_after == 4
+    waiter.join(5)
+    assert admitted == ["queued"]
+
+
+def test_request_whose_deadline_passes_in_the_queue_is_shed():
+    admission = AdmissionController(max_concurrency=1, max_queue=4)
+    admitted, errors = [], []
+    with admission.slot():
+        patient = start_waiter(admission, time.monotonic() + 30, "patient", admitted, errors)
+        hurried = start_waiter(admission, time.monotonic() + 0.05, "hurried", admitted, errors)
+        hurried.join(5)
+        assert errors == [("hurried", "deadline")]
+        # Its queue entry is gone; the other waiter is still queued
+        assert admission.queue_depth == 1
+    patient.join(5)
+    assert admitted == ["patient"]
+    assert admission.queue_depth == 0
+
+
+def test_service_time_estimate_follows_hold_times():
+    admission = AdmissionController(max_concurrency=1, max_queue=1, service_time_estimate=1.0)
+    with admission.slot():
+        pass
+    # One short hold moves the moving average a fifth of the way towards it
+    assert admission.service_seconds == pytest.approx(0.8, abs=0.01)
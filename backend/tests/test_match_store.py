@@ -0,0 +1,102 @@
+"""MatchStore: trigger-maintained player totals and INSERT OR IGNORE on round_id"""
+import random
+import sqlite3
+import pytest
+from services.match_store import MatchStore
+
+MOVES = ("rock", "paper", "scissors")
+WINNERS = ("player", "computer", "draw")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MatchStore(str(tmp_path / "matches.sqlite3"), flush_interval=0.01)
+
+
+def row(round_id, player="ada", move="rock", winner="player", played_at=1000.0):
+    return (round_id, player, "classic", 1, move, "scissors", winner, 0.9, played_at)
+
+
+def totals_from_rounds(path):
+    """Player totals recomputed from every round, as the trigger should keep them"""
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        """
+        SELECT player, count(*), sum(winner = 'player'), sum(winner = 'computer'),
+               sum(winner = 'draw'), sum(player_move = 'rock'), sum(player_move = 'paper'),
+               sum(player_move = 'scissors'), min(played_at), max(played_at)
+        FROM rounds GROUP BY player ORDER BY player
+        """
+    ).fetchall()
+    tallied = conn.execute(
+        "SELECT player, rounds, wins, losses, draws, rock, paper, scissors, first_played, last_played "
+        "FROM players ORDER BY player"
+    ).fetchall()
+    conn.close()
+    return rows, tallied
+
+
+def test_trigger_keeps_player_totals(store):
+    rng = random.Random(7)
+    rows = [
+        row(f"r{i}", rng.choice(["ada", "bob", "cy"]), rng.choice(MOVES + ("invalid",)),
+            rng.choice(WINNERS), played_at=rng.uniform(0, 1e6))
+        for i in range(300)
+    ]
+    for start in range(0, len(rows), 64):
+        store.write_many(rows[start:start + 64])
+
+    recomputed, tallied = totals_from_rounds(store.path)
+    assert tallied == recomputed
+    ada = store.player_stats("ada")
+    assert ada["rounds"] == sum(1 for r in rows if r[1] == "ada")
+    assert ada["moves"]["other"] == sum(1 for r in rows if r[1] == "ada" and r[4] == "invalid")
+
+
+def test_duplicate_round_id_is_counted_once(store):
+    store.write_many([row("r1", winner="player"), row("r2", winner="draw")])
+    # The same rounds again (a retry that reached another worker), one changed
+    store.write_many([row("r1", winner="computer"), row("r2", winner="draw"), row("r3", winner="computer")])
+
+    stats = store.player_stats("ada")
+    assert (stats["rounds"], stats["wins"], stats["losses"], stats["draws"]) == (3, 1, 1, 1)
+    rounds = store.player_rounds("ada")["rounds"]
+    assert [r["round_id"] for r in rounds] == ["r3", "r2", "r1"]
+    # The first write of a round wins
+    assert rounds[-1]["winner"] == "player"
+
+
+def test_record_goes_through_the_writer_thread(store):
+    result = {
+        "confidence": 0.8,
+        "game_result": {"player_move": "paper", "computer_move": "rock", "winner": "player"},
+    }
+    game_data = {"playerName": "  ada  ", "gameMode": "classic", "currentRound": 2}
+    assert store.record("r1", game_data, result)
+    assert store.record("r1", game_data, result)
+    # Not recorded: no player, no game result, a two-player round
+    assert not store.record("r2", {}, result)
+    assert not store.record("r3", game_data, {"confidence": 0.8})
+    assert not store.record("r4", game_data, {"game_result": {"winner": "player_1"}})
+    store.flush()
+
+    board = store.leaderboard()
+    assert board["total"] == 1
+    assert board["players"][0]["player"] == "ada"
+    assert board["players"][0]["rounds"] == 1
+    assert store.player_stats("ada")["moves"]["paper"] == 1
+
+
+def test_leaderboard_order_and_ranks(store):
+    store.write_many(
+        [row("a1", "ada"), row("a2", "ada"), row("b1", "bob"), row("b2", "bob", winner="computer"),
+         row("c1", "cy"), row("c2", "cy"), row("d1", "dee", winner="draw")]
+    )
+    board = store.leaderboard(limit=2, offset=1)
+    # Wins first, then fewer rounds, then name
+    assert [p["player"] for p in board["players"]] == ["cy", "bob"]
+    assert [p["rank"] for p in board["players"]] == [2, 3]
+    # Equal wins share a rank in player stats
+    assert store.player_stats("cy")["rank"] == store.player_stats("ada")["rank"] == 1
+    assert store.player_stats("nobody") is None
+
@@ -0,0 +1,56 @@
+"""PlayerTracker: which player each hand of a two-player frame belongs to"""
+from services.player_tracker import PlayerTracker
+
+FRAME = (480, 640, 3)
+
+
+def box(cx, cy, size=80):
+    """A hand box centered at (cx, cy) pixels"""
+    return (cx - size // 2, cy - size // 2, cx + size // 2, cy + size // 2)
+
+
+def test_first_frame_seats_players_by_side():
+    assert PlayerTracker().assign([box(500, 240), box(120, 240)], FRAME) == ["right", "left"]
+    assert PlayerTracker().assign([box(120, 240), box(500, 240)], FRAME) == ["left", "right"]
+    assert PlayerTracker().assign([box(100, 240)], FRAME) == ["left"]
+    assert PlayerTracker().assign([box(600, 240)], FRAME) == ["right"]
+    assert PlayerTracker().assign([], FRAME) == []
+
+
+def test_hand_reaching_across_the_middle_keeps_its_player():
+    tracker = PlayerTracker()
+    tracker.assign([box(120, 240), box(560, 240)], FRAME)
+    # The left player's hand moves over to the right half of the frame
+    assert tracker.assign([box(260, 240), box(560, 240)], FRAME) == ["left", "right"]
+    assert tracker.assign([box(360, 240), box(560, 240)], FRAME) == ["left", "right"]
+    assert tracker.assign([box(420, 240), box(560, 240)], FRAME) == ["left", "right"]
+    # Listed in the other order, the assignment follows the hands
+    assert tracker.assign([box(560, 240), box(430, 240)], FRAME) == ["right", "left"]
+    # The right player's hand leaves the frame: seating by side would now give
+    # the left player's hand to the right player
+    assert tracker.assign([box(440, 240)], FRAME) == ["left"]
+
+
+def test_lone_hand_goes_to_the_nearest_player():
+    tracker = PlayerTracker()
+    tracker.assign([box(120, 240), box(520, 240)], FRAME)
+    # Only one hand in view: the player whose hand was last nearest, whatever the side
+    assert tracker.assign([box(300, 240)], FRAME) == ["left"]
+    assert tracker.assign([box(480, 200)], FRAME) == ["right"]
+    # The left player's hand was last seen at 300
+    assert tracker.assign([box(340, 260)], FRAME) == ["left"]
+
+
+def test_one_player_seen_so_far():
+    tracker = PlayerTracker()
+    assert tracker.assign([box(100, 240)], FRAME) == ["left"]
+    # Close to where the left hand was: still the left player, even past the middle
+    assert tracker.assign([box(180, 240)], FRAME) == ["left"]
+    # Far from it: the other player
+    assert tracker.assign([box(560, 240)], FRAME) == ["right"]
+
+    tracker = PlayerTracker()
+    tracker.assign([box(600, 240)], FRAME)
+    # Two hands: the known (right) player keeps the nearer one, even when it is listed first
+    assert tracker.assign([box(560, 240), box(80, 240)], FRAME) == ["right", "left"]
+    assert tracker.assign([box(100, 240), box(540, 240)], FRAME) == ["left", "right"]
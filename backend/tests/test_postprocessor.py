@@ -0,0 +1,88 @@
+"""
+The incremental sliding-window vote against a full recount of the window
+
+The reference is the vote PredictionPostprocessor computed before it kept
+running state: keep the last max_frames accepted frames, score each class by
+summing its frames' weights (decayed by age), the first class seen in the
+window wins ties, and its best frame is the first one with the highest
+confidence.
+"""
+import random
+import pytest
+from services.postprocessor import PredictionPostprocessor
+
+CLASSES = ("rock", "paper", "scissors")
+# Few distinct values so that confidence ties (and vote ties) are common
+CONFIDENCES = (0.5, 0.8, 0.8, 0.9, 0.95, 1.0)
+
+
+def reference_vote(accepted, max_frames, vote_weighting, decay):
+    window = accepted[-max_frames:]
+    newest = len(window) - 1
+    scores = {}
+    for i, (prediction, confidence) in enumerate(window):
+        weight = confidence if vote_weighting == "confidence" else 1.0
+        scores[prediction] = scores.get(prediction, 0.0) + weight * decay ** (newest - i)
+    counts = {}
+    for prediction, _ in window:
+        counts[prediction] = counts.get(prediction, 0) + 1
+    # dicts keep first-seen order, and max() keeps the first of equal scores
+    winner = max(scores, key=scores.get)
+    best = max(
+        (i for i, (prediction, _) in enumerate(window) if prediction == winner),
+        key=lambda i: window[i][1],
+    )
+    return scores, winner, counts, window[best][1], len(accepted) - len(window) + best
+
+
+@pytest.mark.parametrize("vote_weighting", ["count", "confidence"])
+@pytest.mark.parametrize("decay", [1.0, 0.9, 0.5])
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_full_recount(vote_weighting, decay, seed):
+    rng = random.Random(seed)
+    postprocessor = PredictionPostprocessor(vote_weighting=vote_weighting, recency_decay=decay)
+    postprocessor.max_frames = rng.choice([1, 3, 5, 8])
+    accepted = []
+
+    for _ in range(rng.randint(1, 40)):
+        prediction = rng.choice(CLASSES)
+        confidence = rng.choice(CONFIDENCES)
+        postprocessor.add_prediction(prediction, confidence, {"index": len(accepted)})
+        if confidence >= postprocessor.confidence_threshold:
+            accepted.append((prediction, confidence))
+
+        result, best_frame = postprocessor.get_aggregated_result()
+        if not accepted:
+            assert result is None and best_frame is None
+            continue
+        scores, winner, counts, confidence_best, index_best = reference_vote(
+            accepted, postprocessor.max_frames, vote_weighting, decay
+        )
+
+        assert result["frame_count"] == min(len(accepted), postprocessor.max_frames)
+        assert result["all_predictions"] == counts
+        ranked = sorted(scores.values(), reverse=True)
+        if len(ranked) > 1 and ranked[0] - ranked[1] < 1e-9:
+            # Decayed sums that are equal up to rounding: either leader is a
+            # correct answer, the two computations just round differently
+            assert scores[result["final_prediction"]] == pytest.approx(ranked[0])
+            continue
+        assert result["final_prediction"] == winner
+        assert result["confidence"] == confidence_best
+        assert best_frame["frame_data"]["index"] == index_best
+        assert result["prediction_percentage"] == pytest.approx(
+            100.0 * counts[winner] / result["frame_count"]
+        )
+
+
+def test_clear_buffer_starts_a_new_window():
+    postprocessor = PredictionPostprocessor()
+    postprocessor.add_prediction("rock", 0.9, {})
+    postprocessor.clear_buffer()
+    assert postprocessor.get_aggregated_result() == (None, None)
+
+    postprocessor.add_prediction("paper", 0.8, {})
+    result, _ = postprocessor.get_aggregated_result()
+    assert result["final_prediction"] == "paper"
+    assert result["all_predictions"] == {"paper": 1}
+    assert postprocessor.buffer_bytes == 0
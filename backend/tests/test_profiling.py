@@ -0,0 +1,37 @@
+"""Client-requested profiles and the PROFILE_DIR cap"""
+import os
+from utils import profiling
+from utils.config import Config
+
+
+def test_client_profiles_are_off_by_default(monkeypatch):
+    monkeypatch.setattr(Config, "CLIENT_PROFILES", False)
+    monkeypatch.setattr(Config, "PROFILE_EVERY_N", 0)
+    assert profiling.start_request_profile("sample", "process_frames") is None
+
+
+def test_client_profile_when_enabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "CLIENT_PROFILES", True)
+    monkeypatch.setattr(Config, "PROFILE_DIR", str(tmp_path))
+    profiler = profiling.start_request_profile("cprofile", "process_frames")
+    assert profiler is not None
+    path = profiling.finish_request_profile(profiler)
+    assert path.endswith(".pstats") and os.path.exists(path)
+
+
+def test_prune_deletes_the_oldest_profiles_with_their_summaries(tmp_path):
+    for i, suffix in enumerate([".pstats", ".collapsed", ".pstats", ".collapsed"]):
+        for name in (f"profile-x-{i}{suffix}", f"profile-x-{i}.summary.json"):
+            (tmp_path / name).write_text("")
+            os.utime(tmp_path / name, (1000 + i, 1000 + i))
+    (tmp_path / "notes.txt").write_text("")
+
+    profiling.prune_profiles(str(tmp_path), 2)
+
+    assert sorted(os.listdir(tmp_path)) == [
+        "notes.txt",
+        "profile-x-2.pstats",
+        "profile-x-2.summary.json",
+        "profile-x-3.collapsed",
+        "profile-x-3.summary.json",
+    ]
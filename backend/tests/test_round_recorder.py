@@ -0,0 +1,85 @@
+"""Writing .rpsr round recordings and reading them back"""
+import os
+import struct
+import pytest
+from services.round_recorder import (
+    EXTENSION,
+    RoundRecorder,
+    RoundRecording,
+    find_recordings,
+    write_recording,
+)
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "corpus", "synthetic")
+
+
+def corpus_jpegs(count):
+    names = sorted(name for name in os.listdir(CORPUS_DIR) if name.endswith(".jpg"))[:count]
+    frames = []
+    for name in names:
+        with open(os.path.join(CORPUS_DIR, name), "rb") as f:
+            frames.append(f.read())
+    return frames
+
+
+def test_round_trip_is_bit_identical(tmp_path):
+    jpegs = corpus_jpegs(3) + [b""]  # an empty frame still keeps its slot
+    frames = [(i + 1, 1000.0 + i / 10, jpeg) for i, jpeg in enumerate(jpegs)]
+    game_data = {"gameMode": "classic", "playerName": "ada", "label": "paper"}
+    result = {"status": "final_result", "final_prediction": "paper", "confidence": 0.91}
+    path = write_recording(
+        str(tmp_path / f"round-r1{EXTENSION}"), "r1", frames, game_data, result, 1234.5, "roi"
+    )
+
+    with RoundRecording(path) as recording:
+        assert recording.round_id == "r1"
+        assert recording.game_data == game_data
+        assert recording.result == result
+        assert recording.input_kind == "roi"
+        assert recording.index["recorded_at"] == 1234.5
+        read = recording.frames()
+        assert [(frame_id, timestamp, bytes(view)) for frame_id, timestamp, view in read] == frames
+        for _, _, view in read:
+            view.release()
+    # No temp file left behind
+    assert os.listdir(tmp_path) == [f"round-r1{EXTENSION}"]
+
+
+def test_rejects_files_that_are_not_recordings(tmp_path):
+    short = tmp_path / "short.rpsr"
+    short.write_bytes(b"RPSR")
+    with pytest.raises(ValueError):
+        RoundRecording(str(short))
+
+    path = write_recording(str(tmp_path / "round-r1.rpsr"), "r1", [(1, 0.0, b"jpeg")], {})
+    data = bytearray(open(path, "rb").read())
+    struct.pack_into("<H", data, 4, 99)  # unknown version
+    (tmp_path / "future.rpsr").write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        RoundRecording(str(tmp_path / "future.rpsr"))
+
+
+def test_recorder_writes_in_the_background(tmp_path):
+    recorder = RoundRecorder(str(tmp_path))
+    frames = [(1, 10.0, b"\xff\xd8first"), (2, 10.1, b"\xff\xd8second")]
+    result = {"status": "final_result", "final_prediction": "rock", "final_overlay_image": "data:..."}
+    assert recorder.record("r1", frames, {"gameMode": "classic"}, result)
+    recorder.flush()
+    assert recorder.written == 1
+
+    (path,) = find_recordings([str(tmp_path)])
+    assert os.path.basename(path) == f"round-r1{EXTENSION}"
+    with RoundRecording(path) as recording:
+        # Overlay images are not kept in the index
+        assert recording.result == {"status": "final_result", "final_prediction": "rock"}
+        assert recording.input_kind == "frame"
+        read = recording.frames()
+        assert [bytes(view) for _, _, view in read] == [jpeg for _, _, jpeg in frames]
+        for _, _, view in read:
+            view.release()
+
+
+def test_round_ids_cannot_leave_the_directory(tmp_path):
+    recorder = RoundRecorder(str(tmp_path / "recordings"))
+    with pytest.raises(ValueError):
+        recorder._path_for("/../../../escaped", 0.0)
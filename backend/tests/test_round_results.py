@@ -0,0 +1,174 @@
+"""RoundResultCache: one computation per round id, across threads and workers"""
+import multiprocessing
+import threading
+import time
+import pytest
+from services.round_results import RoundResultCache
+from utils.admission import Overloaded
+
+
+def played(move="rock"):
+    return {"status": "final_result", "final_prediction": move, "processed_frames": 5}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "round_results.sqlite3")
+
+
+def cache_at(path, max_entries=16, ttl_seconds=60.0, wait_seconds=5.0, claim_seconds=30.0):
+    return RoundResultCache(path, max_entries, ttl_seconds, wait_seconds, claim_seconds)
+
+
+def test_concurrent_requests_for_a_round_coalesce(path):
+    cache = cache_at(path)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return played()
+
+    outcomes = []
+
+    def request():
+        result, outcome = cache.get_or_compute("r1", compute)
+        outcomes.append((outcome, result["final_prediction"]))
+
+    threads = [threading.Thread(target=request) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)  # every request is either computing or waiting
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(outcomes) == [("coalesced", "rock")] * 4 + [("miss", "rock")]
+    assert cache.get_or_compute("r1", compute) == (played(), "hit")
+    assert len(calls) == 1
+
+
+def _worker(path, counter, start, outcomes):
+    # A worker process of its own, with its own cache object on the shared database
+    cache = cache_at(path)
+    start.wait(5)
+
+    def compute():
+        with counter.get_lock():
+            counter.value += 1
+        time.sleep(0.3)
+        return played("paper")
+
+    result, outcome = cache.get_or_compute("r1", compute)
+    outcomes.put((outcome, result["final_prediction"]))
+
+
+def test_retry_on_another_worker_gets_the_original_result(path):
+    cache_at(path)  # create the schema before the workers race for it
+    context = multiprocessing.get_context("fork")
+    counter, start, outcomes = context.Value("i", 0), context.Event(), context.Queue()
+    workers = [context.Process(target=_worker, args=(path, counter, start, outcomes)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    start.set()
+    for worker in workers:
+        worker.join(10)
+
+    assert counter.value == 1
+    results = sorted(outcomes.get(timeout=5) for _ in workers)
+    assert results == [("coalesced", "paper")] * 2 + [("miss", "paper")]
+
+
+def test_results_are_private_copies(path):
+    cache = cache_at(path)
+    result, _ = cache.get_or_compute("r1", played)
+    result["final_prediction"] = "scissors"
+    again, outcome = cache.get_or_compute("r1", played)
+    assert (outcome, again["final_prediction"]) == ("hit", "rock")
+
+
+@pytest.mark.parametrize(
+    "unplayed",
+    [
+        {"status": "error", "error": "Failed to decode frame"},
+        {"status": "final_result", "deadline_truncated": True, "processed_frames": 0},
+    ],
+)
+def test_rounds_that_were_not_played_are_run_again(path, unplayed):
+    cache = cache_at(path)
+    assert cache.get_or_compute("r1", lambda: unplayed) == (unplayed, "miss")
+    assert cache.get_or_compute("r1", played) == (played(), "miss")
+    assert len(cache) == 1
+
+
+def test_failed_request_releases_its_round(path):
+    cache = cache_at(path)
+
+    def fail():
+        raise RuntimeError("pipeline failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("r1", fail)
+    # The retry does not wait on the failed request's claim
+    assert cache.get_or_compute("r1", played) == (played(), "miss")
+
+
+def test_waiting_retry_gives_up_after_wait_seconds(path):
+    cache = cache_at(path, wait_seconds=0.2)
+    release = threading.Event()
+    original = threading.Thread(
+        target=cache.get_or_compute, args=("r1", lambda: release.wait(5) and played())
+    )
+    original.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(Overloaded) as busy:
+            cache.get_or_compute("r1", played)
+        assert busy.value.reason == "round_in_progress"
+    finally:
+        release.set()
+        original.join(5)
+
+
+def test_claim_of_a_request_that_died_is_taken_over(path):
+    dead = cache_at(path, claim_seconds=0.1)
+    # A request claims the round, then its worker is killed before it answers
+    assert dead._lookup_or_claim("r1") == (None, True)
+    cache = cache_at(path, wait_seconds=1.0)
+    assert cache.get_or_compute("r1", played) == (played(), "miss")
+
+
+def test_expired_and_least_recently_used_results_are_evicted(path):
+    cache = cache_at(path, max_entries=2, ttl_seconds=0.2)
+    cache.get_or_compute("r1", played)
+    cache.get_or_compute("r2", played)
+    cache.get_or_compute("r1", played)  # r2 is now the least recently used
+    cache.get_or_compute("r3", played)
+    assert len(cache) == 2
+    assert cache.get_or_compute("r1", played)[1] == "hit"
+    assert cache.get_or_compute("r2", played)[1] == "miss"
+
+    time.sleep(0.25)
+    assert cache.get_or_compute("r1", played)[1] == "miss"
+
+
+def test_waiting_retry_gives_up_at_its_deadline(path):
+    cache = cache_at(path, wait_seconds=5.0)
+    release = threading.Event()
+    original = threading.Thread(
+        target=cache.get_or_compute, args=("r1", lambda: release.wait(5) and played())
+    )
+    original.start()
+    time.sleep(0.05)
+    try:
+        started = time.monotonic()
+        with pytest.raises(Overloaded):
+            cache.get_or_compute("r1", played, deadline=started + 0.1)
+        assert time.monotonic() - started < 1.0
+        with pytest.raises(Overloaded):
+            cache.get_or_compute("r1", played, deadline=time.monotonic() - 1)
+    finally:
+        release.set()
+        original.join(5)
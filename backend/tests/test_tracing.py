@@ -0,0 +1,35 @@
+"""Writing round traces to TRACE_DIR"""
+import os
+from utils.tracing import RoundTrace, prune_traces
+
+
+def _dump(directory, round_id, mtime, max_files=None):
+    path = RoundTrace(round_id).dump(directory, max_files=max_files)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_prune_keeps_only_the_newest_traces(tmp_path):
+    directory = str(tmp_path)
+    for i in range(5):
+        _dump(directory, f"r{i}", 1000 + i)
+    (tmp_path / "notes.txt").write_text("not a trace")
+
+    prune_traces(directory, 3)
+
+    assert sorted(os.listdir(directory)) == ["notes.txt", "round-r2.json", "round-r3.json", "round-r4.json"]
+
+
+def test_dump_without_a_limit_keeps_everything(tmp_path):
+    for i in range(4):
+        _dump(str(tmp_path), f"r{i}", 1000 + i)
+    assert len(os.listdir(tmp_path)) == 4
+
+
+def test_dump_prunes_after_writing(tmp_path):
+    directory = str(tmp_path)
+    _dump(directory, "old", 1000)
+    _dump(directory, "older", 900)
+    path = RoundTrace("new").dump(directory, max_files=2)
+    assert sorted(os.listdir(directory)) == ["round-new.json", "round-old.json"]
+    assert os.path.exists(path)
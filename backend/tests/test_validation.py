@@ -0,0 +1,53 @@
+"""Client round ids, the file paths built from them and JSON form fields"""
+import os
+import pytest
+from utils.validation import InvalidRequest, InvalidRoundId, client_round_id, json_field, path_under
+
+
+@pytest.mark.parametrize("game_data", [None, {}, {"roundId": None}, {"roundId": ""}])
+def test_missing_round_id(game_data):
+    assert client_round_id(game_data) is None
+
+
+@pytest.mark.parametrize("round_id, expected", [("a1B2-c_3", "a1B2-c_3"), (42, "42"), ("x" * 64, "x" * 64)])
+def test_valid_round_ids(round_id, expected):
+    assert client_round_id({"roundId": round_id}) == expected
+
+
+@pytest.mark.parametrize(
+    "round_id", ["../../etc/passwd", "a/b", "a b", "abc\n", "x" * 65, "é", "round.json", "a\x00"]
+)
+def test_invalid_round_ids(round_id):
+    with pytest.raises(InvalidRoundId):
+        client_round_id({"roundId": round_id})
+
+
+def test_path_under_refuses_to_leave_the_directory(tmp_path):
+    directory = str(tmp_path / "traces")
+    assert path_under(directory, "20260101", "round-a.json") == os.path.join(directory, "20260101", "round-a.json")
+    for parts in [("..", "escaped.json"), ("/etc", "passwd"), ("day", "../../escaped")]:
+        with pytest.raises(ValueError):
+            path_under(directory, *parts)
+
+
+def test_path_under_follows_symlinks(tmp_path):
+    directory = tmp_path / "traces"
+    directory.mkdir()
+    (directory / "out").symlink_to(tmp_path)
+    with pytest.raises(ValueError):
+        path_under(str(directory), "out", "escaped.json")
+
+
+@pytest.mark.parametrize("raw, expected", [(None, {}), ("", {}), ('{"roundId": "a"}', {"roundId": "a"})])
+def test_json_field(raw, expected):
+    assert json_field(raw, "gameData", dict) == expected
+
+
+@pytest.mark.parametrize("raw", ["{", "not json", "[1, 2]", '"text"', "null"])
+def test_malformed_json_fields(raw):
+    with pytest.raises(InvalidRequest):
+        json_field(raw, "gameData", dict)
+
+
+def test_invalid_round_ids_are_invalid_requests():
+    assert issubclass(InvalidRoundId, InvalidRequest)
@@ -0,0 +1,163 @@
+"""
+Build a precomputed hand-ROI dataset from a raw image dataset
+
+Runs every image through the serving crop path once (decode, HandDetector,
+extract_hand_roi, resize_roi_for_model) on a pool of worker processes and
+writes the crops, labels, landmarks and boxes in the layout read by
+services/roi_dataset.py. Images the server would never classify (no hand,
+more than one hand) are left out and listed in the index by status.
+
+The source is laid out like the training notebooks expect it, one folder per
+class, optionally below train/, validation/ and test/:
+    rpsense-dataset/train/rock/*.jpg ... -> <output>/train/
+
+Usage (from backend/):
+    python -m tools.build_roi_dataset ~/rpsense-dataset datasets/rois
+    python -m tools.build_roi_dataset ~/rpsense-dataset datasets/rois --splits train --workers 8
+Then in a notebook (with backend/ on sys.path):
+    from services.roi_dataset import make_tf_dataset
+    train = make_tf_dataset("datasets/rois/train", augment=True, cache="memory")
+"""
+import os
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+SPLITS = ("train", "validation", "test")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+_hand_detector = None
+
+
+def _init_worker():
+    """One MediaPipe graph per worker process"""
+    global _hand_detector
+    from services.hand_detector import HandDetector
+
+    _hand_detector = HandDetector()
+
+
+def crop_one(item):
+    """
+    Serving crop of one image
+    Returns: (path, label, status, roi_rgb, landmarks, bbox); roi_rgb is None
+    unless status is "success"
+    """
+    from utils.config import Config
+    from utils.image_utils import (
+        decode_frame_from_bytes,
+        extract_hand_roi,
+        resize_roi_for_model,
+        roi_landmarks,
+    )
+
+    path, label = item
+    with open(path, "rb") as f:
+        image = decode_frame_from_bytes(f.read())
+    if image is None:
+        return path, label, "unreadable", None, None, None
+
+    status, _, hand_landmarks = _hand_detector.detect_hands(image)
+    if status != "success":
+        return path, label, status, None, None, None
+
+    roi, bbox = extract_hand_roi(image, hand_landmarks)
+    if roi is None:
+        return path, label, "empty_roi", None, None, None
+    return (
+        path,
+        label,
+        status,
+        resize_roi_for_model(roi, Config.MODEL_INPUT_SIZE),
+        roi_landmarks(hand_landmarks, image.shape, bbox),
+        bbox,
+    )
+
+
+def list_images(directory, classes):
+    """(path, class index) of every image below directory/<class>/, sorted"""
+    items = []
+    for label, name in enumerate(classes):
+        class_dir = os.path.join(directory, name)
+        if not os.path.isdir(class_dir):
+            print(f"⚠️ No {name}/ folder in {directory}")
+            continue
+        for root, _, files in os.walk(class_dir):
+            for file_name in sorted(files):
+                if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                    items.append((os.path.join(root, file_name), label))
+    return items
+
+
+def build_split(pool, source, output, classes, limit=None):
+    from services.roi_dataset import RoiDatasetWriter
+    from utils.config import Config
+
+    items = list_images(source, classes)[:limit]
+    if not items:
+        print(f"⚠️ No images under {source}, skipped")
+        return None
+
+    writer = RoiDatasetWriter(
+        output,
+        classes,
+        Config.MODEL_INPUT_SIZE,
+        source=os.path.abspath(source),
+        settings={"crop": "HandDetector + extract_hand_roi", "model_input_size": Config.MODEL_INPUT_SIZE},
+    )
+    started = time.perf_counter()
+    # imap keeps the source order, so a rebuild gives the same row numbers
+    for done, (path, label, status, roi, landmarks, bbox) in enumerate(
+        pool.imap(crop_one, items, chunksize=8), start=1
+    ):
+        relative = os.path.relpath(path, source)
+        if roi is None:
+            writer.skip(relative, status)
+        else:
+            writer.add(roi, label, landmarks, bbox, relative)
+        if done % 500 == 0:
+            print(f"   {done}/{len(items)} images")
+    index = writer.close()
+    elapsed = time.perf_counter() - started
+
+    skipped = {status: len(paths) for status, paths in index["skipped"].items()}
+    print(
+        f"✅ {output}: {len(writer)} ROIs from {len(items)} images in {elapsed:.1f}s "
+        f"({len(items) / elapsed:.1f} images/s)"
+    )
+    print(f"   per class: {index['counts']}, skipped: {skipped or 'none'}")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a precomputed hand-ROI dataset")
+    parser.add_argument("source", help="dataset root (class folders, optionally under train/validation/test)")
+    parser.add_argument("output", help="output directory")
+    parser.add_argument("--splits", nargs="+", help="splits to build (default: those present)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--limit", type=int, help="images per split, for a quick try")
+    args = parser.parse_args()
+
+    from utils.config import Config
+
+    splits = args.splits or [s for s in SPLITS if os.path.isdir(os.path.join(args.source, s))]
+    jobs = (
+        [(os.path.join(args.source, s), os.path.join(args.output, s)) for s in splits]
+        if splits
+        else [(args.source, args.output)]  # class folders directly under the root
+    )
+
+    print(f"▶️  Cropping {len(jobs)} split(s) on {args.workers} workers")
+    context = multiprocessing.get_context("fork")
+    with context.Pool(args.workers, initializer=_init_worker) as pool:
+        built = [build_split(pool, source, output, Config.CLASSES, args.limit) for source, output in jobs]
+    return 0 if any(built) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Distill the finetuned MobileNetV2 into a small student for CPU serving
+
+Trains a student (services/distillation.py) on a ROI dataset built by
+tools/build_roi_dataset.py, with the current model as the teacher, then
+compares the two on the test split (validation if there is none): accuracy,
+per-class recall, agreement, share of confident frames and per-frame CPU
+latency on the serving path. The report is printed and written next to the
+student as <output>.report.json.
+
+Runs on CPU. The teacher's probabilities are computed once per dataset split
+and cached there, so each epoch only runs the student.
+
+Usage (from backend/):
+    python -m tools.distill datasets/rois
+    python -m tools.distill datasets/rois --student compact --input-size 128 --epochs 30
+Then serve it with RPSENSE_MODEL_PATH=model/student-mobilenetv2-0.35-128.h5
+"""
+import os
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+
+def split_dirs(root):
+    """(train, validation or None, evaluation) directories of a ROI dataset root"""
+    present = {s for s in ("train", "validation", "test") if os.path.isdir(os.path.join(root, s))}
+    if "train" not in present:
+        raise SystemExit(f"❌ No train/ split in {root} (build it with tools.build_roi_dataset)")
+    validation = os.path.join(root, "validation") if "validation" in present else None
+    evaluation = os.path.join(root, "test") if "test" in present else validation
+    if evaluation is None:
+        raise SystemExit(f"❌ No test/ or validation/ split in {root} to evaluate on")
+    return os.path.join(root, "train"), validation, evaluation
+
+
+def train(args, teacher, train_dir, validation_dir):
+    import tensorflow as tf
+    from services.distillation import (
+        build_student,
+        distillation_loss,
+        hard_accuracy,
+        logits_model,
+        teacher_targets,
+    )
+    from services.roi_dataset import make_tf_dataset
+    from utils.config import Config
+
+    classes = Config.CLASSES
+    size = (args.input_size, args.input_size)
+
+    def dataset(directory, training):
+        return make_tf_dataset(
+            directory,
+            batch_size=args.batch_size,
+            shuffle=training,
+            augment=training and args.augment,
+            cache="memory" if training else None,
+            seed=args.seed,
+            size=size,
+            soft_labels=teacher_targets(teacher, args.teacher, directory),
+        )
+
+    train_ds = dataset(train_dir, True)
+    validation_ds = dataset(validation_dir, False) if validation_dir else None
+
+    student = build_student(args.student, size, len(classes), init=args.init)
+    trainer = logits_model(student)
+    trainer.compile(
+        optimizer=tf.keras.optimizers.Adam(args.learning_rate),
+        loss=distillation_loss(len(classes), args.temperature, args.alpha),
+        metrics=[hard_accuracy(len(classes))],
+    )
+    callbacks = []
+    if validation_ds is not None:
+        callbacks.append(
+            tf.keras.callbacks.EarlyStopping(
+                monitor="val_accuracy", mode="max", patience=args.patience, restore_best_weights=True
+            )
+        )
+
+    print(
+        f"🎓 Training {student.name} ({student.count_params():,} parameters) for up to {args.epochs} "
+        f"epochs, T={args.temperature}, alpha={args.alpha}"
+    )
+    started = time.perf_counter()
+    history = trainer.fit(
+        train_ds, validation_data=validation_ds, epochs=args.epochs, callbacks=callbacks, verbose=2
+    )
+    return student, {
+        "seconds": time.perf_counter() - started,
+        "epochs": len(history.history["loss"]),
+        "history": {k: [float(v) for v in values] for k, values in history.history.items()},
+    }
+
+
+def evaluate(args, teacher, student_path, evaluation_dir):
+    import numpy as np
+    from services.distillation import (
+        classification_report,
+        latency_report,
+        predict_probabilities,
+        teacher_targets,
+    )
+    from services.model_inference import ModelInference
+    from services.roi_dataset import RoiDataset
+    from utils.config import Config
+
+    labels = RoiDataset(evaluation_dir).labels.astype(np.int64)
+    # The saved student, loaded the way the server loads it
+    student = ModelInference(student_path).model
+    probabilities = {
+        "teacher": teacher_targets(teacher, args.teacher, evaluation_dir),
+        "student": predict_probabilities(student, evaluation_dir),
+    }
+    report = {
+        "split": evaluation_dir,
+        "samples": int(len(labels)),
+        "agreement": float(
+            np.mean(np.argmax(probabilities["teacher"], 1) == np.argmax(probabilities["student"], 1))
+        ),
+    }
+    for name, path in (("teacher", args.teacher), ("student", student_path)):
+        report[name] = {
+            "path": path,
+            **classification_report(probabilities[name], labels, Config.CLASSES, Config.CONFIDENCE_THRESHOLD),
+            **latency_report(path, args.latency_iterations),
+        }
+    return report
+
+
+def print_report(report):
+    teacher, student = report["teacher"], report["student"]
+    print(f"\n📊 {report['samples']} ROIs of {report['split']}, agreement {report['agreement']:.3f}")
+    print(f"   {'':<22} {'teacher':>12} {'student':>12}")
+    rows = [
+        ("input", lambda m: "x".join(str(v) for v in m["input_size"])),
+        ("parameters", lambda m: f"{m['parameters']:,}"),
+        ("file MB", lambda m: f"{m['file_bytes'] / 1e6:.2f}"),
+        ("accuracy", lambda m: f"{m['accuracy']:.3f}"),
+        ("confident share", lambda m: f"{m['confident_share']:.3f}"),
+        ("confident accuracy", lambda m: f"{m['confident_accuracy']:.3f}"),
+    ]
+    rows += [
+        (f"recall {name}", lambda m, name=name: "-" if m["recall"][name] is None else f"{m['recall'][name]:.3f}")
+        for name in teacher["recall"]
+    ]
+    rows += [
+        ("preprocess p50 ms", lambda m: f"{m['preprocessing']['p50_ms']:.2f}"),
+        ("inference p50 ms", lambda m: f"{m['inference']['p50_ms']:.2f}"),
+        ("inference p95 ms", lambda m: f"{m['inference']['p95_ms']:.2f}"),
+    ]
+    for label, value in rows:
+        print(f"   {label:<22} {value(teacher):>12} {value(student):>12}")
+    speedup = teacher["inference"]["p50_ms"] / max(student["inference"]["p50_ms"], 1e-9)
+    print(f"\n   student inference is {speedup:.1f}x faster at p50")
+
+
+def main():
+    from services.distillation import STUDENTS
+    from utils.config import Config
+
+    parser = argparse.ArgumentParser(description="Distill the RPSense model into a small student")
+    parser.add_argument("dataset", help="ROI dataset root with train/ and validation/ and/or test/")
+    parser.add_argument("--student", choices=sorted(STUDENTS), default="mobilenetv2-0.35")
+    parser.add_argument("--input-size", type=int, default=128, help="square student input (pixels)")
+    parser.add_argument("--teacher", default=Config.MODEL_PATH)
+    parser.add_argument("--output", help="student .h5 (default: model/student-<name>-<size>.h5)")
+    parser.add_argument("--init", choices=("imagenet", "random"), default="imagenet")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--patience", type=int, default=4, help="epochs without validation gain")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--alpha", type=float, default=0.7, help="weight of the teacher term")
+    parser.add_argument("--no-augment", dest="augment", action="store_false")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=0, help="TF intra-op threads (0 = all cores)")
+    parser.add_argument("--latency-iterations", type=int, default=200)
+    parser.add_argument("--evaluate-only", action="store_true", help="skip training, report on --output")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(
+        Config.BASE_DIR, "model", f"student-{args.student}-{args.input_size}.h5"
+    )
+    train_dir, validation_dir, evaluation_dir = split_dirs(args.dataset)
+
+    import tensorflow as tf
+    from services.model_inference import configure_worker_threads
+
+    configure_worker_threads(args.threads or (os.cpu_count() or 1), 1)
+    tf.keras.utils.set_random_seed(args.seed)
+    teacher = tf.keras.models.load_model(args.teacher, compile=False)
+
+    training = None
+    if not args.evaluate_only:
+        student, training = train(args, teacher, train_dir, validation_dir)
+        student.save(output)
+        print(f"💾 Student written to {output}")
+
+    # ModelInference prints per load; keep the report readable
+    with contextlib.redirect_stdout(sys.stderr):
+        report = evaluate(args, teacher, output, evaluation_dir)
+    report["training"] = training
+    report["settings"] = {
+        k: getattr(args, k)
+        for k in ("student", "input_size", "init", "temperature", "alpha", "learning_rate", "batch_size", "augment")
+    }
+    print_report(report)
+
+    report_path = os.path.splitext(output)[0] + ".report.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report written to {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+Offline evaluation of the full serving pipeline
+
+Runs FrameProcessor (hand detection, crop, preprocessing, inference and, for
+rounds, the vote) over labeled data on a pool of forked workers, and reports
+per-class precision/recall, the confusion matrix, hand detection outcomes per
+class and per-stage latency. The parent never imports TensorFlow; each worker
+loads the pipeline after the fork, mapping the same compiled model artifact
+(services/model_cache.py) as the others.
+
+Inputs, labeled by folder name (one of Config.CLASSES):
+    images       <dir>/<class>/*.jpg, scored one frame at a time
+    recordings   <dir>/<class>/*.rpsr (or gameData.label), scored per round
+                 through RoundProcessor, i.e. with aggregation
+
+Predictions that never reach the model are their own confusion columns:
+no_hands, multiple_hands, error (images) and no_detection (rounds), so
+recall is end to end.
+
+Usage (from backend/):
+    python -m tools.evaluate ~/rpsense-dataset/test --workers 16
+    python -m tools.evaluate recordings/labeled --output eval.json
+    python -m tools.evaluate ~/rpsense-dataset/test --variant 160   # a cheaper model variant
+"""
+import os
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import sys
+import time
+from collections import Counter, defaultdict
+
+# Hand detection statuses as confusion columns ("invalid" is a class name)
+FAILURE_COLUMNS = {"no_hands": "no_hands", "invalid": "multiple_hands", "error": "error"}
+
+_frame_processor = None
+_round_processor = None
+_variant = None  # model variant to classify with, None = the served model
+
+
+class _StageTimes:
+    """Trace stand-in that keeps the duration of every pipeline stage"""
+
+    round_id = None
+
+    def __init__(self):
+        self.seconds = defaultdict(list)
+
+    def span(self, name, **args):
+        return contextlib.nullcontext()
+
+    def add_span(self, name, started, duration, args=None):
+        self.seconds[name].append(duration)
+
+    def instant(self, name, **args):
+        pass
+
+
+def _init_worker(threads, variant=None):
+    """Build the pipeline once per worker process"""
+    global _frame_processor, _round_processor, _variant
+    from services.frame_processor import FrameProcessor
+    from services.game_engine import GameEngine
+    from services.model_inference import configure_worker_threads
+    from services.round_processor import RoundProcessor
+
+    class CountingFrameProcessor(FrameProcessor):
+        """Counts the hand detection outcome of every frame a round goes through"""
+
+        outcomes = Counter()
+
+        def process_frame(self, *args, **kwargs):
+            result = super().process_frame(*args, **kwargs)
+            self.outcomes[result[0]] += 1
+            return result
+
+    # The pipeline prints per frame; keep the cost off the terminal
+    sys.stdout = open(os.devnull, "w")
+    configure_worker_threads(threads, 1)
+    _frame_processor = CountingFrameProcessor()
+    _frame_processor.model_inference.warmup()
+    _round_processor = RoundProcessor(_frame_processor, GameEngine())
+    _variant = variant
+
+
+def _ready(_):
+    time.sleep(0.2)
+    return _frame_processor.model_inference.variant_names
+
+
+def evaluate_image(item):
+    """One labeled image as a single frame: (label, predicted, outcomes, stage seconds)"""
+    from utils.image_utils import decode_frame_from_bytes
+
+    path, label = item
+    times = _StageTimes()
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        image = decode_frame_from_bytes(f.read())
+    times.add_span("decode", started, time.perf_counter() - started)
+    if image is None:
+        return label, "error", {"error": 1}, times.seconds
+
+    _frame_processor.outcomes.clear()
+    status, real_time_result, _, _ = _frame_processor.process_frame(
+        image, trace=times, variant=_variant
+    )
+    # Each image is judged on its own, never voted with the next one
+    _frame_processor.postprocessor.clear_buffer()
+    predicted = real_time_result["prediction"] if status == "success" else FAILURE_COLUMNS.get(status, "error")
+    return label, predicted, dict(_frame_processor.outcomes), times.seconds
+
+
+def evaluate_recording(item):
+    """One labeled round recording through RoundProcessor"""
+    from services.round_recorder import RoundRecording
+    from utils.image_utils import decode_frame_from_bytes
+
+    path, label = item
+    times = _StageTimes()
+    _frame_processor.outcomes.clear()
+    started = time.perf_counter()
+    with RoundRecording(path) as recording:
+        frames = recording.frames()
+        try:
+            result = _round_processor.process_round(
+                frames,
+                dict(recording.game_data),
+                decode_frame_from_bytes,
+                times,
+                roi_input=recording.input_kind == "roi",
+                model_variant=_variant,
+            )
+        finally:
+            # Views into the mapping must be gone before it is closed
+            del frames
+    predicted = result["final_prediction"]
+    if predicted == "timeout":
+        predicted = "no_detection"
+    outcomes = dict(_frame_processor.outcomes)
+    if recording.input_kind == "roi":
+        outcomes["client_roi"] = result.get("processed_frames", 0)
+    times.seconds["round"] = [time.perf_counter() - started]
+    return label, predicted, outcomes, times.seconds
+
+
+def find_items(paths, classes):
+    """(images, recordings) as (path, label) lists, labeled by their class folder"""
+    from services.round_recorder import RoundRecording, find_recordings
+    from tools.build_roi_dataset import list_images
+
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images.extend(list_images(path, classes))
+
+    recordings = []
+    for path in find_recordings(paths):
+        label = os.path.basename(os.path.dirname(path))
+        if label not in classes:
+            with RoundRecording(path) as recording:
+                label = recording.game_data.get("label")
+        if label in classes:
+            recordings.append((path, classes.index(label)))
+        else:
+            print(f"⚠️ {path}: no class folder or gameData.label, skipped")
+    return images, recordings
+
+
+def build_report(samples, classes):
+    """Metrics over (true class index, predicted name, outcomes, stage seconds) samples"""
+    from benchmarks.pipeline import summarize
+
+    matrix = defaultdict(Counter)  # true class -> predicted column -> count
+    outcomes = defaultdict(Counter)  # true class -> hand detection outcome -> frames
+    stage_seconds = defaultdict(list)
+    for label, predicted, frame_outcomes, seconds in samples:
+        matrix[classes[label]][predicted] += 1
+        outcomes[classes[label]].update(frame_outcomes)
+        for name, values in seconds.items():
+            stage_seconds[name].extend(values)
+
+    extra_columns = sorted({p for row in matrix.values() for p in row} - set(classes))
+    columns = list(classes) + extra_columns
+    per_class = {}
+    for name in classes:
+        support = sum(matrix[name].values())
+        predicted_as = sum(matrix[true][name] for true in classes)
+        correct = matrix[name][name]
+        precision = correct / predicted_as if predicted_as else 0.0
+        recall = correct / support if support else 0.0
+        per_class[name] = {
+            "support": support,
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        }
+    total = sum(item["support"] for item in per_class.values())
+    return {
+        "samples": total,
+        "accuracy": sum(matrix[name][name] for name in classes) / total if total else 0.0,
+        "per_class": per_class,
+        "confusion": {
+            "columns": columns,
+            "rows": {name: [matrix[name][column] for column in columns] for name in classes},
+        },
+        "hand_detection": {name: dict(outcomes[name]) for name in classes},
+        "stages": {name: summarize(values) for name, values in stage_seconds.items() if values},
+    }
+
+
+def print_report(title, report):
+    print(f"\n📊 {title}: {report['samples']} samples, accuracy {report['accuracy']:.3f}")
+    print(f"   {'class':<10} {'precision':>9} {'recall':>7} {'f1':>6} {'support':>8}")
+    for name, stats in report["per_class"].items():
+        print(
+            f"   {name:<10} {stats['precision']:>9.3f} {stats['recall']:>7.3f} "
+            f"{stats['f1']:>6.3f} {stats['support']:>8}"
+        )
+
+    columns = report["confusion"]["columns"]
+    width = max(9, *(len(c) + 1 for c in columns))
+    print(f"\n   {'true / pred':<12}" + "".join(f"{c:>{width}}" for c in columns))
+    for name, row in report["confusion"]["rows"].items():
+        print(f"   {name:<12}" + "".join(f"{n:>{width}}" for n in row))
+
+    print("\n   hand detection per frame:")
+    for name, counts in report["hand_detection"].items():
+        frames = sum(counts.values())
+        breakdown = ", ".join(f"{k} {v} ({v / frames:.1%})" for k, v in sorted(counts.items()))
+        print(f"   {name:<10} {breakdown or '-'}")
+
+    print(f"\n   {'stage':<16} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in report["stages"].items():
+        print(
+            f"   {name:<16} {stats['mean_ms']:>8.2f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the RPSense serving pipeline offline")
+    parser.add_argument("paths", nargs="+", help="labeled image folders and/or .rpsr recordings")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=1, help="TF intra-op threads per worker")
+    parser.add_argument("--limit", type=int, help="evaluate at most this many images and rounds")
+    parser.add_argument("--output", help="write the report JSON here")
+    parser.add_argument(
+        "--variant", help="model variant spec (size or model path, see RPSENSE_MODEL_VARIANTS), default the served model"
+    )
+    args = parser.parse_args()
+
+    from utils.config import Config
+
+    classes = list(Config.CLASSES)
+    images, recordings = find_items(args.paths, classes)
+    images, recordings = images[: args.limit], recordings[: args.limit]
+    if not images and not recordings:
+        raise SystemExit("❌ No labeled images or recordings found")
+
+    if args.variant:
+        # Load the variant under test whether or not the server is configured to serve it
+        Config.MODEL_VARIANTS = [args.variant]
+
+    print(f"▶️  Evaluating {len(images)} images and {len(recordings)} rounds on {args.workers} workers")
+    reports = {}
+    context = multiprocessing.get_context("fork")
+    with context.Pool(
+        args.workers, initializer=_init_worker, initargs=(args.threads, args.variant)
+    ) as pool:
+        # Wait for every worker to build its pipeline before timing
+        variants = pool.map(_ready, range(args.workers), chunksize=1)[0]
+        if args.variant and args.variant not in variants:
+            raise SystemExit(f"❌ Unknown model variant '{args.variant}' (loaded: {', '.join(variants)})")
+        print(f"🎚️ Model variant {args.variant or variants[0]}")
+        for kind, items, evaluate in (
+            ("images", images, evaluate_image),
+            ("rounds", recordings, evaluate_recording),
+        ):
+            if not items:
+                continue
+            started = time.perf_counter()
+            samples = []
+            for sample in pool.imap_unordered(evaluate, items, chunksize=16 if kind == "images" else 1):
+                samples.append(sample)
+                if len(samples) % 1000 == 0:
+                    print(f"   {len(samples)}/{len(items)} {kind}")
+            elapsed = time.perf_counter() - started
+            report = build_report(samples, classes)
+            report["seconds"] = elapsed
+            report["throughput"] = len(items) / elapsed
+            report["model_variant"] = args.variant or variants[0]
+            reports[kind] = report
+            print_report(f"{kind} ({len(items) / elapsed:.1f}/s)", report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
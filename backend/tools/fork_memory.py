@@ -0,0 +1,198 @@
+"""
+Measure resident memory of pre-forked workers vs independently loaded processes
+
+Starts server.py with N workers, reads /proc/<pid>/smaps_rollup for each
+worker, then starts N standalone processes that each load the pipeline
+themselves and reads the same numbers. Linux only.
+
+The server master never loads the model (TensorFlow is not fork-safe), so
+forking saves nothing over independent processes: the two totals come out
+about even, pre-fork higher by the master itself. The saving is in the
+model: every process maps the same TFLite artifacts (model/cache/) and
+shares their pages. The "model" columns sum the .tflite mappings from
+/proc/<pid>/smaps (PSS well below RSS when shared). Run it again with
+RPSENSE_MODEL_CACHE=0 to compare with workers holding private Keras weights.
+
+Usage (from backend/):
+    python -m tools.fork_memory --workers 4
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STANDALONE_SCRIPT = """
+import sys
+from services.frame_processor import FrameProcessor
+processor = FrameProcessor()
+processor.model_inference.warmup()
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def read_smaps_rollup(pid):
+    """Return memory counters for a pid in MiB (Rss, Pss, Shared, Private)"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024.0
+    shared = values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0)
+    private = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "shared": shared,
+        "private": private,
+    }
+
+
+def read_artifact_mappings(pid):
+    """Return RSS and PSS in MiB of a pid's memory-mapped .tflite artifacts"""
+    rss = pss = 0
+    in_artifact = False
+    with open(f"/proc/{pid}/smaps") as f:
+        for line in f:
+            parts = line.split()
+            if not parts[0].endswith(":"):
+                # Mapping header: address perms offset dev inode [path]
+                in_artifact = parts[-1].endswith(".tflite")
+            elif in_artifact and parts[0] == "Rss:":
+                rss += int(parts[1])
+            elif in_artifact and parts[0] == "Pss:":
+                pss += int(parts[1])
+    return {"model_rss": rss / 1024.0, "model_pss": pss / 1024.0}
+
+
+def read_memory(pid):
+    return {**read_smaps_rollup(pid), **read_artifact_mappings(pid)}
+
+
+def child_pids(parent_pid):
+    """Find direct children of a process by scanning /proc"""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Field 4 (ppid) comes after the parenthesised command name
+        fields = stat[stat.rfind(")") + 2:].split()
+        if int(fields[1]) == parent_pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def wait_for_health(port, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def measure_prefork(workers, port, timeout):
+    master = subprocess.Popen(
+        [sys.executable, "server.py", "--workers", str(workers), "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_health(port, timeout):
+            raise RuntimeError("Pre-fork server did not become healthy")
+        # Give every worker time to finish post_fork initialization
+        deadline = time.time() + timeout
+        while len(child_pids(master.pid)) < workers and time.time() < deadline:
+            time.sleep(0.5)
+        time.sleep(5)
+        return read_memory(master.pid), [read_memory(pid) for pid in child_pids(master.pid)]
+    finally:
+        master.terminate()
+        master.wait(timeout=30)
+
+
+def measure_independent(count, timeout):
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", STANDALONE_SCRIPT],
+            cwd=BACKEND_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        for _ in range(count)
+    ]
+    try:
+        for process in processes:
+            # Skip the pipeline's own load messages
+            line = process.stdout.readline()
+            while line and line.strip() != "ready":
+                line = process.stdout.readline()
+            if not line:
+                raise RuntimeError("Standalone process failed to load the model")
+        return [read_memory(process.pid) for process in processes]
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait(timeout=30)
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    print(
+        f"{'proc':>6} {'RSS':>9} {'PSS':>9} {'shared':>9} {'private':>9} "
+        f"{'model RSS':>10} {'model PSS':>10}  (MiB)"
+    )
+    for i, row in enumerate(rows):
+        print(
+            f"{i:>6} {row['rss']:>9.1f} {row['pss']:>9.1f} "
+            f"{row['shared']:>9.1f} {row['private']:>9.1f} "
+            f"{row['model_rss']:>10.1f} {row['model_pss']:>10.1f}"
+        )
+    print(
+        f"{'total':>6} {sum(r['rss'] for r in rows):>9.1f} "
+        f"{sum(r['pss'] for r in rows):>9.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    master, workers = measure_prefork(args.workers, args.port, args.timeout)
+    print_table("Pre-fork master", [master])
+    print_table("Pre-fork workers", workers)
+
+    independent = measure_independent(args.workers, args.timeout)
+    print_table("Independent processes", independent)
+
+    # PSS splits shared pages between the processes mapping them, so the sum
+    # is the real footprint of each deployment
+    prefork_total = master["pss"] + sum(r["pss"] for r in workers)
+    independent_total = sum(r["pss"] for r in independent)
+    print(f"\n📊 Model artifacts mapped per worker: {workers[0]['model_rss']:.1f} MiB, "
+          f"PSS {workers[0]['model_pss']:.1f} MiB" if workers else "")
+    print(f"📊 Total PSS pre-fork:     {prefork_total:.1f} MiB")
+    print(f"📊 Total PSS independent:  {independent_total:.1f} MiB")
+    print(f"📊 Pre-fork minus independent: {prefork_total - independent_total:+.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Replay recorded rounds through the frame pipeline
+
+Reads .rpsr files written by the round recorder (RPSENSE_RECORD_ROUNDS=1),
+memory-maps them and feeds the original JPEG bytes straight into the same
+RoundProcessor that /process-frames uses, without re-encoding. Rounds are
+spread over a pool of forked workers. The parent never imports TensorFlow;
+each worker loads the pipeline after the fork, mapping the same compiled
+model artifact (services/model_cache.py) as the others.
+
+Usage (from backend/):
+    python -m tools.replay_rounds recordings/                     # every round under recordings/
+    python -m tools.replay_rounds recordings/20261018 --workers 4 --compare
+--compare exits 1 when a replayed final prediction differs from the recorded one.
+"""
+import os
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+_round_processor = None
+
+
+def _init_worker(threads, verbose):
+    """Build the pipeline once per worker process"""
+    global _round_processor
+    from services.frame_processor import FrameProcessor
+    from services.game_engine import GameEngine
+    from services.model_inference import configure_worker_threads
+    from services.round_processor import RoundProcessor
+
+    if not verbose:
+        # The pipeline prints per frame; keep the cost off the terminal
+        sys.stdout = open(os.devnull, "w")
+    configure_worker_threads(threads, 1)
+    processor = FrameProcessor()
+    processor.model_inference.warmup()
+    _round_processor = RoundProcessor(processor, GameEngine())
+
+
+def _ready(_):
+    time.sleep(0.2)
+
+
+def replay_one(path):
+    """Replay a single recording and return a summary dict"""
+    from services.round_recorder import RoundRecording
+    from utils.image_utils import decode_frame_from_bytes
+
+    started = time.perf_counter()
+    with RoundRecording(path) as recording:
+        frames = recording.frames()
+        try:
+            result = _round_processor.process_round(
+                frames,
+                dict(recording.game_data),
+                decode_frame_from_bytes,
+                roi_input=recording.input_kind == "roi",
+            )
+        finally:
+            # Views into the mapping must be gone before it is closed
+            del frames
+        recorded = recording.result.get("final_prediction")
+        frame_count = len(recording.index["frames"])
+        round_id = recording.round_id
+    return {
+        "path": path,
+        "round_id": round_id,
+        "frames": frame_count,
+        "seconds": time.perf_counter() - started,
+        "recorded": recorded,
+        "replayed": result.get("final_prediction"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded RPSense rounds")
+    parser.add_argument("paths", nargs="+", help=".rpsr files or directories")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=1, help="TF intra-op threads per worker")
+    parser.add_argument("--limit", type=int, help="replay at most this many rounds")
+    parser.add_argument("--compare", action="store_true", help="report predictions that changed")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's per-frame output")
+    args = parser.parse_args()
+
+    from services.round_recorder import find_recordings
+
+    paths = find_recordings(args.paths)[: args.limit]
+    if not paths:
+        raise SystemExit("❌ No .rpsr recordings found")
+
+    print(f"▶️  Replaying {len(paths)} rounds on {args.workers} workers")
+    context = multiprocessing.get_context("fork")
+    with context.Pool(args.workers, initializer=_init_worker, initargs=(args.threads, args.verbose)) as pool:
+        # Wait for every worker to build its pipeline before timing
+        pool.map(_ready, range(args.workers), chunksize=1)
+        started = time.perf_counter()
+        results = []
+        for summary in pool.imap_unordered(replay_one, paths):
+            results.append(summary)
+            if args.compare and summary["recorded"] != summary["replayed"]:
+                print(f"   ≠ {summary['round_id']}: {summary['recorded']} -> {summary['replayed']}")
+        elapsed = time.perf_counter() - started
+
+    frames = sum(summary["frames"] for summary in results)
+    print(f"✅ {len(results)} rounds, {frames} frames in {elapsed:.1f}s")
+    print(f"   {60.0 * len(results) / elapsed:.1f} rounds/min, {frames / elapsed:.1f} frames/s")
+
+    if args.compare:
+        changed = [s for s in results if s["recorded"] != s["replayed"]]
+        print(f"   {len(changed)} of {len(results)} final predictions changed")
+        return 1 if changed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
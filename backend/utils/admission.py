@@ -0,0 +1,118 @@
+"""
+Admission control for the frame pipeline
+
+At most `max_concurrency` requests run the pipeline at once and at most
+`max_queue` more wait for a slot. Waiting requests are served earliest
+deadline first, so a round that is about to run out of budget goes ahead of
+one that has just arrived. Anything beyond that is refused straight away
+with Overloaded, which the app turns into a 503 with Retry-After, instead of
+queueing behind requests that are already late.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from utils.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_WAIT_SECONDS,
+    REQUESTS_SHED,
+)
+
+SERVICE_TIME_SMOOTHING = 0.2  # EWMA weight of the newest pipeline hold time
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; `retry_after` is in whole seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Server overloaded ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency, max_queue, service_time_estimate=1.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.service_seconds = service_time_estimate
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = []  # heap of (deadline, seq)
+        self._seq = itertools.count()
+
+    @property
+    def queue_depth(self):
+        return len(self._waiting)
+
+    @property
+    def in_flight(self):
+        return self._running
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained"""
+        backlog = len(self._waiting) + self._running
+        return max(1, math.ceil(backlog * self.service_seconds / self.max_concurrency))
+
+    @contextmanager
+    def slot(self, deadline=None):
+        """
+        Hold a pipeline slot for the body of the `with` block
+        Args:
+            deadline (float): time.monotonic() after which waiting is pointless;
+                also the request's priority in the queue (earlier first)
+        Raises:
+            Overloaded: queue full, or the deadline passed while waiting
+        """
+        self._acquire(deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def _acquire(self, deadline):
+        arrived = time.monotonic()
+        with self._cond:
+            if self._running < self.max_concurrency and not self._waiting:
+                self._admit(arrived)
+                return
+            if len(self._waiting) >= self.max_queue:
+                self._shed("queue_full")
+
+            entry = (deadline if deadline is not None else math.inf, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            ADMISSION_QUEUE_DEPTH.inc()
+            try:
+                while not (self._waiting[0] is entry and self._running < self.max_concurrency):
+                    timeout = None if deadline is None else deadline - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        self._waiting.remove(entry)
+                        heapq.heapify(self._waiting)
+                        self._cond.notify_all()
+                        self._shed("deadline")
+                    self._cond.wait(timeout)
+                heapq.heappop(self._waiting)
+            finally:
+                ADMISSION_QUEUE_DEPTH.dec()
+            self._admit(arrived)
+            # The next waiter may fit too when max_concurrency > 1
+            self._cond.notify_all()
+
+    def _admit(self, arrived):
+        self._running += 1
+        ADMISSION_IN_FLIGHT.inc()
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - arrived)
+
+    def _shed(self, reason):
+        REQUESTS_SHED.labels(reason=reason).inc()
+        raise Overloaded(reason, self.retry_after())
+
+    def _release(self, held):
+        with self._cond:
+            self._running -= 1
+            ADMISSION_IN_FLIGHT.dec()
+            self.service_seconds += SERVICE_TIME_SMOOTHING * (held - self.service_seconds)
+            self._cond.notify_all()
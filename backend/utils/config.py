@@ -6,19 +6,90 @@ load_dotenv()
 class Config:
     # Base paths
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    MODEL_PATH = os.path.join(BASE_DIR, 'model', 'finetuned_after100layers_mobilenetv2_rpsense.h5')
+    MODEL_PATH = os.getenv(
+        "RPSENSE_MODEL_PATH", os.path.join(BASE_DIR, 'model', 'finetuned_after100layers_mobilenetv2_rpsense.h5')
+    )  # or a distilled student (tools/distill.py); its input size is read from the model
     # MODEL_PATH = '/content/drive/MyDrive/RPSense_Dataset/finetuned_after100layers_mobilenetv2_rpsense.h5'
+    # Compiled model artifacts (TFLite, see services/model_cache.py): converted on
+    # the first start, keyed by the model file's hash and the TF/Keras version,
+    # then mapped by every worker instead of rebuilding and compiling the model
+    MODEL_CACHE = os.getenv("RPSENSE_MODEL_CACHE", "1") == "1"
+    MODEL_CACHE_DIR = os.getenv("RPSENSE_MODEL_CACHE_DIR", os.path.join(BASE_DIR, 'model', 'cache'))
     
     # Model configuration
-    MODEL_INPUT_SIZE = (224, 224)
+    MODEL_INPUT_SIZE = (224, 224)  # the finetuned MobileNetV2's; ROI dataset crops are cached at this size
     CLASSES = ['invalid', 'paper', 'rock', 'scissors']
     CONFIDENCE_THRESHOLD = 0.75
+    # Cheaper variants served under load (see services/model_variants.py), most
+    # accurate first: input sizes the model is rebuilt at with its own weights,
+    # or paths of other models (e.g. a distilled student); empty = off. Off by
+    # default: enable a variant once tools/evaluate.py --variant has measured its accuracy
+    MODEL_VARIANTS = [v.strip() for v in os.getenv("RPSENSE_MODEL_VARIANTS", "").split(",") if v.strip()]
     
     # Frame processing configuration
     INFERENCE_WINDOW_DURATION = 2.0  # seconds
     FRAMES_PER_SECOND = 10  # Expected frames per second from frontend
     MAX_FRAMES_IN_WINDOW = int(INFERENCE_WINDOW_DURATION * FRAMES_PER_SECOND)
+    VOTE_WEIGHTING = os.getenv("RPSENSE_VOTE_WEIGHTING", "count")  # 'count' or 'confidence'
+    VOTE_RECENCY_DECAY = float(os.getenv("RPSENSE_VOTE_RECENCY_DECAY", "1.0"))  # < 1.0 favours newer frames
+
+    # Latency budget per /process-frames round, from request receipt (server clock)
+    ROUND_BUDGET_MS = int(os.getenv("RPSENSE_ROUND_BUDGET_MS", "1000"))  # 0 = no deadline
+    MAX_ROUND_BUDGET_MS = 10000  # cap for budgets requested by clients
+    FRAME_COST_ESTIMATE = 0.15  # seconds per frame until measured
+
+    # Model variant switching per worker (see services/model_variants.py): one
+    # variant cheaper when this many requests queue or the p95 of recent rounds
+    # goes over MODEL_VARIANT_P95_MS, one back once the queue is empty and the
+    # p95 is under MODEL_VARIANT_RECOVER_RATIO of it; at most one switch per hold
+    MODEL_VARIANT_QUEUE_DEPTH = int(os.getenv("RPSENSE_MODEL_VARIANT_QUEUE_DEPTH", "2"))
+    MODEL_VARIANT_P95_MS = int(os.getenv("RPSENSE_MODEL_VARIANT_P95_MS", str(int(0.8 * (ROUND_BUDGET_MS or 1000)))))
+    MODEL_VARIANT_RECOVER_RATIO = float(os.getenv("RPSENSE_MODEL_VARIANT_RECOVER_RATIO", "0.5"))
+    MODEL_VARIANT_HOLD_S = float(os.getenv("RPSENSE_MODEL_VARIANT_HOLD_S", "5"))
+    MODEL_VARIANT_WINDOW = 20  # recent rounds the p95 is taken over
+
+    # Admission control per worker (see utils/admission.py); the pipeline and its
+    # frame buffer are shared within a worker, so keep concurrency at 1
+    MAX_CONCURRENT_REQUESTS = int(os.getenv("RPSENSE_MAX_CONCURRENCY", "1"))
+    MAX_QUEUED_REQUESTS = int(os.getenv("RPSENSE_MAX_QUEUE", "4"))
+    MAX_QUEUE_WAIT_MS = int(os.getenv("RPSENSE_MAX_QUEUE_WAIT_MS", "2000"))  # requests without a deadline
     
+    # Chunked round sessions (POST /rounds, see services/round_sessions.py); each
+    # open session holds its buffered frames, so keep the count per worker small
+    # Sessions live in the memory of the worker that opened them, so server.py
+    # turns them off when several workers share its socket (see README)
+    ROUND_SESSIONS = os.getenv("RPSENSE_ROUND_SESSIONS", "1") == "1"
+    MAX_ROUND_SESSIONS = int(os.getenv("RPSENSE_MAX_ROUND_SESSIONS", "8"))
+    ROUND_SESSION_TTL_S = float(os.getenv("RPSENSE_ROUND_SESSION_TTL_S", "15"))  # idle seconds
+
+    # Results of rounds sent with gameData.roundId, replayed to client retries
+    # (see services/round_results.py)
+    # Shared by all workers of the host, so a retry on another worker still hits
+    ROUND_CACHE_DB_PATH = os.getenv(
+        "RPSENSE_ROUND_CACHE_DB", os.path.join(BASE_DIR, 'data', 'round_results.sqlite3')
+    )
+    ROUND_CACHE_SIZE = int(os.getenv("RPSENSE_ROUND_CACHE_SIZE", "256"))  # rounds per host
+    ROUND_CACHE_TTL_S = float(os.getenv("RPSENSE_ROUND_CACHE_TTL_S", "120"))
+    ROUND_CACHE_WAIT_S = 15.0  # cap on a retry's wait for the original; its deadline usually ends it first
+    # A round id claimed this long without a result is taken over: its request
+    # died (rounds end within MAX_ROUND_BUDGET_MS plus the queue wait)
+    ROUND_CACHE_CLAIM_S = 60.0
+
+    # Video clip rounds (POST /process-clip, see utils/video.py): every stride-th
+    # frame of the clip is decoded for the pipeline (3 = 10 fps from a 30 fps
+    # camera), the newest MAX_FRAMES_IN_WINDOW of them are used
+    CLIP_FRAME_STRIDE = int(os.getenv("RPSENSE_CLIP_FRAME_STRIDE", "3"))
+    MAX_CLIP_FRAME_STRIDE = 10  # cap for strides requested by clients
+    MAX_CLIP_BYTES = int(os.getenv("RPSENSE_MAX_CLIP_BYTES", str(4 * 1024 * 1024)))
+
+    # Final result image (see FrameProcessor._final_overlay): 'full' overlay frame,
+    # ROI 'thumbnail' or 'none' (bbox only); clients override it per request
+    # with the X-RPSense-Overlay header
+    RESULT_OVERLAY = os.getenv("RPSENSE_RESULT_OVERLAY", "full")
+    THUMBNAIL_MAX_SIDE = int(os.getenv("RPSENSE_THUMBNAIL_MAX_SIDE", "160"))  # pixels
+    THUMBNAIL_QUALITY = int(os.getenv("RPSENSE_THUMBNAIL_QUALITY", "75"))
+    THUMBNAIL_FORMAT = os.getenv("RPSENSE_THUMBNAIL_FORMAT", "jpeg")  # 'jpeg' or 'webp'
+
     # MediaPipe configuration
     HAND_DETECTION_CONFIDENCE = 0.5
     HAND_TRACKING_CONFIDENCE = 0.5
@@ -29,6 +100,42 @@ class Config:
     DEBUG = True
     HOST = '0.0.0.0'
     PORT = 5000
+
+    # Production server (server.py)
+    WORKERS = int(os.getenv("RPSENSE_WORKERS", "2"))
+    WORKER_TIMEOUT = int(os.getenv("RPSENSE_WORKER_TIMEOUT", "60"))  # seconds
+    TF_INTRA_OP_THREADS = int(os.getenv("RPSENSE_TF_THREADS", "0"))  # 0 = cpu_count // WORKERS
+    TF_INTER_OP_THREADS = 1
+
+    # Round tracing (Chrome trace_event JSON, see utils/tracing.py)
+    TRACE_DIR = os.getenv("RPSENSE_TRACE_DIR", os.path.join(BASE_DIR, 'traces'))
+    TRACE_ALL_ROUNDS = os.getenv("RPSENSE_TRACE_ALL_ROUNDS", "0") == "1"
+    CLIENT_TRACES = os.getenv("RPSENSE_CLIENT_TRACES", "0") == "1"  # honour X-RPSense-Trace
+    TRACE_MAX_FILES = int(os.getenv("RPSENSE_TRACE_MAX_FILES", "200"))  # oldest deleted beyond this
+
+    # Round recording (raw JPEG frames + index, see services/round_recorder.py)
+    RECORD_ROUNDS = os.getenv("RPSENSE_RECORD_ROUNDS", "0") == "1"
+    RECORD_DIR = os.getenv("RPSENSE_RECORD_DIR", os.path.join(BASE_DIR, 'recordings'))
+    RECORD_SAMPLE_RATE = float(os.getenv("RPSENSE_RECORD_SAMPLE_RATE", "1.0"))  # fraction of rounds
+    RECORD_QUEUE_SIZE = 64  # rounds waiting for the writer thread before new ones are dropped
+
+    # Match history and leaderboard (SQLite, see services/match_store.py)
+    MATCH_HISTORY = os.getenv("RPSENSE_MATCH_HISTORY", "1") == "1"
+    MATCH_DB_PATH = os.getenv("RPSENSE_MATCH_DB", os.path.join(BASE_DIR, 'data', 'matches.sqlite3'))
+    MATCH_WRITE_BATCH = 256  # rounds per write transaction
+    MATCH_FLUSH_INTERVAL_S = 0.5  # longest a played round waits to be written
+    MATCH_QUEUE_SIZE = 4096  # rounds waiting for the writer thread before new ones are dropped
+
+    # Request profiling (X-RPSense-Profile header / ?profile=, see utils/profiling.py)
+    PROFILE_DIR = os.getenv("RPSENSE_PROFILE_DIR", os.path.join(BASE_DIR, 'profiles'))
+    PROFILE_EVERY_N = int(os.getenv("RPSENSE_PROFILE_EVERY_N", "0"))  # 0 = only on request
+    CLIENT_PROFILES = os.getenv("RPSENSE_CLIENT_PROFILES", "0") == "1"  # honour the header / ?profile=
+    PROFILE_MAX_FILES = int(os.getenv("RPSENSE_PROFILE_MAX_FILES", "100"))  # oldest deleted beyond this
+    PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+
+    # Memory accounting (see utils/memory.py)
+    MEMORY_SAMPLE_EVERY_N = int(os.getenv("RPSENSE_MEMORY_SAMPLE_EVERY_N", "0"))  # 0 = off
+    DEBUG_ENDPOINTS = os.getenv("RPSENSE_DEBUG_ENDPOINTS", "0") == "1"  # /debug/memory
     
     # Image processing
     HAND_BBOX_PADDING = 30  # Pixels to add around detected hand
\ No newline at end of file
@@ -5,15 +5,30 @@ import base64
 
 def decode_frame_from_base64(base64_string):
     """Decode base64 string to OpenCV image"""
+    img_bytes = decode_base64_payload(base64_string)
+    if img_bytes is None:
+        return None
+    return decode_frame_from_bytes(img_bytes)
+
+
+def decode_base64_payload(base64_string):
+    """Decode a base64 frame (data URL or bare) to the raw JPEG bytes"""
     try:
         # Remove data URL prefix if present
         if "data:image" in base64_string:
             base64_string = base64_string.split(",")[1]
 
         # Decode base64 to bytes
-        img_bytes = base64.b64decode(base64_string)
+        return base64.b64decode(base64_string)
+    except Exception as e:
+        print(f"Error decoding frame: {str(e)}")
+        return None
+
 
-        # Convert to numpy array
+def decode_frame_from_bytes(img_bytes):
+    """Decode encoded image bytes (bytes, memoryview or mmap slice) to OpenCV image"""
+    try:
+        # Convert to numpy array (no copy for buffers such as mmap slices)
         nparr = np.frombuffer(img_bytes, np.uint8)
 
         # Decode to OpenCV image
@@ -27,14 +42,25 @@ def decode_frame_from_base64(base64_string):
 
 def encode_frame_to_base64(img):
     """Encode OpenCV image to base64 string"""
+    return encode_frame(img, "jpeg", 90)
+
+
+IMAGE_FORMATS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+def encode_frame(img, image_format="jpeg", quality=90):
+    """Encode OpenCV image to a base64 data URL in 'jpeg' or 'webp' at the given quality"""
     try:
-        # Encode image to JPEG
-        _, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        extension, quality_flag = IMAGE_FORMATS[image_format]
+        _, buffer = cv2.imencode(extension, img, [quality_flag, int(quality)])
 
         # Convert to base64
         img_base64 = base64.b64encode(buffer).decode("utf-8")
 
-        return f"data:image/jpeg;base64,{img_base64}"
+        return f"data:image/{image_format};base64,{img_base64}"
     except Exception as e:
         print(f"Error encoding frame: {str(e)}")
         return None
@@ -66,6 +92,26 @@ def extract_hand_roi(image, hand_landmarks, padding=20):
     return roi, (x_min, y_min, x_max, y_max)
 
 
+def resize_roi_for_model(roi_image, size):
+    """Hand ROI (BGR) as the model sees it before normalization: resized, RGB, uint8"""
+    resized = cv2.resize(roi_image, size)
+    return cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+
+
+def roi_landmarks(hand_landmarks, image_shape, bbox):
+    """MediaPipe landmarks as [x, y, z] rows normalized to the ROI `bbox` of the image"""
+    h, w = image_shape[:2]
+    x_min, y_min, x_max, y_max = bbox
+    return [
+        [
+            (landmark.x * w - x_min) / (x_max - x_min),
+            (landmark.y * h - y_min) / (y_max - y_min),
+            landmark.z,
+        ]
+        for landmark in hand_landmarks.landmark
+    ]
+
+
 def draw_prediction_overlay(image, bbox, prediction, confidence):
     """Draw prediction overlay on image"""
     x_min, y_min, x_max, y_max = bbox
@@ -89,10 +135,13 @@ def draw_prediction_overlay(image, bbox, prediction, confidence):
         label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2
     )
 
+    # Above the box, or just inside it when the box touches the top edge
+    # (always the case for client-cropped ROIs)
+    label_bottom = y_min if y_min - label_height - 10 >= 0 else y_min + label_height + 10
     cv2.rectangle(
         image,
-        (x_min, y_min - label_height - 10),
-        (x_min + label_width, y_min),
+        (x_min, label_bottom - label_height - 10),
+        (x_min + label_width, label_bottom),
         color,
         -1,
     )
@@ -101,7 +150,7 @@ def draw_prediction_overlay(image, bbox, prediction, confidence):
     cv2.putText(
         image,
         label,
-        (x_min, y_min - 5),
+        (x_min, label_bottom - 5),
         cv2.FONT_HERSHEY_SIMPLEX,
         0.6,
         (255, 255, 255),
@@ -109,3 +158,11 @@ def draw_prediction_overlay(image, bbox, prediction, confidence):
     )
 
     return image
+
+
+def draw_landmark_points(image, landmarks, color=(0, 255, 255)):
+    """Draw hand landmarks given as [x, y] pairs normalized to the image"""
+    h, w = image.shape[:2]
+    for x, y in landmarks:
+        cv2.circle(image, (int(x * w), int(y * h)), 3, color, -1)
+    return image
@@ -0,0 +1,156 @@
+"""
+Memory accounting for the frame pipeline
+
+- array_bytes(): bytes really held by a set of NumPy arrays (views count
+  their whole base array, since that is what they keep alive)
+- Sampled per-request peaks: 1 in MEMORY_SAMPLE_EVERY_N frame requests runs
+  under tracemalloc and observes its peak above the starting point
+- Named tracemalloc snapshots and diffs between them, for /debug/memory
+
+tracemalloc sees Python objects and NumPy/OpenCV arrays, not TensorFlow or
+MediaPipe native heaps; those show up in the resident size only. It is
+process-wide, so with threaded servers a sampled peak includes whatever
+other requests allocated at the same time.
+"""
+import itertools
+import os
+import threading
+import time
+import tracemalloc
+import numpy as np
+from utils.config import Config
+from utils.metrics import REQUEST_PEAK_ALLOCATED_BYTES, WORKER_RESIDENT_BYTES
+
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_lock = threading.Lock()
+_request_counter = itertools.count(1)
+_sampling = False  # a request is currently measuring its peak
+_snapshots = {}  # label -> (taken_at, Snapshot)
+_page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def array_bytes(*values):
+    """Bytes held by the NumPy arrays among `values`, counting each base array once"""
+    seen = set()
+    total = 0
+    for value in values:
+        if not isinstance(value, np.ndarray):
+            continue
+        while isinstance(value.base, np.ndarray):
+            value = value.base
+        if id(value) not in seen:
+            seen.add(id(value))
+            total += value.nbytes
+    return total
+
+
+def resident_bytes():
+    """Current RSS of this process, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _page_size
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def update_resident_gauge():
+    rss = resident_bytes()
+    if rss is not None:
+        WORKER_RESIDENT_BYTES.set(rss)
+    return rss
+
+
+def start_request_sample():
+    """
+    Start measuring this request's peak allocation if it is the 1-in-N sampled one
+    Returns: the traced bytes at the start, or None when not sampled
+    """
+    global _sampling
+    every_n = Config.MEMORY_SAMPLE_EVERY_N
+    if not every_n or next(_request_counter) % every_n:
+        return None
+    with _lock:
+        if _sampling:
+            return None
+        _sampling = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+    return current
+
+
+def finish_request_sample(started_at, endpoint):
+    """Observe the sampled request's peak; stop tracing unless a debug session needs it"""
+    global _sampling
+    with _lock:
+        _, peak = tracemalloc.get_traced_memory()
+        if not _snapshots:
+            tracemalloc.stop()
+        _sampling = False
+    peak_bytes = max(0, peak - started_at)
+    REQUEST_PEAK_ALLOCATED_BYTES.labels(endpoint=endpoint).observe(peak_bytes)
+    return peak_bytes
+
+
+def take_snapshot(label, nframes=10):
+    """Start tracing if needed and keep a named snapshot of live allocations"""
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(nframes)
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        _snapshots[label] = (time.time(), snapshot)
+    return {
+        "label": label,
+        "traceback_limit": snapshot.traceback_limit,
+        "traced_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+    }
+
+
+def diff_snapshot(since, limit=20, key_type="lineno"):
+    """
+    Top allocation sites that grew since the snapshot named `since`
+    Returns: list of dicts sorted by growth, or None if there is no such snapshot
+    """
+    with _lock:
+        if since not in _snapshots:
+            return None
+        taken_at, baseline = _snapshots[since]
+        current = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    sites = []
+    for stat in current.compare_to(baseline, key_type)[:limit]:
+        sites.append(
+            {
+                "site": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                "size_diff": stat.size_diff,
+                "size": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+            }
+        )
+    return {"since": since, "seconds": time.time() - taken_at, "sites": sites}
+
+
+def stop_tracing():
+    """Drop every snapshot and stop tracemalloc"""
+    with _lock:
+        _snapshots.clear()
+        if tracemalloc.is_tracing() and not _sampling:
+            tracemalloc.stop()
+
+
+def memory_summary():
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    return {
+        "pid": os.getpid(),
+        "resident_bytes": update_resident_gauge(),
+        "tracemalloc": {"tracing": tracing, "traced_bytes": current, "peak_bytes": peak},
+        "snapshots": sorted(_snapshots),
+    }
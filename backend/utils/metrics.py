@@ -0,0 +1,207 @@
+"""
+Prometheus metrics for the frame pipeline
+
+Label children are bound once at import so the hot loop only pays for a
+perf_counter() delta and an observe()/inc() call per stage.
+
+When PROMETHEUS_MULTIPROC_DIR is set (server.py does this), every worker
+writes to shared files and /metrics aggregates across workers.
+"""
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+STAGES = (
+    "clip_decode",
+    "decode",
+    "hand_detection",
+    "roi_extraction",
+    "preprocessing",
+    "inference",
+    "postprocessing",
+    "overlay_encode",
+)
+
+STAGE_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+ROUND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+BYTE_BUCKETS = tuple(2 ** power for power in range(16, 31, 2))  # 64 KiB .. 1 GiB
+
+STAGE_SECONDS = Histogram(
+    "rpsense_stage_seconds",
+    "Time spent in each frame pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_LATENCY = {stage: STAGE_SECONDS.labels(stage=stage) for stage in STAGES}
+
+HAND_DETECTION = Counter(
+    "rpsense_hand_detection_total",
+    "Hand detection outcomes per frame",
+    ["outcome"],
+)
+HAND_DETECTION_OUTCOMES = {
+    outcome: HAND_DETECTION.labels(outcome=outcome)
+    for outcome in ("no_hands", "invalid", "success", "error")
+}
+
+FRAMES_PROCESSED = Counter(
+    "rpsense_frames_processed_total",
+    "Frames that went through the pipeline",
+)
+FRAMES_REJECTED_LOW_CONFIDENCE = Counter(
+    "rpsense_frames_rejected_low_confidence_total",
+    "Predictions dropped for falling below CONFIDENCE_THRESHOLD",
+)
+
+ROUNDS = Counter(
+    "rpsense_rounds_total",
+    "Rounds processed by /process-frames by how they ended",
+    ["end_reason"],
+)
+ROUND_END_REASONS = {
+    reason: ROUNDS.labels(end_reason=reason)
+    for reason in ("frame_count", "timeout", "deadline", "exhausted", "no_detection")
+}
+ROUND_SECONDS = Histogram(
+    "rpsense_round_seconds",
+    "Server-side processing time of a /process-frames round",
+    buckets=ROUND_BUCKETS,
+)
+
+# Model variants switched by load (see services/model_variants.py); label
+# children are bound per variant by ModelVariantPolicy
+MODEL_VARIANT_SECONDS = Counter(
+    "rpsense_model_variant_seconds_total",
+    "Time each model variant was the one new rounds were given",
+    ["variant"],
+)
+MODEL_VARIANT_ROUND_SECONDS = Histogram(
+    "rpsense_model_variant_round_seconds",
+    "Round latency from request receipt, by the model variant it ran on",
+    ["variant"],
+    buckets=ROUND_BUCKETS,
+)
+MODEL_VARIANT_ACTIVE = Gauge(
+    "rpsense_model_variant_active",
+    "Workers currently giving new rounds to each model variant",
+    ["variant"],
+    multiprocess_mode="livesum",
+)
+MODEL_VARIANT_SWITCH = Counter(
+    "rpsense_model_variant_switches_total",
+    "Switches to a cheaper (down) or more accurate (up) model variant",
+    ["direction"],
+)
+MODEL_VARIANT_SWITCHES = {
+    direction: MODEL_VARIANT_SWITCH.labels(direction=direction) for direction in ("down", "up")
+}
+
+# Worker start-up (see app.init_components)
+WORKER_COLD_START_SECONDS = Gauge(
+    "rpsense_worker_cold_start_seconds",
+    "Time each worker took to get its frame pipeline ready, by phase "
+    "(model, variants, warmup, total)",
+    ["phase"],
+    multiprocess_mode="liveall",
+)
+
+# Admission control (see utils/admission.py)
+ADMISSION_IN_FLIGHT = Gauge(
+    "rpsense_admission_in_flight",
+    "Requests currently running the frame pipeline",
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "rpsense_admission_queue_depth",
+    "Requests waiting for a pipeline slot",
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "rpsense_admission_wait_seconds",
+    "Time admitted requests waited for a pipeline slot",
+    buckets=STAGE_BUCKETS,
+)
+REQUESTS_SHED = Counter(
+    "rpsense_requests_shed_total",
+    "Requests refused with 503 by admission control",
+    ["reason"],
+)
+
+# Chunked round sessions (see services/round_sessions.py)
+ROUND_SESSIONS_OPEN = Gauge(
+    "rpsense_round_sessions_open",
+    "Round sessions opened and not yet finalized or expired",
+    multiprocess_mode="livesum",
+)
+ROUND_SESSIONS_EXPIRED = Counter(
+    "rpsense_round_sessions_expired_total",
+    "Round sessions dropped after RPSENSE_ROUND_SESSION_TTL_S without a chunk or finalize",
+)
+
+# Idempotent round results (see services/round_results.py)
+ROUND_CACHE = Counter(
+    "rpsense_round_cache_requests_total",
+    "Rounds with a client round id: served from the result cache (hit), after waiting "
+    "for a concurrent request with the same id (coalesced), or processed (miss)",
+    ["outcome"],
+)
+ROUND_CACHE_REQUESTS = {
+    outcome: ROUND_CACHE.labels(outcome=outcome) for outcome in ("hit", "miss", "coalesced")
+}
+ROUND_CACHE_EVICTION = Counter(
+    "rpsense_round_cache_evictions_total",
+    "Round results dropped from the cache, for space (lru) or age (ttl)",
+    ["reason"],
+)
+ROUND_CACHE_EVICTIONS = {
+    reason: ROUND_CACHE_EVICTION.labels(reason=reason) for reason in ("lru", "ttl")
+}
+ROUND_CACHE_ENTRIES = Gauge(
+    "rpsense_round_cache_entries",
+    "Round results held in the result cache (shared by the workers)",
+    multiprocess_mode="livemax",
+)
+
+# Memory accounting (see utils/memory.py)
+FRAME_BUFFER_FRAMES = Gauge(
+    "rpsense_frame_buffer_frames",
+    "Frames held in PredictionPostprocessor buffers",
+    multiprocess_mode="livesum",
+)
+FRAME_BUFFER_BYTES = Gauge(
+    "rpsense_frame_buffer_bytes",
+    "Image bytes (original_image and ROI source frames) held in PredictionPostprocessor buffers",
+    multiprocess_mode="livesum",
+)
+WORKER_RESIDENT_BYTES = Gauge(
+    "rpsense_worker_resident_bytes",
+    "Resident set size of each worker, refreshed after every frame request",
+    multiprocess_mode="liveall",
+)
+REQUEST_PEAK_ALLOCATED_BYTES = Histogram(
+    "rpsense_request_peak_allocated_bytes",
+    "Peak Python/NumPy allocation above the request's starting point (sampled, tracemalloc)",
+    ["endpoint"],
+    buckets=BYTE_BUCKETS,
+)
+
+
+def render_metrics():
+    """
+    Render all metrics in Prometheus text format
+    Returns: (body, content_type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,252 @@
+"""
+On-demand profiling of single requests
+
+Two modes:
+    sample    a background thread snapshots the request thread's Python stack
+              every PROFILE_SAMPLE_INTERVAL seconds and writes collapsed stacks
+              (`a;b;c count`, readable by flamegraph.pl and speedscope)
+    cprofile  deterministic cProfile of the request, written as a .pstats file
+
+Either way the time is also split into mediapipe / keras / opencv / numpy /
+rpsense (our own code) / other, printed to the log and written next to the
+profile as <name>.summary.json. Native calls show up through the Python frame
+that made them, so a sample whose leaf line calls cv2.* counts as opencv.
+
+Only one request per process is profiled at a time; concurrent requests
+asking for a profile simply run unprofiled. Clients can only ask for one
+when Config.CLIENT_PROFILES is set, and PROFILE_DIR keeps the newest
+PROFILE_MAX_FILES profiles.
+"""
+import cProfile
+import itertools
+import json
+import linecache
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+import cv2
+from utils.config import Config
+
+MODES = ("sample", "cprofile")
+PROFILE_SUFFIXES = (".pstats", ".collapsed")
+
+# Path fragments identifying library code, checked in order
+LIBRARIES = (
+    ("mediapipe", "mediapipe"),
+    ("keras", "keras"),
+    ("tensorflow", "keras"),
+    ("cv2", "opencv"),
+    ("numpy", "numpy"),
+)
+
+_active = threading.Lock()
+_request_counter = itertools.count(1)
+
+
+def _library(name):
+    parts = re.split(r"[/\\.\s<>']", name)
+    for fragment, category in LIBRARIES:
+        if fragment in parts:
+            return category
+    return None
+
+
+def _own_code(filename):
+    return filename.startswith(Config.BASE_DIR) and "site-packages" not in filename
+
+
+def categorize_stack(stack):
+    """
+    Category of a sampled stack, given as (filename, lineno) pairs from root to leaf
+    The innermost library frame wins; otherwise our code, unless its leaf line calls OpenCV
+    """
+    for filename, _ in reversed(stack):
+        category = _library(filename)
+        if category:
+            return category
+    if stack:
+        filename, lineno = stack[-1]
+        if "cv2." in linecache.getline(filename, lineno):
+            return "opencv"
+        if _own_code(filename):
+            return "rpsense"
+    return "other"
+
+
+def categorize_function(filename, function_name):
+    """Category of a cProfile entry (builtins have filename '~' and a descriptive name)"""
+    if filename == "~":
+        # OpenCV functions show up bare, e.g. '<imdecode>'
+        bare = function_name.strip("<>")
+        if bare.isidentifier() and hasattr(cv2, bare):
+            return "opencv"
+        return _library(function_name) or "other"
+    category = _library(filename)
+    if category:
+        return category
+    return "rpsense" if _own_code(filename) else "other"
+
+
+class RequestProfiler:
+    def __init__(self, mode, label, interval=None):
+        self.mode = mode
+        self.label = label
+        self.interval = interval or Config.PROFILE_SAMPLE_INTERVAL
+        self.thread_id = threading.get_ident()
+        self.samples = Counter()
+        self.categories = Counter()
+        self.started = None
+        self.elapsed = 0.0
+        self._profile = None
+        self._sampler = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+            self._sampler.start()
+        return self
+
+    def stop(self):
+        if self.started is None or self.elapsed:
+            return self
+        if self._profile is not None:
+            self._profile.disable()
+        else:
+            self._stopped.set()
+            self._sampler.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame)
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[
+                ";".join(
+                    f"{os.path.splitext(os.path.basename(f.f_code.co_filename))[0]}:{f.f_code.co_name}"
+                    for f in stack
+                )
+            ] += 1
+            self.categories[categorize_stack([(f.f_code.co_filename, f.f_lineno) for f in stack])] += 1
+
+    def breakdown(self):
+        """Seconds per category"""
+        if self._profile is not None:
+            seconds = Counter()
+            for (filename, _, function_name), entry in pstats.Stats(self._profile).stats.items():
+                seconds[categorize_function(filename, function_name)] += entry[2]  # tottime
+            return dict(seconds.most_common())
+        total = sum(self.categories.values())
+        return {
+            category: self.elapsed * count / total
+            for category, count in self.categories.most_common()
+        } if total else {}
+
+    def dump(self, directory, max_files=None):
+        """
+        Write the profile plus its category summary and return the profile path
+        Args:
+            max_files (int): keep at most this many profiles, deleting the oldest
+        """
+        self.stop()
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"profile-{self.label}-{int(time.time() * 1000)}-{os.getpid()}")
+        if self._profile is not None:
+            path = f"{stem}.pstats"
+            self._profile.dump_stats(path)
+        else:
+            path = f"{stem}.collapsed"
+            with open(path, "w") as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        breakdown = self.breakdown()
+        with open(f"{stem}.summary.json", "w") as f:
+            json.dump(
+                {
+                    "label": self.label,
+                    "mode": self.mode,
+                    "elapsed_seconds": self.elapsed,
+                    "samples": sum(self.samples.values()),
+                    "seconds_by_category": breakdown,
+                },
+                f,
+                indent=2,
+            )
+        print(
+            f"🔬 Profile ({self.mode}, {1000 * self.elapsed:.0f} ms) written to {path}: "
+            + ", ".join(f"{name} {1000 * seconds:.0f} ms" for name, seconds in breakdown.items())
+        )
+        if max_files:
+            prune_profiles(directory, max_files)
+        return path
+
+
+def prune_profiles(directory, max_files):
+    """Delete all but the newest max_files profiles in directory, with their summaries"""
+    profiles = []
+    for entry in os.scandir(directory):
+        if entry.name.startswith("profile-") and entry.name.endswith(PROFILE_SUFFIXES):
+            try:
+                profiles.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:  # pruned by another worker
+                pass
+    profiles.sort(reverse=True)
+    for _, path in profiles[max_files:]:
+        for stale in (path, f"{os.path.splitext(path)[0]}.summary.json"):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+
+
+def start_request_profile(mode, label):
+    """
+    Start profiling the current request if asked to, or if it is the 1-in-N sampled one
+    Args:
+        mode (str): requested mode ("sample", "cprofile", "1"/"true" = sample) or None;
+            ignored unless Config.CLIENT_PROFILES
+        label (str): endpoint name used in the file name
+    Returns:
+        RequestProfiler or None
+    """
+    mode = (mode or "").lower() if Config.CLIENT_PROFILES else ""
+    if mode in ("1", "true", "yes"):
+        mode = "sample"
+    elif mode not in MODES:
+        mode = ""
+
+    every_n = Config.PROFILE_EVERY_N
+    if every_n and next(_request_counter) % every_n == 0 and not mode:
+        mode = "sample"
+    if not mode:
+        return None
+
+    # cProfile and sys._current_frames sampling are process-wide; one at a time
+    if not _active.acquire(blocking=False):
+        return None
+    try:
+        return RequestProfiler(mode, label).start()
+    except Exception:
+        _active.release()
+        raise
+
+
+def finish_request_profile(profiler):
+    """Stop a profiler from start_request_profile, write it out and return the path"""
+    try:
+        return profiler.dump(Config.PROFILE_DIR, max_files=Config.PROFILE_MAX_FILES)
+    finally:
+        _active.release()
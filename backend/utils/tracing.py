@@ -0,0 +1,207 @@
+"""
+Per-round span recording in Chrome trace_event format
+
+A RoundTrace collects complete ("X") events for the request, each frame and
+each pipeline stage, plus GC pauses while it is active. The JSON it produces
+opens directly in chrome://tracing or https://ui.perfetto.dev.
+
+When tracing is off the pipeline gets NULL_TRACE, whose methods do nothing,
+so the only per-stage cost left is the metrics timing in stage().
+"""
+import gc
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from utils.metrics import STAGE_LATENCY
+from utils.validation import path_under
+
+
+# Values of the X-RPSense-Trace header: write the trace to TRACE_DIR, or
+# return it in the response
+TRACE_MODES = ("dump", "return")
+
+
+def new_round_id():
+    """Short random id used when the client does not send one"""
+    return uuid.uuid4().hex[:12]
+
+
+class RoundTrace:
+    def __init__(self, round_id, metadata=None):
+        self.round_id = round_id
+        self.metadata = metadata or {}
+        self.events = []
+        self.pid = os.getpid()
+        self._gc_started = None
+
+    def span(self, name, **args):
+        """Context manager recording a span around its body"""
+        return _Span(self, name, args)
+
+    def add_span(self, name, started, duration, args=None):
+        """Record a span from a perf_counter() start and a duration in seconds"""
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": started * 1e6,
+            "dur": duration * 1e6,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def instant(self, name, **args):
+        """Record a zero-length marker"""
+        self.events.append(
+            {
+                "name": name,
+                "ph": "i",
+                "s": "t",
+                "ts": time.perf_counter() * 1e6,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+        )
+
+    def start(self):
+        """Begin recording GC pauses (process-wide, so concurrent rounds see them too)"""
+        gc.callbacks.append(self._on_gc)
+        return self
+
+    def stop(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            self.add_span(
+                "gc",
+                self._gc_started,
+                time.perf_counter() - self._gc_started,
+                {"generation": info.get("generation"), "collected": info.get("collected")},
+            )
+            self._gc_started = None
+
+    def to_chrome_trace(self):
+        """Return the trace as a Chrome trace_event JSON object"""
+        thread_names = {
+            event["tid"]: threading.main_thread().name
+            if event["tid"] == threading.main_thread().ident
+            else f"worker-{event['tid']}"
+            for event in self.events
+        }
+        metadata_events = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": self.pid,
+                "args": {"name": f"rpsense round {self.round_id}"},
+            }
+        ] + [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        return {
+            "traceEvents": metadata_events + self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"round_id": self.round_id, **self.metadata},
+        }
+
+    def dump(self, directory, max_files=None):
+        """
+        Write the trace to <directory>/round-<round_id>.json and return the path
+        (round ids come from clients; see client_round_id)
+        Args:
+            max_files (int): keep at most this many traces, deleting the oldest
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = path_under(directory, f"round-{self.round_id}.json")
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+        if max_files:
+            prune_traces(directory, max_files)
+        return path
+
+
+def prune_traces(directory, max_files):
+    """Delete all but the newest max_files round-*.json traces in directory"""
+    traces = []
+    for entry in os.scandir(directory):
+        if entry.name.startswith("round-") and entry.name.endswith(".json"):
+            try:
+                traces.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:  # pruned by another worker
+                pass
+    traces.sort(reverse=True)
+    for _, path in traces[max_files:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class _Span:
+    __slots__ = ("trace", "name", "args", "started")
+
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.add_span(
+            self.name, self.started, time.perf_counter() - self.started, self.args
+        )
+
+
+class _NullTrace:
+    """Stand-in used when a round is not traced"""
+
+    round_id = None
+
+    def span(self, name, **args):
+        return nullcontext()
+
+    def add_span(self, name, started, duration, args=None):
+        pass
+
+    def instant(self, name, **args):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class stage:
+    """
+    Time a pipeline stage: always feeds the rpsense_stage_seconds histogram,
+    and records a span when the round is traced
+    """
+
+    __slots__ = ("trace", "name", "histogram", "started")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+        self.histogram = STAGE_LATENCY[name]
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        self.histogram.observe(elapsed)
+        self.trace.add_span(self.name, self.started, elapsed)
@@ -0,0 +1,69 @@
+"""
+Checks on client input
+
+- client_round_id(): gameData.roundId, which names trace and recording
+  files, restricted to ROUND_ID_PATTERN
+- path_under(): a path built from such input, refused when it would
+  resolve outside of its directory
+- json_field(): a JSON-encoded multipart form field
+
+Input that fails raises InvalidRequest, which the app turns into a 400.
+"""
+import json
+import os
+import re
+
+# Client round ids end up in file names (traces, recordings), so only these
+ROUND_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class InvalidRequest(ValueError):
+    """Client input the server refuses (400)"""
+
+
+class InvalidRoundId(InvalidRequest):
+    """A client-supplied round id that is not safe to use (400)"""
+
+
+def client_round_id(game_data):
+    """
+    gameData.roundId as a string, None when the client sent none
+    Raises:
+        InvalidRoundId: it does not match ROUND_ID_PATTERN
+    """
+    round_id = (game_data or {}).get("roundId")
+    if round_id is None or round_id == "":
+        return None
+    round_id = str(round_id)
+    if not ROUND_ID_PATTERN.fullmatch(round_id):
+        raise InvalidRoundId("gameData.roundId must be 1-64 letters, digits, '_' or '-'")
+    return round_id
+
+
+def path_under(directory, *parts):
+    """
+    os.path.join(directory, *parts), refused (ValueError) when it would
+    resolve outside of directory
+    """
+    root = os.path.realpath(directory)
+    path = os.path.join(directory, *parts)
+    if os.path.commonpath([root, os.path.realpath(path)]) != root:
+        raise ValueError(f"{path} is outside of {directory}")
+    return path
+
+
+def json_field(raw, name, expected):
+    """
+    A JSON form field, parsed as `expected` (dict or list); empty when missing
+    Raises:
+        InvalidRequest: malformed JSON, or not a JSON object/array
+    """
+    if not raw:
+        return expected()
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        raise InvalidRequest(f"{name} is not valid JSON") from None
+    if not isinstance(value, expected):
+        raise InvalidRequest(f"{name} must be a JSON {'object' if expected is dict else 'array'}")
+    return value
@@ -0,0 +1,92 @@
+"""
+In-memory decoding of short video clips (MediaRecorder WebM/VP8/VP9, MP4)
+
+OpenCV's bundled FFmpeg reads the clip straight from the request body through
+a BytesIO (OpenCV >= 4.10), so an upload never takes a round trip through a
+temporary file; older builds fall back to one. Only every stride-th frame is
+retrieved: the frames in between are grabbed (the codec still has to decode
+them, inter frames depend on each other) but never converted to BGR or copied
+into an array.
+"""
+import io
+import os
+import tempfile
+from collections import deque
+import cv2
+
+
+def _open_capture(stream):
+    try:
+        return cv2.VideoCapture(stream, cv2.CAP_FFMPEG, [])
+    except (cv2.error, TypeError):
+        # No stream input in this OpenCV build
+        return _open_capture_from_file(stream.getvalue())
+
+
+def _open_capture_from_file(data):
+    fd, path = tempfile.mkstemp(suffix=".clip")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # FFmpeg has opened the file once the capture exists; unlinking is safe
+        return cv2.VideoCapture(path, cv2.CAP_FFMPEG)
+    finally:
+        os.remove(path)
+
+
+def decode_clip(data, stride=1):
+    """
+    Frames of an encoded clip, in order
+    Args:
+        data (bytes): the whole clip as uploaded
+        stride (int): keep every stride-th frame, starting with the first
+    Yields:
+        (frame index in the clip, timestamp in ms from the container, BGR image)
+    Raises:
+        ValueError: the data is not a clip FFmpeg can demux
+    """
+    # The capture reads from the stream without holding a reference to it
+    stream = io.BytesIO(data)
+    capture = _open_capture(stream)
+    if not capture.isOpened():
+        raise ValueError("Unreadable video clip")
+
+    stride = max(1, int(stride))
+    try:
+        index = 0
+        while capture.grab():
+            if index % stride == 0:
+                timestamp = capture.get(cv2.CAP_PROP_POS_MSEC)
+                ok, image = capture.retrieve()
+                if ok and image is not None:
+                    yield index, timestamp, image
+            index += 1
+    finally:
+        capture.release()
+
+
+def decode_clip_frames(data, stride=1, max_frames=None):
+    """
+    decode_clip() as a list of (frame_id, timestamp, image) holding at most the
+    newest max_frames (players show their throw at the end of a clip); MediaRecorder
+    WebM has no reliable frame count, so older frames are dropped while decoding
+    """
+    return list(deque(decode_clip(data, stride), maxlen=max_frames))
+
+
+def decoded_frame(image):
+    """Decode function for payloads that already are BGR images (decoded clip frames)"""
+    return image
+
+
+def encode_clip_frames(frames, quality=95):
+    """
+    Decoded clip frames as (frame_id, timestamp, JPEG bytes), for recordings,
+    which store every frame as a JPEG
+    """
+    encoded = []
+    for frame_id, timestamp, image in frames:
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if ok:
+            encoded.append((frame_id, timestamp, buffer.tobytes()))
+    return encoded
@@ -1,6 +1,8 @@
 import React, { useEffect, useRef, useState } from "react";
 import { useSelector, useDispatch } from "react-redux";
 import RPSenseAPI from "@/services/api";
+import HandWorkerClient from "@/components/gameplayv1/utils/handWorkerClient";
+import FrameEncoderClient from "@/components/gameplayv1/utils/frameEncoderClient";
 import {
 	selectGameMode,
 	selectRounds,
@@ -70,6 +72,8 @@ const ActivePlay = ({ navigateTo }) => {
 	const frameIntervalRef = useRef(null); // Timer for frame capture interval
 	const resultReceivedRef = useRef(false); // Prevent duplicate final results
 	const frameTimestampRef = useRef(0); // Monotonic timestamp counter for MediaPipe compatibility
+	const handWorkerRef = useRef(null); // Client-side hand detection worker (ROI-only uploads)
+	const frameEncoderRef = useRef(null); // OffscreenCanvas worker that JPEG-encodes frames off the UI thread
 
 	// Score tracking refs to ensure accurate final scores for saving
 	const playerScoreRef = useRef(0);
@@ -113,6 +117,28 @@ const ActivePlay = ({ navigateTo }) => {
 		checkAPIConnection();
 	}, [ML_SERVER]);
 
+	// Optional client-side hand detection: MediaPipe runs in a Web Worker and only
+	// hand ROIs are uploaded; falls back to full frames until the worker is ready
+	useEffect(() => {
+		if (process.env.NEXT_PUBLIC_CLIENT_HAND_DETECTION !== "1" || typeof Worker === "undefined") return;
+		handWorkerRef.current = new HandWorkerClient();
+		return () => {
+			handWorkerRef.current.terminate();
+			handWorkerRef.current = null;
+		};
+	}, []);
+
+	// Encode captured frames in a worker where OffscreenCanvas is available,
+	// so toDataURL never blocks the countdown and neon animations
+	useEffect(() => {
+		if (!FrameEncoderClient.isSupported()) return;
+		frameEncoderRef.current = new FrameEncoderClient();
+		return () => {
+			frameEncoderRef.current.terminate();
+			frameEncoderRef.current = null;
+		};
+	}, []);
+
 	/**
 	 * Check API connection status
 	 */
@@ -144,7 +170,7 @@ const ActivePlay = ({ navigateTo }) => {
 	 */
 	const startCapturing = () => {
 		const captureConfig = { apiConnected, isCapturing };
-		const refs = { apiRef, frameIntervalRef, resultReceivedRef, frameTimestampRef };
+		const refs = { apiRef, frameIntervalRef, resultReceivedRef, frameTimestampRef, handWorkerRef, videoRef };
 		const stateSetters = { setGameState, setIsCapturing };
 		
 		startCapturingUtil(
@@ -459,7 +485,7 @@ const ActivePlay = ({ navigateTo }) => {
 	 * Capture current video frame and add to buffer
 	 */
 	const captureFrameToBuffer = () => {
-		const refs = { videoRef, canvasRef, apiRef, frameTimestampRef };
+		const refs = { videoRef, canvasRef, apiRef, frameTimestampRef, handWorkerRef, frameEncoderRef };
 		const gameContext = { gameMode, rounds, currentRound, playerScore, computerScore };
 		captureFrameToBufferUtil(refs, gameContext);
 	};
@@ -1,4 +1,70 @@
-import React from "react";
+import React, { useEffect, useRef } from "react";
+
+// Same colors as the server-side overlay (draw_prediction_overlay)
+const PREDICTION_COLORS = {
+  rock: "rgb(0, 255, 0)",
+  paper: "rgb(0, 0, 255)",
+  scissors: "rgb(255, 0, 0)",
+  invalid: "rgb(128, 128, 128)",
+};
+
+const loadImage = async (source) => {
+  if (source instanceof Blob) return createImageBitmap(source);
+  const image = new Image();
+  image.src = source;
+  await image.decode();
+  return image;
+};
+
+/**
+ * Draws the final prediction on the client's own copy of the best frame, for
+ * results that come back with a bbox instead of a rendered overlay image
+ */
+const CapturedFrameOverlay = ({ frame, bbox, prediction, confidence }) => {
+  const canvasRef = useRef(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    loadImage(frame)
+      .then((image) => {
+        const canvas = canvasRef.current;
+        if (cancelled || !canvas) return;
+        canvas.width = image.width;
+        canvas.height = image.height;
+        const ctx = canvas.getContext("2d");
+        ctx.drawImage(image, 0, 0);
+
+        const [xMin, yMin, xMax, yMax] = bbox;
+        const color = PREDICTION_COLORS[prediction] || "rgb(255, 255, 255)";
+        ctx.strokeStyle = color;
+        ctx.lineWidth = 2;
+        ctx.strokeRect(xMin, yMin, xMax - xMin, yMax - yMin);
+
+        // Above the box, or just inside it when the box touches the top edge
+        const label = `${prediction.toUpperCase()}: ${confidence.toFixed(2)}`;
+        ctx.font = "bold 16px sans-serif";
+        const labelWidth = ctx.measureText(label).width;
+        const labelHeight = 26;
+        const labelTop = yMin - labelHeight >= 0 ? yMin - labelHeight : yMin;
+        ctx.fillStyle = color;
+        ctx.fillRect(xMin, labelTop, labelWidth + 8, labelHeight);
+        ctx.fillStyle = "white";
+        ctx.fillText(label, xMin + 4, labelTop + 19);
+        if (image.close) image.close();
+      })
+      .catch((error) => console.error("❌ Could not draw the result frame:", error));
+    return () => {
+      cancelled = true;
+    };
+  }, [frame, bbox, prediction, confidence]);
+
+  return (
+    <canvas
+      ref={canvasRef}
+      className="w-96 h-72 object-cover rounded-lg border-2 border-cyan-500 mb-6 mx-auto"
+    />
+  );
+};
 
 const ResultOverlay = ({ finalResult, playerScore, computerScore }) => {
   const getWinnerText = (winner) => {
@@ -23,6 +89,16 @@ const ResultOverlay = ({ finalResult, playerScore, computerScore }) => {
             className="w-96 h-72 object-cover rounded-lg border-2 border-cyan-500 mb-6 mx-auto"
           />
         )}
+        {!finalResult.final_overlay_image &&
+          finalResult.captured_frame &&
+          finalResult.bbox && (
+            <CapturedFrameOverlay
+              frame={finalResult.captured_frame}
+              bbox={finalResult.bbox}
+              prediction={finalResult.final_prediction}
+              confidence={finalResult.confidence}
+            />
+          )}
 
         <h2 className="text-4xl font-bold text-white mb-2">
           Your Move: {finalResult.final_prediction?.toUpperCase()}
@@ -0,0 +1,42 @@
+/**
+ * Frame Encoding Web Worker
+ *
+ * Scales camera frames on an OffscreenCanvas and encodes them to JPEG with the
+ * async convertToBlob, so neither the draw nor the encode runs on the UI thread.
+ * Frames come in as transferred ImageBitmaps and go back as binary Blobs, which
+ * stay binary until they are uploaded as multipart form data.
+ *
+ * Messages in:  { id, bitmap, maxWidth, maxHeight, jpegQuality }
+ * Messages out: { id, blob, width, height } | { id, error }
+ */
+
+let canvas = null;
+let ctx = null;
+
+self.onmessage = async (event) => {
+	const { id, bitmap, maxWidth, maxHeight, jpegQuality } = event.data;
+
+	try {
+		// Scale down to the server's max resolution, keeping the aspect ratio
+		const scale = Math.min(1, maxWidth / bitmap.width, maxHeight / bitmap.height);
+		const width = Math.round(bitmap.width * scale);
+		const height = Math.round(bitmap.height * scale);
+
+		// One canvas for the whole session, resized only when the hint changes
+		if (!canvas) {
+			canvas = new OffscreenCanvas(width, height);
+			ctx = canvas.getContext("2d");
+		} else if (canvas.width !== width || canvas.height !== height) {
+			canvas.width = width;
+			canvas.height = height;
+		}
+
+		ctx.drawImage(bitmap, 0, 0, width, height);
+		const blob = await canvas.convertToBlob({ type: "image/jpeg", quality: jpegQuality });
+		self.postMessage({ id, blob, width, height });
+	} catch (error) {
+		self.postMessage({ id, error: String(error) });
+	} finally {
+		bitmap.close(); // Release the transferred frame
+	}
+};
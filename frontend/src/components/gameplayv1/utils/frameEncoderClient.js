@@ -0,0 +1,70 @@
+/**
+ * Client for the frame encoding Web Worker
+ *
+ * Wraps frameEncoder.worker.js in a promise API. Only used where the browser
+ * has OffscreenCanvas and createImageBitmap; elsewhere frames are still encoded
+ * on the hidden canvas with toDataURL.
+ */
+
+class FrameEncoderClient {
+	static isSupported() {
+		return (
+			typeof Worker !== "undefined" &&
+			typeof OffscreenCanvas !== "undefined" &&
+			typeof createImageBitmap !== "undefined"
+		);
+	}
+
+	constructor() {
+		this.pending = new Map();
+		this.nextId = 0;
+
+		this.worker = new Worker(new URL("./frameEncoder.worker.js", import.meta.url), {
+			type: "module",
+		});
+		this.worker.onmessage = (event) => this.handleMessage(event.data);
+		this.worker.onerror = (error) => {
+			console.error("❌ Frame encoding worker failed:", error.message);
+		};
+	}
+
+	handleMessage(message) {
+		const callbacks = this.pending.get(message.id);
+		this.pending.delete(message.id);
+		if (!callbacks) return;
+
+		if (message.error) {
+			callbacks.reject(new Error(message.error));
+		} else {
+			callbacks.resolve(message.blob);
+		}
+	}
+
+	/**
+	 * Scale and JPEG-encode a frame off the main thread
+	 * @param {ImageBitmap} bitmap - Frame to encode (transferred to the worker)
+	 * @param {Object} captureHint - max_width, max_height and jpeg_quality to use
+	 * @returns {Promise<Blob>} JPEG blob
+	 */
+	encode(bitmap, { max_width, max_height, jpeg_quality }) {
+		const id = this.nextId++;
+		return new Promise((resolve, reject) => {
+			this.pending.set(id, { resolve, reject });
+			this.worker.postMessage(
+				{ id, bitmap, maxWidth: max_width, maxHeight: max_height, jpegQuality: jpeg_quality },
+				[bitmap]
+			);
+		});
+	}
+
+	/**
+	 * Stop the worker and reject any outstanding frames
+	 */
+	terminate() {
+		this.worker.terminate();
+		this.pending.forEach(({ reject }) => reject(new Error("Worker terminated")));
+		this.pending.clear();
+	}
+}
+
+export default FrameEncoderClient;
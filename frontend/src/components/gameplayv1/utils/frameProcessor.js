@@ -72,29 +72,51 @@ export const startCapturing = (captureConfig, refs, stateSetters, captureFrameTo
 	// Clear any previous frame buffer
 	apiRef.current.clearBuffer();
 
+	// Upload ROIs only when the client-side hand detector is loaded; the mode is
+	// fixed for the whole round so the buffer never mixes frames and ROIs
+	const roiMode = Boolean(refs.handWorkerRef?.current?.ready);
+	apiRef.current.setRoiUploads(roiMode);
+	console.log(`🖐️ Hand detection: ${roiMode ? "client-side (ROI uploads)" : "server-side (full frames)"}`);
+
+	// Clip uploads (NEXT_PUBLIC_CLIP_UPLOADS=1): the capture window is recorded
+	// as one video for /process-clip instead of being captured frame by frame
+	const clipMode = !roiMode && apiRef.current.startClip(refs.videoRef?.current?.srcObject);
+	console.log(`🎞️ Upload: ${clipMode ? "video clip" : "frames"}`);
+
+	// Stream frames to the server in chunks while capturing
+	if (!clipMode) apiRef.current.startSession();
+
+	// Frame count and rate come from the server's latest capture hint
+	// (20 frames at 10fps unless the server asks for less under load)
+	const { frames: maxFrames, fps } = apiRef.current.getCaptureHint();
+	const captureInterval = Math.round(1000 / fps);
 	let frameCount = 0;
-	const maxFrames = 20; // Capture exactly 20 frames (2 seconds at 10fps)
 
-	// Frame capture loop - runs every 100ms for 10fps rate
+	// Frame capture loop - one frame per captureInterval
 	frameIntervalRef.current = setInterval(() => {
-		if (frameCount < maxFrames && !resultReceivedRef.current) {
-			captureFrameToBuffer(); // Add current frame to buffer
+		// Stop early once the server's vote over the chunks so far has settled
+		if (frameCount < maxFrames && !resultReceivedRef.current && !apiRef.current.isRoundDecided()) {
+			if (!clipMode) captureFrameToBuffer(); // Add current frame to buffer
 			frameCount++;
 		} else {
 			// Capture complete - stop and process frames
 			stopCapturing(frameIntervalRef, setIsCapturing);
-			
-			// Only process if we have frames and haven't received result yet
-			if (frameCount > 0 && !resultReceivedRef.current && apiRef.current && apiRef.current.getBufferSize() > 0) {
-				console.log(`📊 Captured ${frameCount} frames, processing...`);
-				processFrameBuffer();
-			} else {
-				console.log(`⚠️ Skipping frame processing - frameCount: ${frameCount}, resultReceived: ${resultReceivedRef.current}, bufferSize: ${apiRef.current ? apiRef.current.getBufferSize() : 'N/A'}`);
-				// Provide fallback result if no frames were captured
-				handleAPIError();
-			}
+			if (clipMode) apiRef.current.stopClip();
+
+			// Frames may still be in the hand detection worker (or the clip in the recorder)
+			apiRef.current.waitForPending().then(() => {
+				// Only process if we have frames and haven't received result yet
+				if (frameCount > 0 && !resultReceivedRef.current && apiRef.current && apiRef.current.getBufferSize() > 0) {
+					console.log(`📊 Captured ${frameCount} frames, processing...`);
+					processFrameBuffer();
+				} else {
+					console.log(`⚠️ Skipping frame processing - frameCount: ${frameCount}, resultReceived: ${resultReceivedRef.current}, bufferSize: ${apiRef.current ? apiRef.current.getBufferSize() : 'N/A'}`);
+					// Provide fallback result if no frames were captured
+					handleAPIError();
+				}
+			});
 		}
-	}, 100); // 100ms interval = 10fps
+	}, captureInterval);
 };
 
 /**
@@ -117,7 +139,7 @@ export const stopCapturing = (frameIntervalRef, setIsCapturing) => {
  * @param {Object} gameContext - Current game state for metadata
  */
 export const captureFrameToBuffer = (refs, gameContext) => {
-	const { videoRef, canvasRef, apiRef, frameTimestampRef } = refs;
+	const { videoRef, canvasRef, apiRef, frameTimestampRef, handWorkerRef, frameEncoderRef } = refs;
 	const { gameMode, rounds, currentRound, playerScore, computerScore } = gameContext;
 
 	// Verify required resources are available (video, canvas, API)
@@ -133,30 +155,108 @@ export const captureFrameToBuffer = (refs, gameContext) => {
 		return;
 	}
 
-	// Set canvas dimensions to match video resolution
-	canvas.width = video.videoWidth;
-	canvas.height = video.videoHeight;
+	const metadata = {
+		gameMode,
+		totalRounds: rounds,
+		currentRound: currentRound + 1,
+		playerScore,
+		computerScore,
+	};
+
+	// Client-side hand detection: the worker crops the hand and only the ROI is uploaded
+	if (apiRef.current.roiUploads && handWorkerRef?.current) {
+		captureRoiToBuffer(video, apiRef, frameTimestampRef, handWorkerRef.current, metadata);
+		return;
+	}
+
+	// Encoding worker: scale + JPEG encode off the UI thread, keep the Blob until upload
+	if (frameEncoderRef?.current) {
+		captureEncodedToBuffer(video, apiRef, frameTimestampRef, frameEncoderRef.current, metadata);
+		return;
+	}
+
+	// Fallback without OffscreenCanvas: encode on the hidden canvas
+
+	// Size the canvas to the video, scaled down to the server's max resolution
+	const { max_width, max_height, jpeg_quality } = apiRef.current.getCaptureHint();
+	const scale = Math.min(1, max_width / video.videoWidth, max_height / video.videoHeight);
+	canvas.width = Math.round(video.videoWidth * scale);
+	canvas.height = Math.round(video.videoHeight * scale);
 
 	// Draw current video frame onto canvas for processing
 	ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-	// Convert canvas to base64 JPEG with quality control (70% to balance quality/size)
-	const frameBase64 = canvas.toDataURL("image/jpeg", 0.7);
+	// Convert canvas to base64 JPEG at the hinted quality (0.7 by default)
+	const frameBase64 = canvas.toDataURL("image/jpeg", jpeg_quality);
 
 	// Generate monotonic timestamp (required by MediaPipe for proper frame ordering)
 	frameTimestampRef.current += 1000;
 
 	// Add frame to buffer with metadata
 	apiRef.current.addFrame(frameBase64, {
-		gameMode,
-		totalRounds: rounds,
-		currentRound: currentRound + 1,
-		playerScore,
-		computerScore,
+		...metadata,
 		timestamp: frameTimestampRef.current,
 	});
 };
 
+/**
+ * Send the current video frame to the encoding worker and buffer the JPEG Blob
+ * @param {HTMLVideoElement} video - Camera video element
+ * @param {Object} apiRef - API ref holding the frame buffer
+ * @param {Object} frameTimestampRef - Monotonic timestamp counter
+ * @param {FrameEncoderClient} frameEncoder - Off-main-thread JPEG encoder
+ * @param {Object} metadata - Frame metadata
+ */
+const captureEncodedToBuffer = (video, apiRef, frameTimestampRef, frameEncoder, metadata) => {
+	frameTimestampRef.current += 1000;
+	const timestamp = frameTimestampRef.current;
+	const api = apiRef.current;
+	const captureHint = api.getCaptureHint();
+	const generation = api.generation;
+
+	const pending = createImageBitmap(video)
+		.then((bitmap) => frameEncoder.encode(bitmap, captureHint))
+		.then((blob) => {
+			// The buffer was cleared while the frame was in the worker: it belongs to an old round
+			if (api.isCurrentGeneration(generation)) api.addFrame(blob, { ...metadata, timestamp });
+		})
+		.catch((error) => console.error("❌ Frame encoding failed:", error));
+
+	api.trackPending(pending);
+};
+
+/**
+ * Send the current video frame to the hand detection worker and buffer its ROI
+ * @param {HTMLVideoElement} video - Camera video element
+ * @param {Object} apiRef - API ref holding the frame buffer
+ * @param {Object} frameTimestampRef - Monotonic timestamp counter
+ * @param {HandWorkerClient} handWorker - Client-side hand detector
+ * @param {Object} metadata - Frame metadata
+ */
+const captureRoiToBuffer = (video, apiRef, frameTimestampRef, handWorker, metadata) => {
+	frameTimestampRef.current += 1000;
+	const timestamp = frameTimestampRef.current;
+	const api = apiRef.current;
+	const { jpeg_quality } = api.getCaptureHint();
+	const generation = api.generation;
+
+	const pending = createImageBitmap(video)
+		.then((bitmap) => handWorker.detect(bitmap, jpeg_quality))
+		.then((result) => {
+			// The buffer was cleared while the frame was in the worker: it belongs to an old round
+			if (!api.isCurrentGeneration(generation)) return;
+			// Frames without exactly one hand never leave the browser
+			if (result.status !== "success") {
+				console.log(`🖐️ Frame skipped by client-side detection: ${result.status}`);
+				return;
+			}
+			api.addRoi(result.roi, result.landmarks, { ...metadata, timestamp });
+		})
+		.catch((error) => console.error("❌ Client-side hand detection failed:", error));
+
+	api.trackPending(pending);
+};
+
 /**
  * Process buffered frames via HTTP API
  * @param {Object} processConfig - Configuration for processing
@@ -0,0 +1,115 @@
+/**
+ * Hand Detection Web Worker
+ *
+ * Runs MediaPipe Hands (WASM) off the main thread, crops the hand ROI the same
+ * way the backend's extract_hand_roi does (landmark box + 20px padding), and
+ * returns it as a small JPEG Blob plus landmarks normalized to the ROI. Frames with
+ * no hand or more than one hand are rejected here instead of being uploaded.
+ *
+ * Messages in:  { type: "init" } | { type: "detect", id, bitmap, jpegQuality }
+ * Messages out: { type: "ready" } | { type: "error", message }
+ *               { type: "result", id, status, roi, landmarks }
+ */
+
+// MediaPipe Tasks is loaded from the CDN at runtime (WASM + model asset)
+const TASKS_VISION_URL = "https://cdn.jsdelivr.net/npm/@mediapipe/tasks-vision@0.10.14";
+const HAND_MODEL_URL =
+	"https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/1/hand_landmarker.task";
+
+const ROI_PADDING = 20; // Same padding as the backend's extract_hand_roi
+const ROI_MAX_SIDE = 224; // Model input size; larger crops are scaled down before upload
+const DETECTION_CONFIDENCE = 0.5; // Matches backend HAND_DETECTION_CONFIDENCE
+
+let landmarkerPromise = null;
+
+const loadLandmarker = async () => {
+	const { FilesetResolver, HandLandmarker } = await import(
+		/* webpackIgnore: true */ `${TASKS_VISION_URL}/vision_bundle.mjs`
+	);
+	const fileset = await FilesetResolver.forVisionTasks(`${TASKS_VISION_URL}/wasm`);
+	return HandLandmarker.createFromOptions(fileset, {
+		baseOptions: { modelAssetPath: HAND_MODEL_URL, delegate: "CPU" },
+		runningMode: "IMAGE",
+		numHands: 2, // Detect up to two so multiple hands can be rejected like on the server
+		minHandDetectionConfidence: DETECTION_CONFIDENCE,
+	});
+};
+
+/**
+ * Crop the padded landmark box out of the bitmap and encode it as a JPEG Blob
+ */
+const cropHandROI = async (bitmap, handLandmarks, jpegQuality) => {
+	const { width, height } = bitmap;
+	const xs = handLandmarks.map((point) => point.x * width);
+	const ys = handLandmarks.map((point) => point.y * height);
+
+	const xMin = Math.max(0, Math.floor(Math.min(...xs)) - ROI_PADDING);
+	const xMax = Math.min(width, Math.floor(Math.max(...xs)) + ROI_PADDING);
+	const yMin = Math.max(0, Math.floor(Math.min(...ys)) - ROI_PADDING);
+	const yMax = Math.min(height, Math.floor(Math.max(...ys)) + ROI_PADDING);
+	const roiWidth = xMax - xMin;
+	const roiHeight = yMax - yMin;
+	if (roiWidth <= 0 || roiHeight <= 0) return null;
+
+	// Scale down to the model input size, keeping the aspect ratio
+	const scale = Math.min(1, ROI_MAX_SIDE / Math.max(roiWidth, roiHeight));
+	const canvas = new OffscreenCanvas(Math.round(roiWidth * scale), Math.round(roiHeight * scale));
+	canvas
+		.getContext("2d")
+		.drawImage(bitmap, xMin, yMin, roiWidth, roiHeight, 0, 0, canvas.width, canvas.height);
+	const blob = await canvas.convertToBlob({ type: "image/jpeg", quality: jpegQuality });
+
+	return {
+		roi: blob,
+		// Landmarks relative to the crop, for the server's final overlay
+		landmarks: handLandmarks.map((point) => [
+			(point.x * width - xMin) / roiWidth,
+			(point.y * height - yMin) / roiHeight,
+		]),
+	};
+};
+
+const detect = async ({ id, bitmap, jpegQuality }) => {
+	try {
+		const landmarker = await landmarkerPromise;
+		const result = landmarker.detect(bitmap);
+		const hands = result.landmarks || [];
+
+		if (hands.length === 0) {
+			return { type: "result", id, status: "no_hands" };
+		}
+		if (hands.length > 1) {
+			return { type: "result", id, status: "invalid" };
+		}
+
+		const crop = await cropHandROI(bitmap, hands[0], jpegQuality);
+		if (!crop) {
+			return { type: "result", id, status: "invalid" };
+		}
+		return { type: "result", id, status: "success", ...crop };
+	} catch (error) {
+		return { type: "result", id, status: "error", message: String(error) };
+	} finally {
+		bitmap.close(); // Release the transferred frame
+	}
+};
+
+self.onmessage = async (event) => {
+	const message = event.data;
+
+	if (message.type === "init") {
+		landmarkerPromise = landmarkerPromise || loadLandmarker();
+		try {
+			await landmarkerPromise;
+			self.postMessage({ type: "ready" });
+		} catch (error) {
+			landmarkerPromise = null;
+			self.postMessage({ type: "error", message: String(error) });
+		}
+		return;
+	}
+
+	if (message.type === "detect") {
+		self.postMessage(await detect(message));
+	}
+};
@@ -0,0 +1,66 @@
+/**
+ * Client for the hand detection Web Worker
+ *
+ * Wraps handDetector.worker.js in a promise API. The worker is optional: if it
+ * cannot load MediaPipe (old browser, no network to the CDN) `ready` stays
+ * false and the game keeps uploading full frames.
+ */
+
+class HandWorkerClient {
+	constructor() {
+		this.ready = false;
+		this.pending = new Map();
+		this.nextId = 0;
+
+		this.worker = new Worker(new URL("./handDetector.worker.js", import.meta.url), {
+			type: "module",
+		});
+		this.worker.onmessage = (event) => this.handleMessage(event.data);
+		this.worker.onerror = (error) => {
+			console.error("❌ Hand detection worker failed:", error.message);
+			this.ready = false;
+		};
+
+		this.worker.postMessage({ type: "init" });
+	}
+
+	handleMessage(message) {
+		if (message.type === "ready") {
+			console.log("🖐️ Client-side hand detection ready, uploading ROIs only");
+			this.ready = true;
+		} else if (message.type === "error") {
+			console.error("❌ Hand detection worker could not load MediaPipe:", message.message);
+			this.ready = false;
+		} else if (message.type === "result") {
+			const resolve = this.pending.get(message.id);
+			this.pending.delete(message.id);
+			if (resolve) resolve(message);
+		}
+	}
+
+	/**
+	 * Detect the hand in a frame and crop its ROI
+	 * @param {ImageBitmap} bitmap - Frame to analyse (transferred to the worker)
+	 * @param {number} jpegQuality - JPEG quality for the ROI crop
+	 * @returns {Promise<Object>} { status, roi, landmarks }
+	 */
+	detect(bitmap, jpegQuality) {
+		const id = this.nextId++;
+		return new Promise((resolve) => {
+			this.pending.set(id, resolve);
+			this.worker.postMessage({ type: "detect", id, bitmap, jpegQuality }, [bitmap]);
+		});
+	}
+
+	/**
+	 * Stop the worker and settle any outstanding detections
+	 */
+	terminate() {
+		this.worker.terminate();
+		this.ready = false;
+		this.pending.forEach((resolve) => resolve({ status: "error", message: "Worker terminated" }));
+		this.pending.clear();
+	}
+}
+
+export default HandWorkerClient;
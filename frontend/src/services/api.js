@@ -1,45 +1,201 @@
+// Frames per chunk of a round session upload
+const ROUND_CHUNK_FRAMES = 4;
+
+// A one-shot round upload that gets no answer within this time is sent again
+// with the same roundId; the server replays the original result (and computer
+// move) instead of playing the round twice. Two attempts fit in the gameplay
+// screen's 10 s API timeout.
+const ROUND_REQUEST_TIMEOUT_MS = 4500;
+const ROUND_RETRIES = 1;
+
+const newRoundId = () =>
+  typeof crypto !== 'undefined' && crypto.randomUUID
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+
+// Capture settings used until the server sends a hint
+export const DEFAULT_CAPTURE_HINT = {
+  level: 'normal',
+  fps: 10,
+  frames: 20,
+  jpeg_quality: 0.7,
+  max_width: 640,
+  max_height: 480
+};
+
+// Final result image to ask for: 'full', 'thumbnail' or 'none' (bbox only, the
+// result is drawn on the frame the client captured)
+const RESULT_OVERLAY = process.env.NEXT_PUBLIC_RESULT_OVERLAY || 'none';
+
+// Record each round as one short video clip (MediaRecorder) for /process-clip
+// instead of uploading single frames; the codec compresses across frames, so
+// the upload is much smaller than the same frames as JPEGs
+const CLIP_UPLOADS = process.env.NEXT_PUBLIC_CLIP_UPLOADS === '1';
+const CLIP_MIME_TYPES = ['video/webm;codecs=vp9', 'video/webm;codecs=vp8', 'video/webm', 'video/mp4'];
+const CLIP_BITS_PER_SECOND = 1000000;
+
 class RPSenseAPI {
   constructor(baseURL = process.env.NEXT_PUBLIC_ML_SERVER || 'http://localhost:5000') {
     this.baseURL = baseURL;
     this.frameBuffer = [];
     this.isProcessing = false;
+    this.captureHint = { ...DEFAULT_CAPTURE_HINT };
+    this.roiUploads = false; // Client-side hand detection: upload ROIs to /process-rois
+    this.pendingFrames = []; // Frames still in the hand detection / encoding worker
+    this.generation = 0; // Bumped by clearBuffer; worker results of an older round are dropped
+    this.session = null; // Chunked round session (see startSession)
+    this.roundSessions = true; // Cleared when the server has sessions turned off
+    this.roundId = null; // Idempotency key of the round being captured
+    this.clip = null; // Video clip of the round being recorded (see startClip)
     
     console.log(`🌐 RPSenseAPI initialized with baseURL: ${this.baseURL}`);
   }
 
   /**
    * Add a frame to the buffer
-   * @param {string} frameBase64 - Base64 encoded frame
+   * @param {Blob|string} image - JPEG Blob (worker capture) or base64 encoded frame
    * @param {Object} metadata - Frame metadata (timestamp, etc.)
    */
-  addFrame(frameBase64, metadata = {}) {
+  addFrame(image, metadata = {}) {
     const frame = {
-      frame: frameBase64,
+      frame: image,
       timestamp: Date.now(),
       frameId: this.frameBuffer.length,
       ...metadata
     };
     
     this.frameBuffer.push(frame);
+    this.roundId = this.roundId || newRoundId();
+    this.maybeSendChunk();
+  }
+
+  /**
+   * Add a hand ROI cropped by the client-side hand detector to the buffer
+   * @param {Blob|string} roi - JPEG Blob or base64 encoded ROI crop
+   * @param {Array} landmarks - 21 [x, y] landmarks normalized to the ROI
+   * @param {Object} metadata - Frame metadata (timestamp, etc.)
+   */
+  addRoi(roi, landmarks, metadata = {}) {
+    this.frameBuffer.push({
+      roi,
+      landmarks,
+      timestamp: Date.now(),
+      frameId: this.frameBuffer.length,
+      ...metadata
+    });
+    this.roundId = this.roundId || newRoundId();
+    this.maybeSendChunk();
+  }
+
+  /**
+   * Upload ROIs (client-side hand detection) instead of full frames
+   * @param {boolean} enabled - Whether the buffer holds ROIs
+   */
+  setRoiUploads(enabled) {
+    this.roiUploads = enabled;
+  }
+
+  /**
+   * Track a frame that is still being processed before it reaches the buffer
+   * @param {Promise} promise - Settles once the frame is buffered (or dropped)
+   */
+  trackPending(promise) {
+    this.pendingFrames.push(promise);
+  }
+
+  /**
+   * Whether a worker job started at `generation` still belongs to the buffer
+   * @param {number} generation - this.generation when the job was started
+   * @returns {boolean}
+   */
+  isCurrentGeneration(generation) {
+    return generation === this.generation;
+  }
+
+  /**
+   * Wait for every tracked frame to reach the buffer
+   */
+  async waitForPending() {
+    const pending = this.pendingFrames;
+    this.pendingFrames = [];
+    await Promise.allSettled(pending);
   }
 
   /**
    * Clear the frame buffer
+   * Frames still in a worker keep running; their results carry the old
+   * generation and must not be buffered (see isCurrentGeneration)
    */
   clearBuffer() {
+    if (this.clip && this.clip.recorder.state !== 'inactive') {
+      this.clip.recorder.stop();
+    }
+    this.generation += 1;
     this.frameBuffer = [];
+    this.pendingFrames = [];
+    this.session = null; // An abandoned server session expires on its own
+    this.roundId = null;
+    this.clip = null;
   }
 
   /**
    * Get current buffer size
-   * @returns {number} Number of frames in buffer
+   * @returns {number} Number of frames in buffer (a recorded clip counts as one)
    */
   getBufferSize() {
-    return this.frameBuffer.length;
+    return this.frameBuffer.length + (this.clip && this.clip.blob ? 1 : 0);
+  }
+
+  /**
+   * Record the round as a video clip instead of single frames, when clip
+   * uploads are enabled and the browser can record the camera stream
+   * @param {MediaStream} stream - Camera stream
+   * @returns {boolean} Whether a clip is being recorded
+   */
+  startClip(stream) {
+    if (!CLIP_UPLOADS || !stream || typeof MediaRecorder === 'undefined') return false;
+    const mimeType = CLIP_MIME_TYPES.find((type) => MediaRecorder.isTypeSupported(type));
+    if (!mimeType) return false;
+
+    const track = stream.getVideoTracks()[0];
+    const cameraFps = (track && track.getSettings().frameRate) || 30;
+    const recorder = new MediaRecorder(stream, { mimeType, videoBitsPerSecond: CLIP_BITS_PER_SECOND });
+    const chunks = [];
+    const clip = {
+      recorder,
+      blob: null,
+      // The server keeps every stride-th frame: about the hinted fps
+      stride: Math.max(1, Math.round(cameraFps / this.captureHint.fps))
+    };
+    clip.done = new Promise((resolve) => {
+      recorder.ondataavailable = (event) => {
+        if (event.data.size > 0) chunks.push(event.data);
+      };
+      recorder.onstop = () => {
+        clip.blob = new Blob(chunks, { type: mimeType });
+        resolve();
+      };
+    });
+    recorder.start();
+    this.clip = clip;
+    this.roundId = newRoundId();
+    return true;
+  }
+
+  /**
+   * Stop recording the clip; it is ready once waitForPending() settles
+   */
+  stopClip() {
+    const clip = this.clip;
+    if (!clip || clip.recorder.state === 'inactive') return;
+    clip.recorder.stop();
+    this.trackPending(clip.done);
   }
 
   /**
    * Process frames and get game result
+   * Finalizes the round session when one is open, otherwise (or when the
+   * session failed) uploads the whole buffer in one request
    * @param {Object} gameData - Game configuration and state
    * @returns {Promise<Object>} Game result
    */
@@ -49,31 +205,26 @@ class RPSenseAPI {
       return Promise.reject(new Error('Already processing frames'));
     }
 
-    if (this.frameBuffer.length === 0) {
+    if (this.getBufferSize() === 0) {
       throw new Error('No frames to process');
     }
 
     this.isProcessing = true;
+    gameData = { ...gameData, roundId: this.roundId };
 
     try {
-      const response = await fetch(`${this.baseURL}/process-frames`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'ngrok-skip-browser-warning': 'true'
-        },
-        body: JSON.stringify({
-          frames: this.frameBuffer,
-          gameData: gameData
-        })
-      });
+      let result = this.session ? await this.finalizeSession(gameData) : null;
 
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.error || `HTTP ${response.status}`);
+      if (!result && this.clip) {
+        result = await this.postClip(gameData, { retries: ROUND_RETRIES });
       }
-
-      const result = await response.json();
+      if (!result) {
+        const endpoint = this.roiUploads ? 'process-rois' : 'process-frames';
+        result = await this.postRound(`${this.baseURL}/${endpoint}`, this.frameBuffer, gameData, {
+          retries: ROUND_RETRIES
+        });
+      }
+      this.attachCapturedFrame(result);
       
       // Clear buffer after successful processing
       this.clearBuffer();
@@ -88,6 +239,262 @@ class RPSenseAPI {
     }
   }
 
+  /**
+   * Without a server-rendered overlay, keep the buffered frame the result's
+   * bbox refers to (the best frame) so the UI can draw the result on it
+   * @param {Object} result - Round result
+   */
+  attachCapturedFrame(result) {
+    if (result.final_overlay_image || result.frame_id == null) return;
+    const entry = this.frameBuffer.find((item) => item.frameId === result.frame_id);
+    if (entry) {
+      result.captured_frame = entry.roi || entry.frame;
+    }
+  }
+
+  /**
+   * POST buffered frames and return the parsed response
+   * @param {string} url - Endpoint URL
+   * @param {Array} entries - Buffered frames or ROIs to send
+   * @param {Object} gameData - Game configuration and state
+   * @param {Object} options - retries: times to re-send after a timeout or network error
+   * @returns {Promise<Object>} Response body
+   */
+  async postRound(url, entries, gameData, { retries = 0 } = {}) {
+    const listKey = this.roiUploads ? 'rois' : 'frames';
+    const payloadKey = this.roiUploads ? 'roi' : 'frame';
+
+    // Blobs from the encoding worker go up as binary multipart parts (no base64)
+    const binary = entries.length > 0 && entries[0][payloadKey] instanceof Blob;
+    const headers = {
+      'ngrok-skip-browser-warning': 'true',
+      'X-RPSense-Overlay': RESULT_OVERLAY
+    };
+    let body;
+    if (binary) {
+      body = this.buildMultipartBody(entries, listKey, payloadKey, gameData);
+    } else {
+      headers['Content-Type'] = 'application/json';
+      body = JSON.stringify({
+        [listKey]: entries,
+        gameData: gameData
+      });
+    }
+    return this.sendRound(url, headers, body, retries);
+  }
+
+  /**
+   * POST the recorded clip to /process-clip
+   * @param {Object} gameData - Game configuration and state
+   * @param {Object} options - retries: times to re-send after a timeout or network error
+   * @returns {Promise<Object>} Response body
+   */
+  async postClip(gameData, { retries = 0 } = {}) {
+    const { blob, stride } = this.clip;
+    const form = new FormData();
+    form.append('clip', blob, blob.type.startsWith('video/mp4') ? 'clip.mp4' : 'clip.webm');
+    form.append('stride', String(stride));
+    form.append('gameData', JSON.stringify(gameData));
+    const headers = {
+      'ngrok-skip-browser-warning': 'true',
+      // There is no captured frame to draw a bbox-only result on
+      'X-RPSense-Overlay': RESULT_OVERLAY === 'none' ? 'thumbnail' : RESULT_OVERLAY
+    };
+    return this.sendRound(`${this.baseURL}/process-clip`, headers, form, retries);
+  }
+
+  /**
+   * POST a round body and return the parsed response, keeping the capture hint
+   * @param {string} url - Endpoint URL
+   * @param {Object} headers - Request headers
+   * @param {FormData|string} body - Request body
+   * @param {number} retries - Extra attempts after a timeout or network error
+   * @returns {Promise<Object>} Response body
+   */
+  async sendRound(url, headers, body, retries) {
+    const response = await this.fetchWithRetry(url, { method: 'POST', headers, body }, retries);
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      // 503s from load shedding still say how to capture the retry
+      this.updateCaptureHint(errorData.capture_hint);
+      const error = new Error(errorData.error || `HTTP ${response.status}`);
+      error.status = response.status;
+      throw error;
+    }
+
+    const result = await response.json();
+    this.updateCaptureHint(result.capture_hint);
+    return result;
+  }
+
+  /**
+   * fetch() with a timeout, re-sent up to `retries` times when it times out or
+   * fails at the network level (HTTP errors are returned as they are)
+   * @param {string} url - Request URL
+   * @param {Object} init - fetch options
+   * @param {number} retries - Extra attempts
+   * @returns {Promise<Response>}
+   */
+  async fetchWithRetry(url, init, retries) {
+    for (let attempt = 0; ; attempt++) {
+      const controller = new AbortController();
+      const timer = setTimeout(() => controller.abort(), ROUND_REQUEST_TIMEOUT_MS);
+      try {
+        return await fetch(url, { ...init, signal: controller.signal });
+      } catch (error) {
+        if (attempt >= retries) throw error;
+        console.warn(`⚠️ Round upload failed (${error.name}), retrying with the same round id`);
+      } finally {
+        clearTimeout(timer);
+      }
+    }
+  }
+
+  /**
+   * Start a chunked round session: frames are sent to the server in chunks of
+   * ROUND_CHUNK_FRAMES while capture is still running, so the server works on
+   * them during the capture and the final request only carries the tail.
+   * The session is opened lazily with the first chunk.
+   * @param {Object} options
+   * @param {number} options.players - 2 for a two-player round in front of one camera
+   */
+  startSession({ players = 1 } = {}) {
+    this.roundId = newRoundId();
+    if (!this.roundSessions) return;
+    this.session = {
+      id: null,
+      players, // fixed when the session opens, the server sets up the round's votes then
+      sent: 0, // frames of the buffer already sent
+      chain: Promise.resolve(), // chunks go up one at a time, in order
+      failed: false,
+      finalReady: false
+    };
+  }
+
+  /**
+   * Whether the server already settled the round's vote (capture can stop early)
+   * @returns {boolean}
+   */
+  isRoundDecided() {
+    return Boolean(this.session && this.session.finalReady);
+  }
+
+  /**
+   * Queue the unsent frames as a chunk once there are enough of them
+   */
+  maybeSendChunk() {
+    const session = this.session;
+    if (!session || session.failed) return;
+    if (this.frameBuffer.length - session.sent < ROUND_CHUNK_FRAMES) return;
+
+    const entries = this.frameBuffer.slice(session.sent);
+    session.sent = this.frameBuffer.length;
+    session.chain = session.chain.then(() => this.sendChunk(session, entries));
+  }
+
+  /**
+   * Open the session if needed and send one chunk
+   * @param {Object} session - Session started by startSession
+   * @param {Array} entries - Frames of the chunk
+   */
+  async sendChunk(session, entries) {
+    if (session.failed) return;
+    try {
+      if (!session.id) {
+        const opened = await this.postJSON('rounds', {
+          mode: this.roiUploads ? 'rois' : 'frames',
+          gameData: {
+            roundId: this.roundId,
+            players: session.players,
+            ...(entries[0] ? { gameMode: entries[0].gameMode, currentRound: entries[0].currentRound } : {})
+          }
+        });
+        session.id = opened.session_id;
+      }
+      const chunk = await this.postRound(`${this.baseURL}/rounds/${session.id}/frames`, entries, {});
+      session.finalReady = chunk.final_ready;
+    } catch (error) {
+      // Old server, session opened on another worker, or shed: fall back to one upload
+      console.warn('⚠️ Round session failed, the round will be uploaded in one request:', error.message);
+      session.failed = true;
+      // Multi-worker server: sessions cannot work there, stop opening them
+      if (error.status === 501) this.roundSessions = false;
+    }
+  }
+
+  /**
+   * Send the remaining frames with the finalize request
+   * @param {Object} gameData - Game configuration and state
+   * @returns {Promise<Object|null>} Game result, or null to fall back to a single upload
+   */
+  async finalizeSession(gameData) {
+    const session = this.session;
+    this.session = null;
+    await session.chain;
+    if (session.failed || !session.id) return null;
+    // The session's votes were set up for the player count it was opened with
+    if (Number(gameData.players || 1) !== session.players) return null;
+
+    try {
+      return await this.postRound(
+        `${this.baseURL}/rounds/${session.id}/finalize`,
+        this.frameBuffer.slice(session.sent),
+        gameData
+      );
+    } catch (error) {
+      // A shed finalize would be shed again as a full upload
+      if (error.status === 503) throw error;
+      console.warn('⚠️ Round finalize failed, uploading the round in one request:', error.message);
+      return null;
+    }
+  }
+
+  /**
+   * POST a JSON body and return the parsed response
+   * @param {string} path - Endpoint path
+   * @param {Object} payload - Request body
+   * @returns {Promise<Object>} Response body
+   */
+  async postJSON(path, payload) {
+    const response = await fetch(`${this.baseURL}/${path}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'ngrok-skip-browser-warning': 'true',
+        'X-RPSense-Overlay': RESULT_OVERLAY
+      },
+      body: JSON.stringify(payload)
+    });
+    if (!response.ok) {
+      const error = new Error(`HTTP ${response.status}`);
+      error.status = response.status;
+      throw error;
+    }
+    return response.json();
+  }
+
+  /**
+   * Multipart body with one JPEG part per frame, a "meta" JSON array holding
+   * the rest of each frame's fields in the same order, and "gameData"
+   * @param {Array} entries - Buffered frames or ROIs
+   * @param {string} listKey - Part name of the images ("frames" or "rois")
+   * @param {string} payloadKey - Buffer field holding the Blob ("frame" or "roi")
+   * @param {Object} gameData - Game configuration and state
+   * @returns {FormData} Request body
+   */
+  buildMultipartBody(entries, listKey, payloadKey, gameData) {
+    const form = new FormData();
+    const meta = entries.map((entry, index) => {
+      const { [payloadKey]: image, ...fields } = entry;
+      form.append(listKey, image, `${payloadKey}-${index}.jpg`);
+      return fields;
+    });
+    form.append('meta', JSON.stringify(meta));
+    form.append('gameData', JSON.stringify(gameData));
+    return form;
+  }
+
   /**
    * Health check
    * @returns {Promise<Object>} Server status
@@ -105,13 +512,79 @@ class RPSenseAPI {
         throw new Error(`HTTP ${response.status}`);
       }
 
-      return await response.json();
+      const status = await response.json();
+      this.updateCaptureHint(status.capture_hint);
+      return status;
     } catch (error) {
       console.error('Health check failed:', error);
       throw error;
     }
   }
 
+  /**
+   * Leaderboard page (players ranked by wins)
+   * @param {number} limit - Players per page (max 100)
+   * @param {number} offset - Players to skip
+   * @returns {Promise<Object>} { players, total, limit, offset }
+   */
+  async getLeaderboard(limit = 20, offset = 0) {
+    return this.getJSON(`leaderboard?limit=${limit}&offset=${offset}`);
+  }
+
+  /**
+   * Totals, rank and move counts of a player
+   * @param {string} playerName - gameData.playerName the rounds were played under
+   * @returns {Promise<Object>} Player stats
+   */
+  async getPlayerStats(playerName) {
+    return this.getJSON(`players/${encodeURIComponent(playerName)}/stats`);
+  }
+
+  /**
+   * A player's rounds, newest first
+   * @param {string} playerName - gameData.playerName the rounds were played under
+   * @param {number} limit - Rounds per page (max 100)
+   * @param {number|null} before - next_before of the previous page
+   * @returns {Promise<Object>} { rounds, limit, next_before }
+   */
+  async getPlayerRounds(playerName, limit = 20, before = null) {
+    const cursor = before != null ? `&before=${before}` : '';
+    return this.getJSON(`players/${encodeURIComponent(playerName)}/rounds?limit=${limit}${cursor}`);
+  }
+
+  /**
+   * GET a JSON endpoint and return the parsed response
+   * @param {string} path - Endpoint path and query
+   * @returns {Promise<Object>} Response body
+   */
+  async getJSON(path) {
+    const response = await fetch(`${this.baseURL}/${path}`, {
+      headers: { 'ngrok-skip-browser-warning': 'true' }
+    });
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+    return response.json();
+  }
+
+  /**
+   * Store the server's capture hint (fps, frames, jpeg_quality, max_width, max_height)
+   * @param {Object} hint - capture_hint from a server response
+   */
+  updateCaptureHint(hint) {
+    if (hint && hint.fps > 0 && hint.frames > 0) {
+      this.captureHint = { ...DEFAULT_CAPTURE_HINT, ...hint };
+    }
+  }
+
+  /**
+   * Capture settings to use for the next round
+   * @returns {Object} Latest capture hint from the server
+   */
+  getCaptureHint() {
+    return this.captureHint;
+  }
+
   /**
    * Set base URL for the API
    * @param {string} url - New base URL